@@ -2,6 +2,8 @@
 Vercel Serverless Function Entry Point
 Wraps FastAPI app for Vercel serverless deployment
 """
+import asyncio
+import json
 import sys
 import os
 
@@ -16,7 +18,16 @@ from src.main import app
 # Use Mangum to wrap FastAPI for serverless
 try:
     from mangum import Mangum
-    handler = Mangum(app, lifespan="off")
+    _mangum = Mangum(app, lifespan="off")
+
+    def handler(event, context):
+        # Scheduled warm-up pings prime pooled connections without going through the app
+        if isinstance(event, dict) and (event.get("warmup") or event.get("source") == "serverless-plugin-warmup"):
+            from src.services.warmup import warm_up
+            # Same loop Mangum runs requests on, so the pooled LLM connections stay usable
+            timings = asyncio.get_event_loop().run_until_complete(warm_up())
+            return {"statusCode": 200, "body": json.dumps({"status": "warm", "timings_ms": timings})}
+        return _mangum(event, context)
 except ImportError:
     # Fallback if mangum is not installed
     def handler(event, context):
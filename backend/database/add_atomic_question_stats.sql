@@ -0,0 +1,96 @@
+-- Atomic generated question stats
+-- Workers send only the response times they gathered since their last flush;
+-- the database merges them into the stored t-digest under the row lock and
+-- derives median_time_ms from the merged digest, so concurrent flushes of
+-- the same question from several workers all count
+-- (run after add_generated_questions.sql and add_atomic_sketch_merge.sql, which defines tdigest_merge)
+
+-- Same estimate as TDigest.quantile in src/utils/tdigest.py
+CREATE OR REPLACE FUNCTION tdigest_quantile(d JSONB, q DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  n INTEGER := jsonb_array_length(COALESCE(d->'means', '[]'));
+  total DOUBLE PRECISION := 0;
+  target DOUBLE PRECISION;
+  cumulative DOUBLE PRECISION := 0;
+  prev_center DOUBLE PRECISION;
+  prev_mean DOUBLE PRECISION;
+  center DOUBLE PRECISION;
+  mean DOUBLE PRECISION;
+  weight DOUBLE PRECISION;
+BEGIN
+  IF d IS NULL OR n = 0 THEN
+    RETURN NULL;
+  END IF;
+  IF q <= 0 THEN
+    RETURN (d->>'min')::DOUBLE PRECISION;
+  END IF;
+  IF q >= 1 THEN
+    RETURN (d->>'max')::DOUBLE PRECISION;
+  END IF;
+
+  SELECT sum(w.value::DOUBLE PRECISION) INTO total FROM jsonb_array_elements_text(d->'weights') AS w(value);
+  target := q * total;
+
+  FOR i IN 0 .. n - 1 LOOP
+    mean := (d->'means'->>i)::DOUBLE PRECISION;
+    weight := (d->'weights'->>i)::DOUBLE PRECISION;
+    center := cumulative + weight / 2;
+    IF i = 0 AND target <= center THEN
+      RETURN (d->>'min')::DOUBLE PRECISION + (mean - (d->>'min')::DOUBLE PRECISION) * target / center;
+    END IF;
+    IF i > 0 AND target < center THEN
+      RETURN prev_mean + (mean - prev_mean) * (target - prev_center) / (center - prev_center);
+    END IF;
+    prev_center := center;
+    prev_mean := mean;
+    cumulative := cumulative + weight;
+  END LOOP;
+
+  -- Past the last centroid's center: interpolate towards the maximum
+  IF total - prev_center = 0 THEN
+    RETURN (d->>'max')::DOUBLE PRECISION;
+  END IF;
+  RETURN prev_mean + ((d->>'max')::DOUBLE PRECISION - prev_mean) * (target - prev_center) / (total - prev_center);
+END;
+$$;
+
+-- Replaces the version in add_generated_questions.sql, which took each worker's merged copy of the digest
+DROP FUNCTION IF EXISTS record_generated_question_stats(BIGINT[], INTEGER[], INTEGER[], BIGINT[], JSONB[], REAL[]);
+
+-- Add a batch of per-question stat deltas. The stored rows are locked before
+-- their digests are merged, so a concurrent flush waits and then merges into
+-- the result of this one
+CREATE OR REPLACE FUNCTION record_generated_question_stats(
+  p_ids BIGINT[],
+  p_attempts INTEGER[],
+  p_correct INTEGER[],
+  p_time_spent BIGINT[],
+  p_time_digests JSONB[]
+) RETURNS INTEGER
+LANGUAGE sql
+AS $$
+  WITH merged AS (
+    SELECT s.id, s.attempts, s.correct, s.time_spent, tdigest_merge(g.time_digest, s.time_digest) AS time_digest
+    FROM unnest(p_ids, p_attempts, p_correct, p_time_spent, p_time_digests)
+      AS s(id, attempts, correct, time_spent, time_digest)
+    JOIN generated_questions g ON g.id = s.id
+    FOR UPDATE OF g
+  ),
+  updated AS (
+    UPDATE generated_questions g SET
+      attempts = g.attempts + m.attempts,
+      correct = g.correct + m.correct,
+      time_spent = g.time_spent + m.time_spent,
+      time_digest = m.time_digest,
+      median_time_ms = COALESCE(tdigest_quantile(m.time_digest, 0.5)::REAL, g.median_time_ms),
+      updated_at = TIMEZONE('utc', NOW())
+    FROM merged m
+    WHERE g.id = m.id
+    RETURNING 1
+  )
+  SELECT count(*)::INTEGER FROM updated;
+$$;
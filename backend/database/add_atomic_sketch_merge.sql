@@ -0,0 +1,84 @@
+-- Atomic response time sketch merges
+-- Workers send only the samples they gathered since their last flush; the
+-- database merges them into the stored t-digest inside the upsert, which
+-- holds the row lock, so concurrent flushes from several workers all count
+
+-- Same merge as TDigest.merge in src/utils/tdigest.py (k1 scale function)
+CREATE OR REPLACE FUNCTION tdigest_merge(a JSONB, b JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  compression DOUBLE PRECISION := COALESCE((a->>'compression')::DOUBLE PRECISION, (b->>'compression')::DOUBLE PRECISION, 100);
+  total DOUBLE PRECISION;
+  means JSONB := '[]'::JSONB;
+  weights JSONB := '[]'::JSONB;
+  cur_mean DOUBLE PRECISION;
+  cur_weight DOUBLE PRECISION;
+  so_far DOUBLE PRECISION := 0;
+  q_limit DOUBLE PRECISION;
+  item RECORD;
+BEGIN
+  IF a IS NULL OR jsonb_array_length(COALESCE(a->'means', '[]')) = 0 THEN
+    RETURN b;
+  END IF;
+  IF b IS NULL OR jsonb_array_length(COALESCE(b->'means', '[]')) = 0 THEN
+    RETURN a;
+  END IF;
+
+  SELECT sum(w.value::DOUBLE PRECISION) INTO total
+  FROM (VALUES (a), (b)) AS digests(d), jsonb_array_elements_text(d->'weights') AS w(value);
+
+  FOR item IN
+    SELECT m.value::DOUBLE PRECISION AS mean, (d->'weights'->>(m.ord::INTEGER - 1))::DOUBLE PRECISION AS weight
+    FROM (VALUES (a), (b)) AS digests(d), jsonb_array_elements_text(d->'means') WITH ORDINALITY AS m(value, ord)
+    ORDER BY 1, 2
+  LOOP
+    IF cur_mean IS NULL THEN
+      cur_mean := item.mean;
+      cur_weight := item.weight;
+      -- k_inv(k(q) + 1) simplifies to this
+      q_limit := (sin(asin(-1.0) + 2 * pi() / compression) + 1) / 2;
+    ELSIF (so_far + cur_weight + item.weight) / total <= q_limit THEN
+      cur_weight := cur_weight + item.weight;
+      cur_mean := cur_mean + (item.mean - cur_mean) * item.weight / cur_weight;
+    ELSE
+      means := means || to_jsonb(cur_mean);
+      weights := weights || to_jsonb(cur_weight);
+      so_far := so_far + cur_weight;
+      q_limit := (sin(asin(2 * least(so_far / total, 1.0) - 1) + 2 * pi() / compression) + 1) / 2;
+      cur_mean := item.mean;
+      cur_weight := item.weight;
+    END IF;
+  END LOOP;
+  means := means || to_jsonb(cur_mean);
+  weights := weights || to_jsonb(cur_weight);
+
+  RETURN jsonb_build_object(
+    'compression', compression,
+    'means', means,
+    'weights', weights,
+    'min', least((a->>'min')::DOUBLE PRECISION, (b->>'min')::DOUBLE PRECISION),
+    'max', greatest((a->>'max')::DOUBLE PRECISION, (b->>'max')::DOUBLE PRECISION)
+  );
+END;
+$$;
+
+-- Merge per-worker deltas into the stored sketches; returns the merged rows
+CREATE OR REPLACE FUNCTION merge_response_time_sketches(
+  p_topics TEXT[],
+  p_difficulties TEXT[],
+  p_digests JSONB[],
+  p_sample_counts BIGINT[]
+) RETURNS TABLE (topic TEXT, difficulty TEXT, digest JSONB)
+LANGUAGE sql
+AS $$
+  INSERT INTO response_time_sketches AS s (topic, difficulty, digest, sample_count)
+  SELECT * FROM unnest(p_topics, p_difficulties, p_digests, p_sample_counts)
+  ON CONFLICT (topic, difficulty) DO UPDATE SET
+    digest = tdigest_merge(s.digest, EXCLUDED.digest),
+    sample_count = s.sample_count + EXCLUDED.sample_count,
+    updated_at = TIMEZONE('utc', NOW())
+  RETURNING s.topic, s.difficulty, s.digest;
+$$;
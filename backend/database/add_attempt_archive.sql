@@ -0,0 +1,59 @@
+-- Tiered storage for question attempts
+-- Attempts older than the retention window are folded into attempt_rollups,
+-- written to per-user columnar archive files (src/services/attempt_archive.py)
+-- and deleted, so question_attempts and its indexes only hold recent rows
+
+CREATE TABLE IF NOT EXISTS attempt_rollups (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  topic TEXT NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  time_spent BIGINT NOT NULL DEFAULT 0,
+  last_attempt_at TIMESTAMP WITH TIME ZONE,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, topic)
+);
+
+-- Finds archivable rows without scanning the table
+CREATE INDEX IF NOT EXISTS idx_question_attempts_created_at ON question_attempts(created_at);
+
+ALTER TABLE attempt_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own attempt rollups"
+  ON attempt_rollups FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- Users with attempts older than the cutoff
+CREATE OR REPLACE FUNCTION archivable_attempt_users(p_cutoff TIMESTAMP WITH TIME ZONE, p_limit INTEGER)
+RETURNS TABLE (user_id UUID)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT DISTINCT qa.user_id FROM question_attempts qa WHERE qa.created_at < p_cutoff LIMIT p_limit;
+$$;
+
+-- Fold the given attempts into the user's rollups and delete them, in one transaction
+CREATE OR REPLACE FUNCTION archive_question_attempts(p_user_id UUID, p_ids UUID[])
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+  WITH removed AS (
+    DELETE FROM question_attempts
+    WHERE user_id = p_user_id AND id = ANY(p_ids)
+    RETURNING topic, is_correct, time_spent, created_at
+  ),
+  folded AS (
+    INSERT INTO attempt_rollups (user_id, topic, attempts, correct, time_spent, last_attempt_at)
+    SELECT p_user_id, topic, count(*), count(*) FILTER (WHERE is_correct), sum(time_spent), max(created_at)
+    FROM removed
+    GROUP BY topic
+    ON CONFLICT (user_id, topic) DO UPDATE SET
+      attempts = attempt_rollups.attempts + excluded.attempts,
+      correct = attempt_rollups.correct + excluded.correct,
+      time_spent = attempt_rollups.time_spent + excluded.time_spent,
+      last_attempt_at = GREATEST(attempt_rollups.last_attempt_at, excluded.last_attempt_at),
+      updated_at = TIMEZONE('utc', NOW())
+    RETURNING 1
+  )
+  SELECT count(*)::INTEGER FROM removed;
+$$;
@@ -0,0 +1,28 @@
+-- Bulk insert for columnar save-score payloads
+-- One array per column, unnested server-side, so the API never builds per-row JSON objects
+-- Question ids are BIGINT (see add_generated_questions.sql); drop the INTEGER[] version first,
+-- otherwise both overloads exist and the RPC call is ambiguous
+
+DROP FUNCTION IF EXISTS insert_question_attempts(UUID, UUID, INTEGER[], TEXT[], TEXT[], BOOLEAN[], INTEGER[]);
+
+CREATE OR REPLACE FUNCTION insert_question_attempts(
+  p_session_id UUID,
+  p_user_id UUID,
+  p_question_ids BIGINT[],
+  p_topics TEXT[],
+  p_difficulties TEXT[],
+  p_is_correct BOOLEAN[],
+  p_time_spent INTEGER[]
+) RETURNS INTEGER
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+  WITH inserted AS (
+    INSERT INTO question_attempts (session_id, user_id, question_id, topic, difficulty, is_correct, time_spent)
+    SELECT p_session_id, p_user_id, a.question_id, a.topic, a.difficulty, a.is_correct, a.time_spent
+    FROM unnest(p_question_ids, p_topics, p_difficulties, p_is_correct, p_time_spent)
+      AS a(question_id, topic, difficulty, is_correct, time_spent)
+    RETURNING 1
+  )
+  SELECT count(*)::INTEGER FROM inserted;
+$$;
@@ -0,0 +1,66 @@
+-- Content-addressed store for AI-generated questions
+-- Every validated question is kept under a stable id derived from its text
+-- (question_key in src/services/question_validation.py), with running stats
+-- from attempts, so good questions can be served again instead of regenerated.
+-- Generated ids use up to 53 bits, so question ids become BIGINT everywhere
+-- (re-run add_columnar_attempt_insert.sql after this one)
+
+CREATE TABLE IF NOT EXISTS generated_questions (
+  id BIGINT PRIMARY KEY,
+  question TEXT NOT NULL,
+  options JSONB NOT NULL,
+  correct_answer INTEGER NOT NULL,
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  explanation TEXT NOT NULL DEFAULT '',
+  attempts BIGINT NOT NULL DEFAULT 0,
+  correct BIGINT NOT NULL DEFAULT 0,
+  time_spent BIGINT NOT NULL DEFAULT 0,
+  time_digest JSONB,
+  median_time_ms REAL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL
+);
+
+-- Reuse candidates are the most-answered questions of a topic
+CREATE INDEX IF NOT EXISTS idx_generated_questions_topic ON generated_questions(topic, attempts DESC);
+
+ALTER TABLE question_attempts ALTER COLUMN question_id TYPE BIGINT;
+ALTER TABLE question_ratings ALTER COLUMN question_id TYPE BIGINT;
+ALTER TABLE review_items ALTER COLUMN question_id TYPE BIGINT;
+
+-- Shared content and aggregates, no user data - readable by everyone, written by the service role
+ALTER TABLE generated_questions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view generated questions"
+  ON generated_questions FOR SELECT
+  USING (true);
+
+-- Add a batch of per-question stats. Counters are incremented in place, so
+-- concurrent workers never lose attempts. Superseded by add_atomic_question_stats.sql,
+-- which also merges the response time digests in the database
+CREATE OR REPLACE FUNCTION record_generated_question_stats(
+  p_ids BIGINT[],
+  p_attempts INTEGER[],
+  p_correct INTEGER[],
+  p_time_spent BIGINT[],
+  p_time_digests JSONB[],
+  p_median_times REAL[]
+) RETURNS INTEGER
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE generated_questions g SET
+      attempts = g.attempts + s.attempts,
+      correct = g.correct + s.correct,
+      time_spent = g.time_spent + s.time_spent,
+      time_digest = COALESCE(s.time_digest, g.time_digest),
+      median_time_ms = COALESCE(s.median_time_ms, g.median_time_ms),
+      updated_at = TIMEZONE('utc', NOW())
+    FROM unnest(p_ids, p_attempts, p_correct, p_time_spent, p_time_digests, p_median_times)
+      AS s(id, attempts, correct, time_spent, time_digest, median_time_ms)
+    WHERE g.id = s.id
+    RETURNING 1
+  )
+  SELECT count(*)::INTEGER FROM updated;
+$$;
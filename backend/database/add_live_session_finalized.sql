@@ -0,0 +1,8 @@
+-- When a game session was finalized (user stats folded in)
+-- Live sessions are created with NULL and finalized by one conditional
+-- update WHERE finalized_at IS NULL, so a retried or concurrent finalize on
+-- another worker can't count the game twice. Every other session is complete
+-- when inserted, so the default marks existing and new rows finalized
+
+ALTER TABLE game_sessions
+ADD COLUMN IF NOT EXISTS finalized_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW());
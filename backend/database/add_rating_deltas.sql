@@ -0,0 +1,44 @@
+-- Atomic skill rating updates
+-- Workers send how much a game moved each rating instead of the absolute
+-- result, and the database adds it to the stored row under the row lock, so
+-- two games saved at once on different workers both count
+-- (run after add_skill_ratings.sql)
+
+CREATE OR REPLACE FUNCTION apply_rating_deltas(
+  p_user_id UUID,
+  p_topics TEXT[],
+  p_topic_deltas DOUBLE PRECISION[],
+  p_topic_attempts INTEGER[],
+  p_topic_time_spent DOUBLE PRECISION[],
+  p_question_ids BIGINT[],
+  p_question_priors DOUBLE PRECISION[],
+  p_question_deltas DOUBLE PRECISION[],
+  p_question_attempts INTEGER[]
+) RETURNS VOID
+LANGUAGE sql
+AS $$
+  -- Rows a rating starts from (no-ops when they exist), then the deltas on top
+  INSERT INTO user_topic_ratings (user_id, topic)
+  SELECT p_user_id, t FROM unnest(p_topics) AS t
+  ON CONFLICT (user_id, topic) DO NOTHING;
+
+  -- avg_time_ms stays the mean over every attempt
+  UPDATE user_topic_ratings r SET
+    rating = r.rating + d.delta,
+    avg_time_ms = (r.avg_time_ms * r.attempts + d.time_spent) / (r.attempts + d.attempts),
+    attempts = r.attempts + d.attempts,
+    updated_at = TIMEZONE('utc', NOW())
+  FROM unnest(p_topics, p_topic_deltas, p_topic_attempts, p_topic_time_spent) AS d(topic, delta, attempts, time_spent)
+  WHERE r.user_id = p_user_id AND r.topic = d.topic;
+
+  INSERT INTO question_ratings (question_id, rating)
+  SELECT * FROM unnest(p_question_ids, p_question_priors)
+  ON CONFLICT (question_id) DO NOTHING;
+
+  UPDATE question_ratings r SET
+    rating = r.rating + d.delta,
+    attempts = r.attempts + d.attempts,
+    updated_at = TIMEZONE('utc', NOW())
+  FROM unnest(p_question_ids, p_question_deltas, p_question_attempts) AS d(question_id, delta, attempts)
+  WHERE r.question_id = d.question_id;
+$$;
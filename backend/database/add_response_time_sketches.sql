@@ -0,0 +1,19 @@
+-- Streaming response time sketches (t-digest) per topic and difficulty
+-- Each backend worker merges its local samples in periodically, so pace
+-- percentiles never require scanning question_attempts
+
+CREATE TABLE IF NOT EXISTS response_time_sketches (
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  digest JSONB NOT NULL,
+  sample_count BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (topic, difficulty)
+);
+
+-- Aggregates only, no user data - readable by everyone, written by the service role
+ALTER TABLE response_time_sketches ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view response time sketches"
+  ON response_time_sketches FOR SELECT
+  USING (true);
@@ -0,0 +1,24 @@
+-- Spaced repetition (SM-2) state per user and question
+-- "Next N due" is an index range scan on (user_id, due_at)
+
+CREATE TABLE IF NOT EXISTS review_items (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  question_id INTEGER NOT NULL,
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  ease DOUBLE PRECISION NOT NULL DEFAULT 2.5,
+  repetitions INTEGER NOT NULL DEFAULT 0,
+  interval_days DOUBLE PRECISION NOT NULL DEFAULT 0,
+  lapses INTEGER NOT NULL DEFAULT 0,
+  due_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, question_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_review_items_user_due ON review_items(user_id, due_at);
+
+ALTER TABLE review_items ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own review items"
+  ON review_items FOR SELECT
+  USING (auth.uid() = user_id);
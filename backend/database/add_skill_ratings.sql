@@ -0,0 +1,30 @@
+-- Incremental Elo ratings: skill per (user, topic) and difficulty per question
+-- Updated on every save-score, so adaptivity never re-reads question_attempts
+
+CREATE TABLE IF NOT EXISTS user_topic_ratings (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  topic TEXT NOT NULL,
+  rating DOUBLE PRECISION NOT NULL DEFAULT 1500,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  avg_time_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, topic)
+);
+
+CREATE TABLE IF NOT EXISTS question_ratings (
+  question_id INTEGER PRIMARY KEY,
+  rating DOUBLE PRECISION NOT NULL DEFAULT 1500,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL
+);
+
+ALTER TABLE user_topic_ratings ENABLE ROW LEVEL SECURITY;
+ALTER TABLE question_ratings ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own topic ratings"
+  ON user_topic_ratings FOR SELECT
+  USING (auth.uid() = user_id);
+
+CREATE POLICY "Anyone can view question ratings"
+  ON question_ratings FOR SELECT
+  USING (true);
@@ -0,0 +1,27 @@
+-- Topic aggregates computed in the database
+-- Selecting question_attempts rows through PostgREST reads the whole (largest)
+-- table and is silently cut off at max-rows; these return one row per topic
+-- (run after add_attempt_archive.sql)
+
+-- Every topic that has been attempted, including archived attempts
+CREATE OR REPLACE FUNCTION attempted_topics()
+RETURNS TABLE (topic TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT topic FROM question_attempts
+  UNION
+  SELECT topic FROM attempt_rollups;
+$$;
+
+-- Per-topic totals of a user's attempts still in question_attempts (archived ones are in attempt_rollups)
+CREATE OR REPLACE FUNCTION user_topic_totals(p_user_id UUID)
+RETURNS TABLE (topic TEXT, attempts BIGINT, correct BIGINT, time_spent BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT qa.topic, count(*), count(*) FILTER (WHERE qa.is_correct), COALESCE(sum(qa.time_spent), 0)
+  FROM question_attempts qa
+  WHERE qa.user_id = p_user_id
+  GROUP BY qa.topic;
+$$;
@@ -0,0 +1,14 @@
+-- Drop review items and question ratings recorded under ambiguous question ids
+-- Games number their own questions 1..N and the static bank used 1..15, so
+-- these rows pooled unrelated questions. Bank questions are now identified by
+-- question_key(text), like generated ones, and only bank or stored questions
+-- are rated and scheduled. Content-derived ids are 53-bit hashes, so the old
+-- small ids are told apart by size (safe to run before or after deploying)
+
+DELETE FROM review_items
+WHERE question_id < 4294967296
+  AND question_id NOT IN (SELECT id FROM generated_questions);
+
+DELETE FROM question_ratings
+WHERE question_id < 4294967296
+  AND question_id NOT IN (SELECT id FROM generated_questions);
@@ -0,0 +1,139 @@
+-- SQLite mirror of schema.sql and the migrations next to it
+-- Used by the embedded backend (DATABASE_BACKEND=sqlite)
+-- UUIDs are TEXT, arrays and JSONB are JSON TEXT, timestamps are ISO-8601 UTC TEXT
+
+-- Stand-in for Supabase auth.users
+CREATE TABLE IF NOT EXISTS users (
+  id TEXT PRIMARY KEY,
+  email TEXT NOT NULL UNIQUE,
+  password_hash TEXT NOT NULL,
+  created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS game_sessions (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  game_id TEXT NOT NULL,
+  score INTEGER NOT NULL,
+  accuracy REAL NOT NULL,
+  correct_answers INTEGER NOT NULL,
+  wrong_answers INTEGER NOT NULL,
+  max_streak INTEGER NOT NULL,
+  average_response_time INTEGER NOT NULL,
+  created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL,
+  -- add_live_session_finalized.sql (NULL while a live session is open)
+  finalized_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS question_attempts (
+  id TEXT PRIMARY KEY,
+  session_id TEXT NOT NULL REFERENCES game_sessions(id) ON DELETE CASCADE,
+  user_id TEXT NOT NULL,
+  question_id INTEGER NOT NULL,
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  is_correct INTEGER NOT NULL,
+  time_spent INTEGER NOT NULL,
+  created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL UNIQUE,
+  total_games_played INTEGER DEFAULT 0,
+  total_score INTEGER DEFAULT 0,
+  total_questions_answered INTEGER DEFAULT 0,
+  total_correct INTEGER DEFAULT 0,
+  total_wrong INTEGER DEFAULT 0,
+  overall_accuracy REAL DEFAULT 0,
+  favorite_game TEXT,
+  weak_topics TEXT DEFAULT '[]',
+  strong_topics TEXT DEFAULT '[]',
+  updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_game_sessions_user_id ON game_sessions(user_id);
+CREATE INDEX IF NOT EXISTS idx_game_sessions_created_at ON game_sessions(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_question_attempts_session_id ON question_attempts(session_id);
+CREATE INDEX IF NOT EXISTS idx_question_attempts_topic ON question_attempts(topic);
+CREATE INDEX IF NOT EXISTS idx_question_attempts_user_id ON question_attempts(user_id);
+CREATE INDEX IF NOT EXISTS idx_question_attempts_user_topic ON question_attempts(user_id, topic);
+
+-- add_response_time_sketches.sql
+CREATE TABLE IF NOT EXISTS response_time_sketches (
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  digest TEXT NOT NULL,
+  sample_count INTEGER NOT NULL DEFAULT 0,
+  updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL,
+  PRIMARY KEY (topic, difficulty)
+);
+
+-- add_skill_ratings.sql
+CREATE TABLE IF NOT EXISTS user_topic_ratings (
+  user_id TEXT NOT NULL,
+  topic TEXT NOT NULL,
+  rating REAL NOT NULL DEFAULT 1500,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  avg_time_ms REAL NOT NULL DEFAULT 0,
+  updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL,
+  PRIMARY KEY (user_id, topic)
+);
+
+CREATE TABLE IF NOT EXISTS question_ratings (
+  question_id INTEGER PRIMARY KEY,
+  rating REAL NOT NULL DEFAULT 1500,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL
+);
+
+-- add_review_items.sql
+CREATE TABLE IF NOT EXISTS review_items (
+  user_id TEXT NOT NULL,
+  question_id INTEGER NOT NULL,
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  ease REAL NOT NULL DEFAULT 2.5,
+  repetitions INTEGER NOT NULL DEFAULT 0,
+  interval_days REAL NOT NULL DEFAULT 0,
+  lapses INTEGER NOT NULL DEFAULT 0,
+  due_at TEXT NOT NULL,
+  updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL,
+  PRIMARY KEY (user_id, question_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_review_items_user_due ON review_items(user_id, due_at);
+
+-- add_attempt_archive.sql
+CREATE TABLE IF NOT EXISTS attempt_rollups (
+  user_id TEXT NOT NULL,
+  topic TEXT NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  time_spent INTEGER NOT NULL DEFAULT 0,
+  last_attempt_at TEXT,
+  updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL,
+  PRIMARY KEY (user_id, topic)
+);
+
+CREATE INDEX IF NOT EXISTS idx_question_attempts_created_at ON question_attempts(created_at);
+
+-- add_generated_questions.sql (INTEGER already holds 64-bit question ids)
+CREATE TABLE IF NOT EXISTS generated_questions (
+  id INTEGER PRIMARY KEY,
+  question TEXT NOT NULL,
+  options TEXT NOT NULL,
+  correct_answer INTEGER NOT NULL,
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  explanation TEXT NOT NULL DEFAULT '',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  time_spent INTEGER NOT NULL DEFAULT 0,
+  time_digest TEXT,
+  median_time_ms REAL,
+  created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL,
+  updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_generated_questions_topic ON generated_questions(topic, attempts DESC);
@@ -0,0 +1,125 @@
+"""
+Cold-start profile for the serverless entry point (api/index.py)
+Imports the app in fresh interpreters with `python -X importtime`, serves one
+/api/health request, reports the slowest imports and fails if the cold start
+exceeds the budget or a deferred dependency is imported eagerly. Run from
+backend/:
+
+  python -m loadtest.coldstart                    # 5 runs, default budget
+  python -m loadtest.coldstart --budget-ms 800 --top 30
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by the agent / Supabase paths - must not load for /api/health
+DEFERRED_MODULES = ["openai", "ddgs", "supabase", "jwt", "redis"]
+
+# Runs in the fresh interpreter: import the handler module, then serve one request
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import api.index
+imported = time.perf_counter()
+from starlette.testclient import TestClient
+served_start = time.perf_counter()
+TestClient(api.index.app).get("/api/health/")
+served = time.perf_counter() - served_start
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": served * 1000,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for each line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def profile_once(env: Dict[str, str]) -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["imports"] = _parse_importtime(result.stderr)
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import profile for api/index.py")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Max median import + first request time")
+    parser.add_argument("--top", type=int, default=20, help="Slowest top-level imports to list")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    env = {
+        **os.environ,
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "DATABASE_BACKEND": os.environ.get("DATABASE_BACKEND", "sqlite"),
+        "SQLITE_PATH": os.environ.get("SQLITE_PATH", ":memory:"),
+    }
+    reports = [profile_once(env) for _ in range(args.runs)]
+
+    totals = [r["import_ms"] + r["first_request_ms"] for r in reports]
+    cold_start_ms = statistics.median(totals)
+    last = reports[-1]
+
+    # Cumulative time per module is only meaningful for the outermost import of each
+    # package, so rank top-level packages by their largest cumulative entry
+    by_package: Dict[str, int] = {}
+    for name, _, cumulative_us in last["imports"]:
+        package = name.strip().split(".")[0]
+        by_package[package] = max(by_package.get(package, 0), cumulative_us)
+    slowest = sorted(by_package.items(), key=lambda kv: -kv[1])[: args.top]
+
+    eager = [m for m in DEFERRED_MODULES if m in last["modules"]]
+
+    print(f"\nCold start over {args.runs} runs (import api.index + first /api/health)")
+    print(f"  import         p50 {statistics.median(r['import_ms'] for r in reports):8.1f} ms")
+    print(f"  first request  p50 {statistics.median(r['first_request_ms'] for r in reports):8.1f} ms")
+    print(f"  total          p50 {cold_start_ms:8.1f} ms   max {max(totals):8.1f} ms   budget {args.budget_ms:.0f} ms")
+    print(f"  modules loaded     {len(last['modules'])}")
+    print("\nSlowest top-level imports (cumulative)")
+    for package, cumulative_us in slowest:
+        print(f"  {package:<32} {cumulative_us / 1000:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "cold_start_ms": cold_start_ms,
+                "runs": totals,
+                "slowest": slowest,
+                "eager_deferred_modules": eager,
+            }, f, indent=2)
+
+    failed = False
+    if eager:
+        print(f"\nFAIL: deferred modules imported at cold start: {', '.join(eager)}")
+        failed = True
+    if cold_start_ms > args.budget_ms:
+        print(f"\nFAIL: cold start {cold_start_ms:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\nOK: within cold-start budget")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
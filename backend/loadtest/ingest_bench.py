@@ -0,0 +1,59 @@
+"""
+Micro-benchmark: save-score body size and parse time per encoding
+"json (fastapi)" is the route's old path - json.loads then model validation -
+"json" is the same body validated straight from bytes, and the columnar
+encodings validate one array per field. Run from backend/:
+
+  python -m loadtest.ingest_bench
+  python -m loadtest.ingest_bench --attempts 50 300 1000 --number 200
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+from typing import List, Optional
+
+from loadtest.run import build_save_score, encode_save_score
+from src.models.schemas import ColumnarSaveScoreRequest, SaveScoreRequest
+
+def _body(attempts: int) -> dict:
+    """A load-test body resized to exactly `attempts` attempts"""
+    body = build_save_score(random.Random(attempts))
+    rows = body["analytics"]["questionAttempts"]
+    body["analytics"]["questionAttempts"] = (rows * (attempts // len(rows) + 1))[:attempts]
+    return body
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Save-score ingestion micro-benchmark")
+    parser.add_argument("--attempts", type=int, nargs="+", default=[50, 300, 1000])
+    parser.add_argument("--number", type=int, default=200, help="Parses per timing")
+    args = parser.parse_args(argv)
+
+    try:
+        import msgpack
+    except ImportError:
+        msgpack = None
+
+    print(f"\n{'attempts':>8} {'encoding':<16} {'bytes':>9} {'parse':>11}")
+    for count in args.attempts:
+        body = _body(count)
+        json_bytes = encode_save_score(body, "json")
+        columnar_bytes = encode_save_score(body, "columnar")
+        cases = {
+            "json (fastapi)": (json_bytes, lambda: SaveScoreRequest.model_validate(json.loads(json_bytes))),
+            "json": (json_bytes, lambda: SaveScoreRequest.model_validate_json(json_bytes)),
+            "columnar": (columnar_bytes, lambda: ColumnarSaveScoreRequest.model_validate_json(columnar_bytes)),
+        }
+        if msgpack is not None:
+            msgpack_bytes = encode_save_score(body, "msgpack")
+            cases["msgpack"] = (msgpack_bytes, lambda: ColumnarSaveScoreRequest.model_validate(msgpack.unpackb(msgpack_bytes)))
+
+        for name, (data, parse) in cases.items():
+            seconds = min(timeit.repeat(parse, number=args.number, repeat=5)) / args.number
+            print(f"{count:>8} {name:<16} {len(data):>9} {seconds * 1e6:>8.1f} us")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""
+End-to-end HTTP load test for the FastAPI app
+Drives a realistic mix of login, save-score (with large questionAttempts
+lists), stats polling and question fetches, then reports throughput and
+p50/p99 latency per route.
+
+By default the app is started locally against stand-ins: the embedded
+SQLite repository instead of Supabase and loadtest.stub_llm instead of
+OpenRouter. Run from backend/:
+
+  python -m loadtest.run                          # default mix, 30s, 32 clients
+  python -m loadtest.run --duration 60 --concurrency 64
+  python -m loadtest.run --url http://localhost:8000   # an already running app
+  python -m loadtest.run --save-baseline local    # store loadtest/baselines/local.json
+  python -m loadtest.run --compare local          # exit 1 on regressions
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import httpx
+
+from src.services.question_bank import QuestionBank
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(BACKEND_DIR, "loadtest", "baselines")
+
+# Relative weight of each operation in the mix
+DEFAULT_MIX = {
+    "login": 5,
+    "save_score": 20,
+    "stats_user": 25,
+    "stats_sessions": 15,
+    "questions": 30,
+    "questions_agent": 5,
+}
+
+# Attempts per saved game: mostly normal sessions, some marathons
+ATTEMPT_COUNTS = [20, 20, 50, 50, 100, 300]
+TOPICS = ["Algebra", "Geometry", "Vocabulary", "Grammar", "Math"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+# Ids of the bundled bank questions - other ids aren't rated or scheduled for review
+BANK_IDS = [q["id"] for q in QuestionBank.all()]
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_ready(url: str, processes: List[subprocess.Popen], timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if any(p.poll() is not None for p in processes):
+            raise RuntimeError("A load test process exited during startup")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+@contextmanager
+def local_stack(workers: int, llm_latency_ms: float):
+    """Start the stub LLM and the app (SQLite backend) as subprocesses"""
+    tmp = tempfile.mkdtemp(prefix="arcade-loadtest-")
+    llm_port, app_port = _free_port(), _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(tmp, "arcade.db"),
+        "OPENROUTER_BASE_URL": f"http://127.0.0.1:{llm_port}",
+        "OPENROUTER_API_KEY": "stub",
+        "LOCAL_AUTH_HASH_ITERATIONS": "1000",
+    }
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "loadtest.stub_llm", "--port", str(llm_port), "--latency-ms", str(llm_latency_ms)],
+            cwd=BACKEND_DIR, env=env,
+        ),
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(app_port),
+             "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+        ),
+    ]
+    try:
+        _wait_ready(f"http://127.0.0.1:{app_port}/api/health/", processes)
+        yield f"http://127.0.0.1:{app_port}"
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+def build_save_score(rng: random.Random) -> Dict:
+    """A save-score body shaped like the games send"""
+    count = rng.choice(ATTEMPT_COUNTS)
+    attempts = [
+        {
+            "questionId": rng.choice(BANK_IDS),
+            "topic": rng.choice(TOPICS),
+            "difficulty": rng.choice(DIFFICULTIES),
+            "isCorrect": rng.random() < 0.65,
+            "timeSpent": int(rng.lognormvariate(8.5, 0.5)),
+        }
+        for _ in range(count)
+    ]
+    correct = sum(a["isCorrect"] for a in attempts)
+    topic_performance = {}
+    for a in attempts:
+        perf = topic_performance.setdefault(a["topic"], {"correct": 0, "total": 0, "accuracy": 0.0})
+        perf["total"] += 1
+        perf["correct"] += a["isCorrect"]
+    for perf in topic_performance.values():
+        perf["accuracy"] = perf["correct"] / perf["total"]
+
+    return {
+        "gameId": "loadtest",
+        "analytics": {
+            "gameId": "loadtest",
+            "score": correct * 10,
+            "accuracy": correct / count,
+            "correctAnswers": correct,
+            "wrongAnswers": count - correct,
+            "questionAttempts": attempts,
+            "topicPerformance": topic_performance,
+            "streakInfo": {"maxStreak": rng.randint(0, 10)},
+            "averageResponseTime": sum(a["timeSpent"] for a in attempts) // count,
+        },
+    }
+
+SAVE_SCORE_CONTENT_TYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.arcade.columnar+json",
+    "msgpack": "application/msgpack",
+}
+
+def encode_save_score(body: Dict, encoding: str = "json") -> bytes:
+    """Encode a build_save_score() body as json, columnar JSON or columnar MessagePack"""
+    if encoding == "json":
+        return json.dumps(body).encode()
+
+    analytics = {k: v for k, v in body["analytics"].items() if k not in ("questionAttempts", "topicPerformance")}
+    attempts = body["analytics"]["questionAttempts"]
+    analytics["attempts"] = {key: [a[key] for a in attempts] for key in ("questionId", "topic", "difficulty", "isCorrect", "timeSpent")}
+    columnar = {"gameId": body["gameId"], "analytics": analytics}
+    if encoding == "msgpack":
+        import msgpack
+        return msgpack.packb(columnar)
+    return json.dumps(columnar, separators=(",", ":")).encode()
+
+class LoadTest:
+    def __init__(self, url: str, users: int, concurrency: int, duration: float, mix: Dict[str, int], seed: int,
+                 encoding: str = "json"):
+        self.url = url
+        self.users = users
+        self.concurrency = concurrency
+        self.duration = duration
+        self.mix = mix
+        self.seed = seed
+        self.encoding = encoding
+        self.accounts: List[Dict] = []
+        # route -> list of latencies (s); route -> error count
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes_sent: Dict[str, int] = {}
+
+    async def setup(self, client: httpx.AsyncClient):
+        """Create the user pool (signup returns a token when confirmation is off)"""
+        for i in range(self.users):
+            account = {"email": f"load{self.seed}-{i}@example.com", "password": "loadtest-password"}
+            response = await client.post("/api/auth/signup", json=account)
+            if response.status_code == 200 and response.json().get("access_token"):
+                account["token"] = response.json()["access_token"]
+            else:
+                response = await client.post("/api/auth/login", json=account)
+                response.raise_for_status()
+                account["token"] = response.json()["access_token"]
+            self.accounts.append(account)
+
+    async def _timed(self, client: httpx.AsyncClient, route: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - start
+        if ok:
+            self.latencies.setdefault(route, []).append(elapsed)
+        else:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        if "content" in kwargs:
+            self.bytes_sent[route] = self.bytes_sent.get(route, 0) + len(kwargs["content"])
+
+    async def _operation(self, client: httpx.AsyncClient, name: str, rng: random.Random):
+        account = rng.choice(self.accounts)
+        auth = {"Authorization": f"Bearer {account['token']}"}
+
+        if name == "login":
+            await self._timed(client, "POST /api/auth/login", "POST", "/api/auth/login",
+                              json={"email": account["email"], "password": account["password"]})
+        elif name == "save_score":
+            body = encode_save_score(build_save_score(rng), self.encoding)
+            await self._timed(client, "POST /api/games/save-score", "POST", "/api/games/save-score",
+                              content=body, headers={**auth, "Content-Type": SAVE_SCORE_CONTENT_TYPES[self.encoding]})
+        elif name == "stats_user":
+            await self._timed(client, "GET /api/stats/user", "GET", "/api/stats/user", headers=auth)
+        elif name == "stats_sessions":
+            await self._timed(client, "GET /api/stats/sessions", "GET", "/api/stats/sessions", headers=auth)
+        elif name == "questions":
+            await self._timed(client, "GET /api/questions/", "GET", "/api/questions/",
+                              params={"limit": rng.choice([10, 15])}, headers=auth)
+        elif name == "questions_agent":
+            await self._timed(client, "GET /api/questions/?use_agent", "GET", "/api/questions/",
+                              params={"limit": rng.choice([10, 50]), "use_agent": "true", "use_web_search": "false"},
+                              headers=auth)
+
+    async def _worker(self, client: httpx.AsyncClient, worker_id: int, deadline: float):
+        rng = random.Random(self.seed * 1000 + worker_id)
+        names, weights = list(self.mix), list(self.mix.values())
+        while time.monotonic() < deadline:
+            await self._operation(client, rng.choices(names, weights)[0], rng)
+
+    async def run(self) -> Dict:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.url, timeout=120.0, limits=limits) as client:
+            await self.setup(client)
+            start = time.monotonic()
+            deadline = start + self.duration
+            await asyncio.gather(*(self._worker(client, i, deadline) for i in range(self.concurrency)))
+            elapsed = time.monotonic() - start
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(route, []))
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors.get(route, 0),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 2) if samples else None,
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 2) if samples else None,
+            }
+            if route in self.bytes_sent:
+                routes[route]["request_kb_avg"] = round(self.bytes_sent[route] / max(1, len(samples)) / 1024, 1)
+        total = sum(r["requests"] for r in routes.values())
+        return {
+            "params": {
+                "users": self.users,
+                "concurrency": self.concurrency,
+                "duration_s": self.duration,
+                "mix": self.mix,
+                "seed": self.seed,
+            },
+            "total_rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_samples) - 1, max(0, int(round(q * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[index]
+
+def print_report(report: Dict):
+    print(f"\n{'route':<34}{'reqs':>8}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    print("-" * 77)
+    for route, r in report["routes"].items():
+        p50 = f"{r['p50_ms']:.1f}" if r["p50_ms"] is not None else "-"
+        p99 = f"{r['p99_ms']:.1f}" if r["p99_ms"] is not None else "-"
+        print(f"{route:<34}{r['requests']:>8}{r['errors']:>6}{r['throughput_rps']:>9.1f}{p50:>10}{p99:>10}")
+    print(f"\nTotal throughput: {report['total_rps']:.1f} req/s")
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Routes whose p99 grew or throughput dropped by more than tolerance"""
+    regressions = []
+    for route, base in baseline["routes"].items():
+        current = report["routes"].get(route)
+        if not current or current["p99_ms"] is None or base["p99_ms"] is None:
+            continue
+        if current["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p99 {base['p99_ms']}ms -> {current['p99_ms']}ms")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{route}: throughput {base['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{route}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP load test for the NYU Hacks Arcade API")
+    parser.add_argument("--url", help="Target an already running app instead of starting one")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--users", type=int, default=50, help="Accounts in the user pool")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local app")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0, help="Stub LLM response time")
+    parser.add_argument("--mix", help='JSON weights overriding the default mix, e.g. \'{"questions": 1}\'')
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", metavar="NAME", help="Write the report to loadtest/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against loadtest/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression ratio for --compare")
+    parser.add_argument("--save-score-encoding", choices=sorted(SAVE_SCORE_CONTENT_TYPES), default="json",
+                        help="Body encoding for save-score requests")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    mix = {**DEFAULT_MIX, **json.loads(args.mix)} if args.mix else DEFAULT_MIX
+
+    def execute(url: str) -> Dict:
+        test = LoadTest(url, args.users, args.concurrency, args.duration, mix, args.seed, args.save_score_encoding)
+        return asyncio.run(test.run())
+
+    if args.url:
+        report = execute(args.url)
+    else:
+        with local_stack(args.workers, args.llm_latency_ms) as url:
+            report = execute(url)
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nNo regressions against baseline '{args.compare}' (tolerance {args.tolerance:.0%})")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Micro-benchmark: default response path vs the FAST_JSON path
+The default path is what FastAPI does for a route with response_model: build
+the models in the route, re-validate them against response_model, dump them
+to JSON-compatible Python and encode with the stdlib json module. Run from
+backend/:
+
+  python -m loadtest.serialization_bench
+  python -m loadtest.serialization_bench --questions 100 --sessions 50 --number 2000
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from src.models.schemas import GameSessionResponse, Question, QuestionResponse, UserStatsResponse
+from src.utils.serialization import SESSIONS, USER_STATS, trusted_response, validated_response
+
+def _question(i: int) -> Dict:
+    return {
+        "id": i,
+        "question": f"If 3x + {i} = {3 * i + i}, what is the value of x? " * 2,
+        "options": [str(i - 1), str(i), str(i + 1), str(i + 2)],
+        "correctAnswer": 1,
+        "topic": ["Algebra", "Geometry", "Vocabulary", "Grammar", "Reading"][i % 5],
+        "difficulty": ["easy", "medium", "hard"][i % 3],
+        "explanation": f"Subtract {i} from both sides and divide by 3 to get x = {i}.",
+    }
+
+def _session(i: int) -> Dict:
+    # Database rows carry columns the response model drops
+    return {
+        "id": f"00000000-0000-0000-0000-{i:012d}",
+        "user_id": "11111111-1111-1111-1111-111111111111",
+        "game_id": "math-runner",
+        "score": 1000 + i,
+        "accuracy": 87.5,
+        "correct_answers": 35,
+        "wrong_answers": 5,
+        "max_streak": 12,
+        "average_response_time": 4200,
+        "created_at": datetime(2025, 11, 8, 12, i % 60, tzinfo=timezone.utc).isoformat(),
+    }
+
+def _stats() -> Dict:
+    return {
+        "id": "22222222-2222-2222-2222-222222222222",
+        "user_id": "11111111-1111-1111-1111-111111111111",
+        "total_games_played": 42,
+        "total_score": 48210,
+        "total_questions_answered": 1260,
+        "total_correct": 1010,
+        "total_wrong": 250,
+        "overall_accuracy": 80.2,
+        "favorite_game": "math-runner",
+        "weak_topics": ["Geometry", "Grammar"],
+        "strong_topics": ["Algebra"],
+        "updated_at": "2025-11-08T12:00:00+00:00",
+    }
+
+def _default_path(adapter: TypeAdapter, build: Callable) -> bytes:
+    content = adapter.validate_python(build(), from_attributes=True)
+    return json.dumps(adapter.dump_python(content, mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+def run(questions: int, sessions: int, number: int) -> List[Dict]:
+    question_rows = [_question(i) for i in range(questions)]
+    session_rows = [_session(i) for i in range(sessions)]
+    stats_row = _stats()
+    question_response = TypeAdapter(QuestionResponse)
+
+    cases = {
+        f"questions x{questions}": (
+            lambda: _default_path(question_response, lambda: QuestionResponse(
+                questions=[Question(**q) for q in question_rows], total=len(question_rows))),
+            lambda: trusted_response({"questions": question_rows, "total": len(question_rows)}).body,
+        ),
+        f"sessions x{sessions}": (
+            lambda: _default_path(SESSIONS, lambda: [GameSessionResponse(**s) for s in session_rows]),
+            lambda: validated_response(SESSIONS, session_rows).body,
+        ),
+        "user stats": (
+            lambda: _default_path(USER_STATS, lambda: UserStatsResponse(**stats_row)),
+            lambda: validated_response(USER_STATS, stats_row).body,
+        ),
+    }
+
+    results = []
+    for name, (default, fast) in cases.items():
+        assert json.loads(default()) == json.loads(fast()), f"{name}: outputs differ"
+        default_us = min(timeit.repeat(default, number=number, repeat=5)) / number * 1e6
+        fast_us = min(timeit.repeat(fast, number=number, repeat=5)) / number * 1e6
+        results.append({"case": name, "default_us": default_us, "fast_us": fast_us, "speedup": default_us / fast_us})
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark")
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--number", type=int, default=1000, help="Calls per timing")
+    args = parser.parse_args(argv)
+
+    print(f"\n{'case':<18} {'default':>12} {'fast':>12} {'speedup':>9}")
+    for r in run(args.questions, args.sessions, args.number):
+        print(f"{r['case']:<18} {r['default_us']:>9.1f} us {r['fast_us']:>9.1f} us {r['speedup']:>8.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Local stand-in for the OpenRouter chat completions API
+Returns well-formed SAT questions after a configurable delay, so the agent
+path can be load tested without spending tokens.
+
+Run standalone:  python -m loadtest.stub_llm --port 8100 --latency-ms 800
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+
+from fastapi import FastAPI, Request
+
+TOPICS = ["Algebra", "Geometry", "Vocabulary", "Grammar", "Reading"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+def create_app(
+    latency_ms: float = 800.0,
+    jitter_ms: float = 200.0,
+    tail_rate: float = 0.0,
+    tail_ms: float = 0.0,
+    invalid_rate: float = 0.0,
+) -> FastAPI:
+    app = FastAPI(title="Stub LLM")
+    rng = random.Random(0)
+    batches = itertools.count(1)
+
+    @app.get("/key")
+    @app.get("/v1/key")
+    async def key():
+        # Used by the warm-up path to open a connection
+        return {"data": {"label": "stub", "usage": 0, "limit": None}}
+
+    @app.post("/chat/completions")
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        delay = latency_ms + rng.uniform(-jitter_ms, jitter_ms)
+        if rng.random() < tail_rate:
+            delay += tail_ms  # provider-side tail latency
+        await asyncio.sleep(max(0.0, delay) / 1000)
+
+        match = re.search(r"Generate exactly (\d+) questions", prompt)
+        if match:
+            count = int(match.group(1))
+            batch = next(batches)
+            content = json.dumps([
+                {
+                    "id": i + 1,
+                    "question": f"Stub question {batch}.{i + 1}: what is {i} + {i}?",
+                    "options": [str(2 * i), str(2 * i + 1), str(2 * i + 2), str(2 * i + 3)],
+                    # Out-of-range answers exercise validation and top-up requests
+                    "correctAnswer": 7 if rng.random() < invalid_rate else 0,
+                    "topic": TOPICS[i % len(TOPICS)],
+                    "difficulty": DIFFICULTIES[i % len(DIFFICULTIES)],
+                    "explanation": f"{i} + {i} = {2 * i}",
+                    "reasoning": "Load test",
+                }
+                for i in range(count)
+            ])
+        else:
+            content = json.dumps({
+                "focus_areas": ["Algebra"],
+                "strategy": "Keep practicing.",
+                "motivation": "Nice work!",
+                "next_milestone": "50 more questions",
+            })
+
+        return {
+            "id": f"stub-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": 0},
+        }
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--jitter-ms", type=float, default=200.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of responses delayed by --tail-ms")
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="Fraction of generated questions with an invalid answer")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency_ms, args.jitter_ms, args.tail_rate, args.tail_ms, args.invalid_rate), host="127.0.0.1", port=args.port, log_level="warning")
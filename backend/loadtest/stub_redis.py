@@ -0,0 +1,130 @@
+"""
+Local stand-in for a Redis server
+Speaks just enough RESP2 for the redis shared state backend (PING, GET, SET
+with PX/EX/NX/XX, DEL, INCRBY, PEXPIRE/EXPIRE), so multi-worker runs can be
+tested without installing Redis.
+
+Run standalone:  python -m loadtest.stub_redis --port 6390
+Then:            SHARED_STATE_BACKEND=redis REDIS_URL=redis://127.0.0.1:6390/0
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+class Store:
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry[0]
+
+    def expire_at(self, key: bytes, ms: int) -> bool:
+        value = self.get(key)
+        if value is None:
+            return False
+        self.data[key] = (value, time.monotonic() + ms / 1000)
+        return True
+
+    def execute(self, args: List[bytes]):
+        """Reply for one command: bytes/None (bulk), int, str (status) or Exception"""
+        command = args[0].upper()
+        if command == b"PING":
+            return "PONG"
+        if command in (b"CLIENT", b"SELECT"):
+            return "OK"
+        if command == b"FLUSHDB":
+            self.data.clear()
+            return "OK"
+        if command == b"GET":
+            return self.get(args[1])
+        if command == b"SET":
+            key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+            expires = None
+            if b"PX" in options:
+                expires = time.monotonic() + int(options[options.index(b"PX") + 1]) / 1000
+            elif b"EX" in options:
+                expires = time.monotonic() + int(options[options.index(b"EX") + 1])
+            exists = self.get(key) is not None
+            if (b"NX" in options and exists) or (b"XX" in options and not exists):
+                return None
+            self.data[key] = (value, expires)
+            return "OK"
+        if command == b"DEL":
+            removed = 0
+            for key in args[1:]:
+                removed += self.get(key) is not None
+                self.data.pop(key, None)
+            return removed
+        if command in (b"INCR", b"INCRBY"):
+            key = args[1]
+            amount = int(args[2]) if command == b"INCRBY" else 1
+            entry = self.data.get(key)
+            expires = entry[1] if entry and self.get(key) is not None else None
+            value = int(self.get(key) or 0) + amount
+            self.data[key] = (str(value).encode(), expires)
+            return value
+        if command == b"PEXPIRE":
+            return int(self.expire_at(args[1], int(args[2])))
+        if command == b"EXPIRE":
+            return int(self.expire_at(args[1], int(args[2]) * 1000))
+        return ValueError(f"unknown command '{args[0].decode(errors='replace')}'")
+
+def encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return f"-ERR {reply}\r\n".encode()
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # inline command (e.g. from redis-cli or telnet)
+    args = []
+    for _ in range(int(line[1:])):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+def create_server(store: Store, port: int):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if args:
+                    writer.write(encode(store.execute(args)))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return asyncio.start_server(handle, "127.0.0.1", port)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Redis-compatible stand-in")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    async def main():
+        server = await create_server(Store(), args.port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
@@ -7,15 +7,14 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import Response
 from src.models.schemas import UserSignup, UserLogin, TokenResponse
 from src.services.auth_service import AuthService
-from src.utils.database import get_db
-from supabase import Client
+from src.repositories import Repository, get_repository
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)  # Don't auto-raise on missing token
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Client = Depends(get_db)
+    db: Repository = Depends(get_repository)
 ) -> dict:
     """Get current authenticated user"""
     if not credentials:
@@ -46,7 +45,7 @@ async def signup_options(request: Request):
     )
 
 @router.post("/signup")
-async def signup(user_data: UserSignup, db: Client = Depends(get_db)):
+async def signup(user_data: UserSignup, db: Repository = Depends(get_repository)):
     """Sign up a new user using Supabase Auth"""
     try:
         auth_service = AuthService(db)
@@ -80,7 +79,7 @@ async def login_options(request: Request):
     )
 
 @router.post("/login")
-async def login(user_data: UserLogin, db: Client = Depends(get_db)):
+async def login(user_data: UserLogin, db: Repository = Depends(get_repository)):
     """Login user"""
     auth_service = AuthService(db)
     result = await auth_service.login(user_data)
@@ -96,7 +95,7 @@ async def login(user_data: UserLogin, db: Client = Depends(get_db)):
 @router.post("/logout")
 async def logout(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Client = Depends(get_db)
+    db: Repository = Depends(get_repository)
 ):
     """Logout user"""
     token = credentials.credentials if credentials else None
@@ -0,0 +1,101 @@
+"""
+Live score feed - push saved games and live-session progress to spectators
+and leaderboards instead of having them poll /api/stats
+
+GET /api/feed/scores?gameId=&userId=&token=   Server-Sent Events
+WS  /api/feed/scores/ws?gameId=&userId=&token=
+userId can only be the caller's own id. Each message is a score event ({"type": "score",
+"sessionId", "userId", "gameId", "score", "accuracy", "correctAnswers", "wrongAnswers",
+"maxStreak", "final", "ts"}), with userId only on the caller's own events;
+a slow client first gets {"type": "dropped", "count": n} for events it missed.
+Idle streams get a keep-alive every FEED_HEARTBEAT_SECONDS.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from src.api.auth import security
+from src.config import FEED_HEARTBEAT_SECONDS
+from src.repositories import Repository, get_repository
+from src.services.auth_service import AuthService
+from src.services.score_feed import ScoreFeedError, get_score_feed
+
+router = APIRouter()
+
+@router.get("/scores")
+async def stream_scores(
+    request: Request,
+    gameId: Optional[str] = None,
+    userId: Optional[str] = None,
+    token: str = "",
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Repository = Depends(get_repository)
+):
+    """Server-Sent Events stream (EventSource can't set headers, so ?token= works too)"""
+    token = credentials.credentials if credentials else token
+    user = await AuthService(db).get_user(token) if token else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    viewer = str(user["id"])
+    if userId is not None and userId != viewer:
+        raise HTTPException(status_code=403, detail="Can only follow your own scores")
+
+    feed = get_score_feed()
+    try:
+        subscription = feed.subscribe(gameId, userId, viewer)
+    except ScoreFeedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(FEED_HEARTBEAT_SECONDS)
+                # Comment lines keep proxies from closing idle streams
+                yield b"".join(b"data: " + data + b"\n\n" for data in batch) if batch else b": keep-alive\n\n"
+        finally:
+            feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/scores/ws")
+async def score_socket(
+    websocket: WebSocket,
+    gameId: Optional[str] = None,
+    userId: Optional[str] = None,
+    token: str = "",
+    db: Repository = Depends(get_repository)
+):
+    """WebSocket stream of the same events"""
+    user = await AuthService(db).get_user(token) if token else None
+    viewer = str(user["id"]) if user else None
+    if viewer is None or (userId is not None and userId != viewer):
+        await websocket.close(code=1008)  # policy violation
+        return
+
+    feed = get_score_feed()
+    try:
+        subscription = feed.subscribe(gameId, userId, viewer)
+    except ScoreFeedError:
+        await websocket.close(code=1013)  # try again later
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            batch = await subscription.next_batch(FEED_HEARTBEAT_SECONDS)
+            if not batch:
+                # Also how a vanished client is noticed - the send fails
+                await websocket.send_text('{"type": "keepalive"}')
+            for data in batch:
+                await websocket.send_text(data.decode())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        feed.unsubscribe(subscription)
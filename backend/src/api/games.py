@@ -2,24 +2,75 @@
 Game endpoints - save scores and analytics
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+import time
+from typing import Union
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from src.models.schemas import SaveScoreRequest, SaveScoreResponse
+from pydantic import ValidationError
+from src.models.schemas import ColumnarSaveScoreRequest, SaveScoreRequest, SaveScoreResponse
 from src.services.game_service import GameService
-from src.utils.database import get_db
+from src.repositories import Repository, get_repository
 from src.api.auth import get_current_user
-from supabase import Client
+from src.utils.metrics import REGISTRY
 
 router = APIRouter()
 security = HTTPBearer()
 
+# Save-score bodies can be sent row-wise (the default) or columnar:
+# questionAttempts become analytics.attempts = {questionId: [...], topic: [...], ...}
+COLUMNAR_JSON = "application/vnd.arcade.columnar+json"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+PARSE_TIME = REGISTRY.histogram(
+    "save_score_parse_seconds", "Save-score body decode and validation time", ("encoding",),
+    (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+async def save_score_body(request: Request) -> Union[SaveScoreRequest, ColumnarSaveScoreRequest]:
+    """Decode the body by Content-Type and validate it in one pass"""
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    body = await request.body()
+    start = time.perf_counter()
+    try:
+        if content_type in MSGPACK_TYPES:
+            try:
+                import msgpack
+            except ImportError:
+                raise HTTPException(status_code=415, detail="MessagePack is not supported by this deployment")
+            encoding = "msgpack"
+            try:
+                payload = msgpack.unpackb(body)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Malformed MessagePack body")
+            parsed = ColumnarSaveScoreRequest.model_validate(payload)
+        elif content_type == COLUMNAR_JSON:
+            encoding = "columnar"
+            parsed = ColumnarSaveScoreRequest.model_validate_json(body)
+        elif content_type in ("application/json", ""):
+            encoding = "json"
+            parsed = SaveScoreRequest.model_validate_json(body)
+        else:
+            raise HTTPException(status_code=415, detail=f"Unsupported Content-Type '{content_type}'")
+    except ValidationError as e:
+        # Same 422 shape FastAPI returns for body validation errors
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)])
+    
+    PARSE_TIME.observe((encoding,), time.perf_counter() - start)
+    return parsed
+
 @router.post("/save-score", response_model=SaveScoreResponse)
 async def save_score(
-    request: SaveScoreRequest,
+    request: Union[SaveScoreRequest, ColumnarSaveScoreRequest] = Depends(save_score_body),
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    db: Repository = Depends(get_repository)
 ):
-    """Save game score and analytics"""
+    """Save game score and analytics
+    
+    Accepts application/json, columnar JSON (application/vnd.arcade.columnar+json)
+    or columnar MessagePack (application/msgpack).
+    """
     game_service = GameService(db)
     result = await game_service.save_game_session(
         user_id=current_user["id"],
@@ -34,4 +85,3 @@ async def save_score(
         success=True,
         sessionId=result["sessionId"]
     )
-
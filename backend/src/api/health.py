@@ -1,10 +1,16 @@
 """
 Health check endpoints including Supabase connection test
+Dependency checks answer from the background prober's latest results
+(src/services/dependency_prober.py), so orchestrator probes add no load.
 """
 
-from fastapi import APIRouter, HTTPException
-from src.utils.database import Database
-from supabase import Client
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse
+from src.config import DATABASE_BACKEND, WARM_TOKEN
+from src.services.dependency_prober import get_dependency_prober
+from src.services.warmup import warm_up
 
 router = APIRouter()
 
@@ -16,24 +22,47 @@ async def health_check():
         "service": "NYU Hacks Arcade API"
     }
 
+@router.get("/live")
+async def liveness():
+    """Liveness - fails only when this worker has stopped making progress, never because of a dependency"""
+    status = get_dependency_prober().liveness()
+    return JSONResponse(status, status_code=200 if status["alive"] else 503)
+
+@router.get("/ready")
+async def readiness():
+    """Readiness - cached reachability and latency of each dependency; 503 if a required one is down or stale"""
+    status = await get_dependency_prober().readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 @router.get("/supabase")
 async def supabase_health():
-    """Check Supabase connection"""
-    try:
-        db: Client = Database.get_client()
-        
-        # Try a simple query to test connection
-        result = db.table("game_sessions").select("id").limit(1).execute()
-        
+    """Check Supabase connection (the latest probe result)"""
+    result = (await get_dependency_prober().current()).get("database")
+    if result and result["status"] == "up":
         return {
             "status": "healthy",
             "supabase": "connected",
-            "database": "accessible"
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "supabase": "disconnected",
-            "error": str(e)
+            "database": "accessible",
+            "backend": DATABASE_BACKEND,
+            "latency_ms": result["latency_ms"],
+            "age_seconds": result["age_seconds"]
         }
+    return {
+        "status": "unhealthy",
+        "supabase": "disconnected",
+        "error": result["error"] if result else "not probed yet",
+        "backend": DATABASE_BACKEND
+    }
+
+def require_warm_token(x_warm_token: str = Header("")):
+    """Only schedulers holding WARM_TOKEN may trigger warm-ups (each opens upstream connections)"""
+    if not WARM_TOKEN or not hmac.compare_digest(x_warm_token.encode(), WARM_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid warm token")
 
+@router.get("/warm", dependencies=[Depends(require_warm_token)])
+async def warm():
+    """Prime pooled connections (no user data) - hit by schedulers to keep containers warm"""
+    return {
+        "status": "warm",
+        "timings_ms": await warm_up()
+    }
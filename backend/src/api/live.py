@@ -0,0 +1,152 @@
+"""
+Live game session endpoints - stream answers while playing, then finalize
+
+WebSocket /api/games/live/{session_id}/ws?token=<access token>
+  client -> {"type": "answer", "seq": 0, "questionId": 1, "topic": ..., "difficulty": ...,
+             "isCorrect": true, "timeSpent": 4200, "score": 300}
+  client -> {"type": "answers", "events": [<answer>, ...]}
+  client -> {"type": "finalize", "score": 1200, "maxStreak": 7}
+  server -> {"type": "ack", "acked": n}  answers with seq < n are stored; after a
+                                          reconnect, resend from n
+  server -> {"type": "finalized", "sessionId": "..."}
+  server -> {"type": "error", "detail": "..."}
+
+POST /{session_id}/events and /{session_id}/finalize do the same over plain
+HTTP (e.g. serverless deployments without WebSockets).
+"""
+
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from src.api.auth import get_current_user
+from src.models.schemas import (
+    AnswerEvent,
+    AnswerEventBatch,
+    LiveSessionFinalize,
+    LiveSessionResponse,
+    LiveSessionStart,
+    SaveScoreResponse,
+)
+from src.repositories import Repository, get_repository
+from src.services.auth_service import AuthService
+from src.services.live_session_service import LiveSessionError, SessionFinalizedError, get_live_session_service
+
+router = APIRouter()
+
+@router.post("/start", response_model=LiveSessionResponse)
+async def start_session(
+    request: LiveSessionStart,
+    current_user: dict = Depends(get_current_user),
+    db: Repository = Depends(get_repository)
+):
+    """Open a live session for a game that is starting"""
+    live = get_live_session_service()
+    try:
+        session = live.start(db, current_user["id"], request.gameId)
+    except LiveSessionError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return LiveSessionResponse(sessionId=session.session_id)
+
+@router.post("/{session_id}/events", response_model=LiveSessionResponse)
+async def post_events(
+    session_id: str,
+    batch: AnswerEventBatch,
+    current_user: dict = Depends(get_current_user),
+    db: Repository = Depends(get_repository)
+):
+    """Record answer events; `acked` answers are stored"""
+    live = get_live_session_service()
+    try:
+        session = live.get(db, session_id, current_user["id"])
+    except SessionFinalizedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except LiveSessionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        acked = live.record(db, session, batch.events)
+    except SessionFinalizedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return LiveSessionResponse(sessionId=session_id, acked=acked)
+
+@router.post("/{session_id}/finalize", response_model=SaveScoreResponse)
+async def finalize_session(
+    session_id: str,
+    request: LiveSessionFinalize,
+    current_user: dict = Depends(get_current_user),
+    db: Repository = Depends(get_repository)
+):
+    """Finish the game - flushes remaining answers and updates user stats"""
+    live = get_live_session_service()
+    try:
+        session = live.get(db, session_id, current_user["id"])
+    except SessionFinalizedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except LiveSessionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        await live.finalize(db, session, request.score, request.maxStreak)
+    except SessionFinalizedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return SaveScoreResponse(success=True, sessionId=session_id)
+
+@router.websocket("/{session_id}/ws")
+async def session_socket(
+    websocket: WebSocket,
+    session_id: str,
+    token: str = "",
+    db: Repository = Depends(get_repository)
+):
+    """Stream answer events for a live session (see module docstring)"""
+    user = await AuthService(db).get_user(token) if token else None
+    live = get_live_session_service()
+    try:
+        if not user:
+            raise LiveSessionError("Invalid or expired token")
+        session = live.get(db, session_id, user["id"])
+    except LiveSessionError:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    acked = session.durable
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive_json(), timeout=live.flush_seconds)
+            except asyncio.TimeoutError:
+                # Quiet period - make buffered answers durable
+                durable = live.flush(db, session)
+            else:
+                kind = message.get("type") if isinstance(message, dict) else None
+                try:
+                    if kind == "answer":
+                        durable = live.record(db, session, [AnswerEvent.model_validate(message)])
+                    elif kind == "answers":
+                        durable = live.record(db, session, AnswerEventBatch.model_validate(message).events)
+                    elif kind == "finalize":
+                        request = LiveSessionFinalize.model_validate(message)
+                        await live.finalize(db, session, request.score, request.maxStreak)
+                        await websocket.send_json({"type": "finalized", "sessionId": session_id})
+                        await websocket.close()
+                        return
+                    else:
+                        await websocket.send_json({"type": "error", "detail": f"Unknown message type '{kind}'"})
+                        continue
+                except ValidationError as e:
+                    await websocket.send_json({"type": "error", "detail": e.errors(include_url=False, include_context=False)})
+                    continue
+
+            if durable != acked:
+                acked = durable
+                await websocket.send_json({"type": "ack", "acked": acked})
+    except SessionFinalizedError as e:
+        # Finalized elsewhere (e.g. over HTTP or on another worker)
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1008)
+    except WebSocketDisconnect:
+        # Closed tab or lost connection - keep every answer received so far
+        try:
+            live.flush(db, session)
+        except Exception as e:
+            print(f"Error flushing live session {session_id}: {e}")
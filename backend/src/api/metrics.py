@@ -0,0 +1,14 @@
+"""
+Prometheus scrape endpoint
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.utils.metrics import REGISTRY
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """All workers' metrics in Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -3,22 +3,57 @@ Question bank endpoints
 Supports both static questions and AI-generated personalized questions
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from src.models.schemas import QuestionResponse, Question
-from src.utils.database import get_db
+from src.models.schemas import GeneratedQuestionStats, GenerationJobRequest, GenerationJobResponse, QuestionResponse, Question, QuestionSearchResponse
+from src.repositories import Repository, get_repository
 from src.api.auth import get_current_user
-from src.services.agent import SATLearningAgent
-from supabase import Client
-from typing import Optional
+from src.services.generated_questions import get_generated_question_store
+from src.services.question_bank import QuestionBank
+from src.services.question_search import get_question_search
+from src.services.rating_service import get_rating_engine
+from src.services.review_scheduler import get_review_scheduler
+from src.config import AGENT_OVERLOAD_MODE, CLIENT_IP_HEADER, FAST_JSON, QUESTIONS_CACHE_MAX_AGE, QUESTIONS_CDN_MAX_AGE
+from src.services.admission import AdmissionRejected, get_agent_admission
+from src.services.generation_jobs import get_generation_jobs
+from src.utils.resilience import BudgetExceeded, latency_budget
+from src.utils.http_cache import etag_matches
+from src.utils.serialization import trusted_response
+import asyncio
+import math
+from typing import Dict, Optional
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
 
+GUEST_USER_ID = "00000000-0000-0000-0000-000000000000"
+
+def guest_address(request: Request) -> Optional[str]:
+    """A guest's address from the trusted proxy header, or None if not configured
+    (request.client is the proxy itself behind Vercel/Render)"""
+    if not CLIENT_IP_HEADER:
+        return None
+    value = request.headers.get(CLIENT_IP_HEADER, "")
+    # The proxy appends the address it saw; anything before it came from the client
+    address = value.rsplit(",", 1)[-1].strip()
+    return address or None
+
+def agent_question(q: Dict) -> Question:
+    """Convert a question generated by the agent (normalized by question_validation) to API format"""
+    return Question(
+        id=q.get("id", 0),
+        question=q.get("question", ""),
+        options=q.get("options", []),
+        correctAnswer=q.get("correctAnswer", 0),
+        topic=q.get("topic", "General"),
+        difficulty=q.get("difficulty", "medium"),
+        explanation=q.get("explanation", "")
+    )
+
 # Optional auth dependency - returns None if no token provided
 async def get_current_user_optional(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Client = Depends(get_db)
+    db: Repository = Depends(get_repository)
 ) -> Optional[dict]:
     """Get current authenticated user (optional - returns None if not authenticated)"""
     if not credentials:
@@ -35,13 +70,17 @@ async def get_current_user_optional(
 
 @router.get("/", response_model=QuestionResponse)
 async def get_questions(
+    request: Request,
+    response: Response,
     topic: Optional[str] = Query(None, description="Filter by topic"),
     difficulty: Optional[str] = Query(None, description="Filter by difficulty (easy, medium, hard)"),
     limit: int = Query(10, ge=1, le=100, description="Number of questions to return"),
     use_agent: bool = Query(False, description="Use AI agent to generate personalized questions"),
     use_web_search: bool = Query(True, description="Use web search for real SAT questions (slower)"),
+    mode: str = Query("practice", pattern="^(practice|review)$", description="practice, or review to get questions due for spaced repetition"),
+    max_latency_ms: Optional[int] = Query(None, ge=1, description="Latency budget - the agent skips web search, generates fewer questions or serves static ones to meet it"),
     current_user: Optional[dict] = Depends(get_current_user_optional),
-    db: Client = Depends(get_db)
+    db: Repository = Depends(get_repository)
 ):
     """Get questions from the question bank
     
@@ -51,7 +90,28 @@ async def get_questions(
     Works with or without authentication:
     - With auth: Personalized based on user's performance
     - Without auth: Generic questions for new users
+    
+    mode=review (auth required) returns the user's questions that are due
+    for spaced-repetition review, without calling the AI agent.
     """
+    if mode == "review":
+        if not current_user:
+            raise HTTPException(status_code=401, detail="Review mode requires authentication")
+        return get_review_questions(str(current_user["id"]), limit, db)
+    
+    # Anonymous static-bank sets are the same for everyone - let browsers and CDNs reuse them
+    headers = None  # also set on `response` for the non-FAST_JSON path
+    if not current_user and not use_agent:
+        etag = QuestionBank.etag(topic and topic.lower(), difficulty and difficulty.lower(), limit)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={QUESTIONS_CACHE_MAX_AGE}, s-maxage={QUESTIONS_CDN_MAX_AGE}",
+            "Vary": "Authorization, Accept-Encoding",
+        }
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+    
     try:
         questions = []
         
@@ -59,21 +119,38 @@ async def get_questions(
         if use_agent:
             try:
                 # Use user ID if authenticated, otherwise use a guest ID
-                user_id = str(current_user["id"]) if current_user else "00000000-0000-0000-0000-000000000000"
+                user_id = str(current_user["id"]) if current_user else GUEST_USER_ID
+                # Guests share an ID, so they are limited per client address instead, when the proxy reports it
+                address = None if current_user else guest_address(request)
+                caller = f"user:{user_id}" if current_user else (f"ip:{address}" if address else None)
+                from src.services.agent import SATLearningAgent  # deferred: pulls in openai
                 agent = SATLearningAgent(user_id)
-                generated_questions = await agent.generate_questions(num_questions=limit, use_web_search=use_web_search)
+                with latency_budget(max_latency_ms / 1000 if max_latency_ms else None):
+                    async with get_agent_admission().admit(caller):
+                        generated_questions = await agent.generate_questions(num_questions=limit, use_web_search=use_web_search)
+                if agent.adjustments:
+                    headers = {"X-Agent-Adjusted": ", ".join(agent.adjustments)}
+                    response.headers.update(headers)
                 
                 # Convert agent questions to API format
-                for q in generated_questions:
-                    questions.append(Question(
-                        id=q.get("id", 0),
-                        question=q.get("question", ""),
-                        options=q.get("options", []),
-                        correctAnswer=q.get("correct_answer", 0),
-                        topic=q.get("topic", "General"),
-                        difficulty=q.get("difficulty", "medium"),
-                        explanation=q.get("explanation", "")
-                    ))
+                questions.extend(agent_question(q) for q in generated_questions)
+            except AdmissionRejected as busy:
+                if AGENT_OVERLOAD_MODE == "reject":
+                    raise HTTPException(
+                        status_code=429 if busy.reason == "user" else 503,
+                        detail=str(busy),
+                        headers={"Retry-After": str(math.ceil(busy.retry_after))}
+                    )
+                # Generation is saturated - serve the static bank right away
+                print(f"Agent busy ({busy.reason}) - serving static questions")
+                headers = {"X-Agent-Downgraded": busy.reason}
+                response.headers.update(headers)
+                use_agent = False
+            except BudgetExceeded as late:
+                print(f"Agent over latency budget (serving static): {late}")
+                headers = {"X-Agent-Downgraded": "budget"}
+                response.headers.update(headers)
+                use_agent = False
             except Exception as agent_error:
                 # If agent fails, fall back to static questions
                 print(f"Agent error (falling back to static): {agent_error}")
@@ -81,34 +158,147 @@ async def get_questions(
         
         # Fall back to static questions if agent not used or failed
         if not use_agent or not questions:
-            # TODO: Load questions from database or game files
-            # For now, return empty list
-            # You can import from frontend/games/carnival/questions.ts or whackamole/questions.ts
-            pass
+            ratings = None
+            user_id = str(current_user["id"]) if current_user else None
+            if user_id:
+                # Rank the bank by how well each question matches the user's skill
+                ratings = get_rating_engine()
+                ratings.load_user(db, user_id)
+                ratings.load_questions(db, (q["id"] for q in QuestionBank.all()))
+            
+            bank_questions = QuestionBank.get_questions(
+                topic=topic,
+                difficulty=difficulty,
+                limit=limit,
+                user_id=user_id,
+                ratings=ratings
+            )
+            # Bank entries are validated when the bank loads
+            questions = bank_questions if FAST_JSON else [Question(**q) for q in bank_questions]
+        
+        if FAST_JSON:
+            return trusted_response({"questions": questions, "total": len(questions)}, headers=headers)
         
         return QuestionResponse(
             questions=questions,
             total=len(questions)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def require_job_workers(request: Request):
+    """Jobs run in background tasks of a long-lived process; a serverless
+    invocation (Mangum puts the Lambda event in the scope) is frozen as soon
+    as it responds, so its jobs would never finish"""
+    if "aws.event" in request.scope:
+        raise HTTPException(
+            status_code=501,
+            detail="Generation jobs need a long-running server and are not available on this "
+                   "serverless deployment; use GET /api/questions/?use_agent=true instead"
+        )
+
+def job_response(job: Dict) -> GenerationJobResponse:
+    return GenerationJobResponse(
+        jobId=job["id"],
+        status=job["status"],
+        requested=job["num_questions"],
+        completed=len(job["questions"]),
+        attempts=job["attempts"],
+        questions=[agent_question(q) for q in job["questions"]],
+        error=job["error"] if job["status"] == "failed" else None
+    )
+
+@router.post("/jobs", response_model=GenerationJobResponse, status_code=202, dependencies=[Depends(require_job_workers)])
+async def submit_generation_job(
+    request: GenerationJobRequest,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Queue a personalized AI generation and return right away (auth required)
+    
+    Poll GET /jobs/{jobId} for status and the questions generated so far.
+    Resubmitting the same request (or the same Idempotency-Key) returns the
+    existing job instead of generating twice. Jobs run through the same
+    admission control as use_agent requests.
+    """
+    job = await get_generation_jobs().submit(
+        str(current_user["id"]),
+        request.numQuestions,
+        request.useWebSearch,
+        idempotency_key
+    )
+    return job_response(job)
+
+@router.get("/jobs/{job_id}", response_model=GenerationJobResponse, dependencies=[Depends(require_job_workers)])
+async def get_generation_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Status and partial results of one of the caller's generation jobs"""
+    job = await get_generation_jobs().get(job_id)
+    if not job or job["user_id"] != str(current_user["id"]):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+def get_review_questions(user_id: str, limit: int, db: Repository) -> QuestionResponse:
+    """Questions due for review, most overdue first"""
+    try:
+        due_ids = get_review_scheduler().next_due(db, user_id, limit)
+        found = {q["id"]: q for q in QuestionBank.get_by_ids(due_ids)}
+        missing = [qid for qid in due_ids if qid not in found]
+        if missing:
+            # Generated questions come back from the question store
+            found.update((q["id"], q) for q in get_generated_question_store().questions(db, missing))
+        if FAST_JSON:
+            questions = [found[qid] for qid in due_ids if qid in found]
+            return trusted_response({"questions": questions, "total": len(questions)})
+        
+        questions = [Question(**found[qid]) for qid in due_ids if qid in found]
+        
+        return QuestionResponse(
+            questions=questions,
+            total=len(questions)
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search", response_model=QuestionSearchResponse)
+async def search_questions(
+    q: str = Query(..., min_length=1, max_length=200, description="Keywords, e.g. 'quadratic' or 'capital of'"),
+    topic: Optional[str] = Query(None, description="Question topic"),
+    difficulty: Optional[str] = Query(None, description="Difficulty level (easy, medium, hard)"),
+    limit: int = Query(10, ge=1, le=50, description="Number of results")
+):
+    """Find bank and generated questions by keyword (BM25 over text, options and explanation)"""
+    hits = get_question_search().search(q, limit, topic, difficulty)
+    questions = [{**question, "score": round(score, 4)} for question, score in hits]
+    
+    if FAST_JSON:
+        return trusted_response({"questions": questions, "total": len(questions)})
+    
+    return QuestionSearchResponse(questions=questions, total=len(questions))
+
+@router.get("/generated/{question_id}", response_model=GeneratedQuestionStats)
+async def get_generated_question(question_id: int, db: Repository = Depends(get_repository)):
+    """A stored AI-generated question with its attempts, accuracy, median time and calibrated difficulty"""
+    question = await asyncio.to_thread(get_generated_question_store().get, db, question_id)
+    if question is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    return question
+
 @router.get("/topics")
 async def get_topics(
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    db: Repository = Depends(get_repository)
 ):
     """Get available topics"""
     try:
         # Get unique topics from question_attempts or a topics table
-        result = (
-            db.table("question_attempts")
-            .select("topic")
-            .execute()
-        )
-        
-        topics = list(set([attempt["topic"] for attempt in result.data]))
+        topics = db.attempt_topics()
         
         return {"topics": topics}
         
@@ -2,40 +2,53 @@
 User statistics endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from src.models.schemas import UserStatsResponse, GameSessionResponse
-from src.utils.database import get_db
+import csv
+import io
+import json
+from itertools import chain
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from src.models.schemas import AttemptHistoryItem, UserStatsResponse, GameSessionResponse, PaceResponse
+from src.services.attempt_archive import attempt_history
+from src.services.pace_service import get_pace_service
+from src.repositories import Repository, get_repository
 from src.api.auth import get_current_user
-from supabase import Client
-from typing import List
+from src.config import FAST_JSON
+from src.utils.serialization import HISTORY, SESSIONS, USER_STATS, trusted_response, validated_response
+from typing import Dict, Iterator, List, Optional
 
 router = APIRouter()
 
+# Returned when a user has no stats yet
+EMPTY_STATS = {
+    "total_games_played": 0,
+    "total_score": 0,
+    "total_questions_answered": 0,
+    "total_correct": 0,
+    "total_wrong": 0,
+    "overall_accuracy": 0.0,
+    "favorite_game": None,
+    "weak_topics": [],
+    "strong_topics": [],
+    "updated_at": ""
+}
+
 @router.get("/user", response_model=UserStatsResponse)
 async def get_user_stats(
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    db: Repository = Depends(get_repository)
 ):
     """Get user statistics"""
     try:
-        result = db.table("user_stats").select("*").eq("user_id", current_user["id"]).execute()
+        stats = db.get_user_stats(current_user["id"])
+        
+        if FAST_JSON:
+            return validated_response(USER_STATS, stats or EMPTY_STATS)
         
-        if not result.data:
+        if not stats:
             # Return default stats if none exist
-            return UserStatsResponse(
-                total_games_played=0,
-                total_score=0,
-                total_questions_answered=0,
-                total_correct=0,
-                total_wrong=0,
-                overall_accuracy=0.0,
-                favorite_game=None,
-                weak_topics=[],
-                strong_topics=[],
-                updated_at=""
-            )
+            return UserStatsResponse(**EMPTY_STATS)
         
-        stats = result.data[0]
         return UserStatsResponse(**stats)
         
     except Exception as e:
@@ -45,21 +58,104 @@ async def get_user_stats(
 async def get_recent_sessions(
     limit: int = 10,
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    db: Repository = Depends(get_repository)
 ):
     """Get recent game sessions"""
     try:
-        result = (
-            db.table("game_sessions")
-            .select("*")
-            .eq("user_id", current_user["id"])
-            .order("created_at", desc=True)
-            .limit(limit)
-            .execute()
-        )
+        sessions = db.recent_sessions(current_user["id"], limit)
+        
+        if FAST_JSON:
+            return validated_response(SESSIONS, sessions)
         
-        return [GameSessionResponse(**session) for session in result.data]
+        return [GameSessionResponse(**session) for session in sessions]
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+HISTORY_COLUMNS = list(AttemptHistoryItem.model_fields)
+
+@router.get("/history", response_model=List[AttemptHistoryItem])
+async def get_attempt_history(
+    since: Optional[str] = Query(None, description="ISO-8601 start time (inclusive)"),
+    until: Optional[str] = Query(None, description="ISO-8601 end time (exclusive)"),
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: dict = Depends(get_current_user),
+    db: Repository = Depends(get_repository)
+):
+    """Get question attempts oldest first, including archived ones"""
+    try:
+        rows = list(attempt_history(db, current_user["id"], since, until, limit=limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if FAST_JSON:
+        return validated_response(HISTORY, rows)
+    
+    return [AttemptHistoryItem(**row) for row in rows]
+
+def _csv_lines(rows: Iterator[Dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, HISTORY_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+@router.get("/export")
+async def export_attempts(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    since: Optional[str] = Query(None, description="ISO-8601 start time (inclusive)"),
+    until: Optional[str] = Query(None, description="ISO-8601 end time (exclusive)"),
+    current_user: dict = Depends(get_current_user),
+    db: Repository = Depends(get_repository)
+):
+    """Download every question attempt (including archived ones), streamed"""
+    rows = attempt_history(db, current_user["id"], since, until)
+    try:
+        first = next(rows, None)  # surfaces a bad time range before the response starts
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {e}")
+    if first is not None:
+        rows = chain([first], rows)
+    
+    if format == "ndjson":
+        body = (json.dumps({c: row[c] for c in HISTORY_COLUMNS}) + "\n" for row in rows)
+        media_type = "application/x-ndjson"
+    else:
+        body = _csv_lines(rows)
+        media_type = "text/csv"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="attempts.{format}"'}
+    )
+
+@router.get("/pace", response_model=PaceResponse)
+async def get_pace(
+    topic: str = Query(..., description="Question topic"),
+    difficulty: Optional[str] = Query(None, description="Difficulty (easy, medium, hard); omit for all"),
+    time_spent: Optional[int] = Query(None, ge=0, description="Response time in ms to rank against other students"),
+    current_user: dict = Depends(get_current_user),
+    db: Repository = Depends(get_repository)
+):
+    """Get p50/p90 pace targets and how a response time ranks against other students"""
+    pace = get_pace_service()
+    pace.load(db)
+    
+    targets = pace.pace_targets(topic, difficulty) or {"samples": 0, "p50": None, "p90": None}
+    faster_than = pace.faster_than(topic, difficulty, time_spent) if time_spent is not None else None
+    
+    if FAST_JSON:
+        return trusted_response({"topic": topic, "difficulty": difficulty, **targets, "fasterThanPercent": faster_than})
+    
+    return PaceResponse(
+        topic=topic,
+        difficulty=difficulty,
+        fasterThanPercent=faster_than,
+        **targets
+    )
@@ -3,6 +3,7 @@ Configuration for backend services
 Loads environment variables for AI agent and Supabase
 """
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file in backend directory
@@ -15,6 +16,8 @@ else:
 # OpenRouter API Key (optional - only needed for AI agent)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 # Don't raise error if not set - agent will handle it gracefully
+# Any OpenAI-compatible endpoint works (e.g. the load test's local stand-in)
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 # Supabase configuration (uses same as main backend)
 # These are loaded from the same .env file as the main backend
@@ -22,3 +25,190 @@ SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL"
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_SERVICE_KEY")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
 
+# Response time sketches are merged into the database at most this often, and reloaded from it
+# (for samples other workers merged) at most every PACE_RELOAD_SECONDS
+PACE_FLUSH_INTERVAL_SECONDS = float(os.getenv("PACE_FLUSH_INTERVAL_SECONDS", "60"))
+PACE_RELOAD_SECONDS = float(os.getenv("PACE_RELOAD_SECONDS", "300"))
+
+# Review queues kept in memory per worker (least recently used users are evicted), each holding a
+# user's REVIEW_QUEUE_SIZE soonest-due items (at least the largest review batch served, 100)
+REVIEW_CACHE_USERS = int(os.getenv("REVIEW_CACHE_USERS", "1000"))
+REVIEW_CACHE_TTL_SECONDS = float(os.getenv("REVIEW_CACHE_TTL_SECONDS", "300"))
+REVIEW_QUEUE_SIZE = int(os.getenv("REVIEW_QUEUE_SIZE", "200"))
+
+# Storage backend: "supabase" (default) or "sqlite" for single-box deployments / local benchmarks
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "arcade.db"))
+# Local auth used by the sqlite backend in place of Supabase auth
+LOCAL_JWT_SECRET = os.getenv("LOCAL_JWT_SECRET", "local-development-secret-change-me-in-production")
+LOCAL_AUTH_HASH_ITERATIONS = int(os.getenv("LOCAL_AUTH_HASH_ITERATIONS", "100000"))
+
+# Metrics: set METRICS_DIR to a shared directory to aggregate all uvicorn workers on scrape
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("METRICS_SNAPSHOT_INTERVAL_SECONDS", "5"))
+
+# Database round-trip accounting (see src/utils/query_log.py)
+# DEBUG adds X-DB-Queries / X-DB-Time-Ms response headers
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Requests making more round trips than this are logged as likely N+1 patterns
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "15"))
+
+# Pooled HTTP connections (Supabase, OpenRouter) stay open this long between requests,
+# so a warm serverless container reuses them instead of paying TLS setup again
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+# Prime connections when the server starts (uvicorn); serverless uses /api/health/warm instead
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+# Shared secret schedulers send as X-Warm-Token to /api/health/warm (unset: the endpoint is disabled)
+WARM_TOKEN = os.getenv("WARM_TOKEN", "")
+
+# Opt-in fast response path: orjson + precompiled TypeAdapters, no response_model re-validation
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() == "true"
+
+# Response compression (gzip, or brotli when installed) for the questions and stats routes
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Anonymous static-bank question sets are public: browsers reuse them for max-age, CDNs for s-maxage
+QUESTIONS_CACHE_MAX_AGE = int(os.getenv("QUESTIONS_CACHE_MAX_AGE", "300"))
+QUESTIONS_CDN_MAX_AGE = int(os.getenv("QUESTIONS_CDN_MAX_AGE", "3600"))
+
+# Live game sessions: answers are written in micro-batches of LIVE_BATCH_SIZE or every
+# LIVE_FLUSH_SECONDS; sessions idle for LIVE_SESSION_IDLE_SECONDS are finalized as abandoned (with
+# their running score) by a background reaper every LIVE_REAP_SECONDS (0 disables it)
+LIVE_BATCH_SIZE = int(os.getenv("LIVE_BATCH_SIZE", "10"))
+LIVE_FLUSH_SECONDS = float(os.getenv("LIVE_FLUSH_SECONDS", "5"))
+LIVE_SESSION_IDLE_SECONDS = float(os.getenv("LIVE_SESSION_IDLE_SECONDS", "900"))
+LIVE_REAP_SECONDS = float(os.getenv("LIVE_REAP_SECONDS", "5"))
+
+# Live score feed (SSE/WebSocket): pending events per subscriber before the oldest are
+# dropped, subscribers per worker, and keep-alive interval for idle connections
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", "32"))
+FEED_MAX_SUBSCRIBERS = int(os.getenv("FEED_MAX_SUBSCRIBERS", "10000"))
+FEED_HEARTBEAT_SECONDS = float(os.getenv("FEED_HEARTBEAT_SECONDS", "25"))
+
+# Admission control for AI question generation (use_agent=true): concurrent generations per
+# worker and per user, how many more may wait and for how long, and what happens beyond
+# that - "downgrade" serves the static bank, "reject" returns 429/503
+AGENT_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "4"))
+AGENT_MAX_PER_USER = int(os.getenv("AGENT_MAX_PER_USER", "1"))
+AGENT_QUEUE_SIZE = int(os.getenv("AGENT_QUEUE_SIZE", "16"))
+AGENT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("AGENT_QUEUE_TIMEOUT_SECONDS", "10"))
+AGENT_OVERLOAD_MODE = os.getenv("AGENT_OVERLOAD_MODE", "downgrade")
+# Header the deployment's proxy sets to the client address (e.g. x-forwarded-for behind Render,
+# x-real-ip behind Vercel). Guests are limited per address only when this is set - without it every
+# guest would share the proxy's address - so leave it empty unless the proxy overwrites the header
+CLIENT_IP_HEADER = os.getenv("CLIENT_IP_HEADER", "").lower()
+
+# Background generation jobs (POST /api/questions/jobs): local job store, worker tasks per
+# process, questions generated per LLM call, attempts before a job fails, how long an identical
+# finished job is reused, and when old jobs are deleted. Not available on serverless (see README)
+GENERATION_JOBS_PATH = os.getenv("GENERATION_JOBS_PATH", os.path.join(tempfile.gettempdir(), "generation_jobs.db"))
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "2"))
+GENERATION_CHUNK_SIZE = int(os.getenv("GENERATION_CHUNK_SIZE", "10"))
+GENERATION_MAX_ATTEMPTS = int(os.getenv("GENERATION_MAX_ATTEMPTS", "3"))
+GENERATION_DEDUP_SECONDS = float(os.getenv("GENERATION_DEDUP_SECONDS", "300"))
+GENERATION_JOB_TTL_HOURS = float(os.getenv("GENERATION_JOB_TTL_HOURS", "24"))
+GENERATION_POLL_SECONDS = float(os.getenv("GENERATION_POLL_SECONDS", "2"))
+
+# LLM routing per call site (questions, insights): comma-separated OpenRouter models, preferred
+# first - the rest are fallbacks used for hedges and when the preferred one is unhealthy
+LLM_QUESTIONS_MODELS = os.getenv("LLM_QUESTIONS_MODELS", "anthropic/claude-haiku-4.5")
+LLM_INSIGHTS_MODELS = os.getenv("LLM_INSIGHTS_MODELS", "anthropic/claude-haiku-4.5")
+# A call still running past LLM_HEDGE_QUANTILE of its model's recent latencies gets a duplicate
+# (to the next model, or the same one) and the first answer wins
+LLM_QUESTIONS_HEDGE = os.getenv("LLM_QUESTIONS_HEDGE", "true").lower() == "true"
+LLM_INSIGHTS_HEDGE = os.getenv("LLM_INSIGHTS_HEDGE", "true").lower() == "true"
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+# Requests with max_tokens up to this go to the healthy model with the lowest median latency
+LLM_SMALL_REQUEST_TOKENS = int(os.getenv("LLM_SMALL_REQUEST_TOKENS", "1000"))
+
+# Outbound call timeouts in seconds (also capped by a request's max_latency_ms budget)
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "5"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "10"))
+# Circuit breakers: consecutive failures that open a dependency's breaker, and how long it
+# fails fast before letting one probe call through
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+# Web search is skipped when less of a request's latency budget than this is left
+SEARCH_BUDGET_SECONDS = float(os.getenv("SEARCH_BUDGET_SECONDS", "6"))
+
+# Generated questions must use one of these topics; invalid ones are replaced by asking the
+# LLM for just the missing count, at most AGENT_TOPUP_ROUNDS times
+QUESTION_TOPICS = [t.strip() for t in os.getenv("QUESTION_TOPICS", "Algebra,Geometry,Math,Vocabulary,Grammar,Reading").split(",") if t.strip()]
+AGENT_TOPUP_ROUNDS = int(os.getenv("AGENT_TOPUP_ROUNDS", "2"))
+
+# State shared by all worker processes (cache, rate limits, locks): "local" keeps it in a
+# SQLite file in shared memory on this box, "redis" in a Redis-compatible server
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "local")
+SHARED_STATE_PATH = os.getenv(
+    "SHARED_STATE_PATH",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "arcade-shared-state.db"),
+)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SHARED_STATE_PREFIX = os.getenv("SHARED_STATE_PREFIX", "arcade:")
+SHARED_STATE_TIMEOUT_SECONDS = float(os.getenv("SHARED_STATE_TIMEOUT_SECONDS", "0.5"))
+# Web search results are cached across workers; searches and LLM calls are rate limited
+# across workers (LLM calls wait up to LLM_RATE_MAX_WAIT_SECONDS for a token)
+SEARCH_CACHE_SECONDS = float(os.getenv("SEARCH_CACHE_SECONDS", "3600"))
+SEARCH_RATE_PER_MINUTE = float(os.getenv("SEARCH_RATE_PER_MINUTE", "20"))
+SEARCH_RATE_BURST = int(os.getenv("SEARCH_RATE_BURST", "5"))
+LLM_RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "5"))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "20"))
+LLM_RATE_MAX_WAIT_SECONDS = float(os.getenv("LLM_RATE_MAX_WAIT_SECONDS", "5"))
+
+# Opt-in: question attempts older than ATTEMPT_RETENTION_DAYS are folded into attempt_rollups and
+# moved to per-user columnar files under ATTEMPT_ARCHIVE_PATH, every ATTEMPT_ARCHIVE_INTERVAL_HOURS
+# (0 disables the background run; python -m src.services.attempt_archive runs one pass). The path has
+# no default - it must be durable storage shared by every worker, never a container's local disk
+ATTEMPT_RETENTION_DAYS = float(os.getenv("ATTEMPT_RETENTION_DAYS", "90"))
+ATTEMPT_ARCHIVE_PATH = os.getenv("ATTEMPT_ARCHIVE_PATH", "")
+ATTEMPT_ARCHIVE_INTERVAL_HOURS = float(os.getenv("ATTEMPT_ARCHIVE_INTERVAL_HOURS", "0"))
+ATTEMPT_ARCHIVE_USERS_PER_RUN = int(os.getenv("ATTEMPT_ARCHIVE_USERS_PER_RUN", "500"))
+ATTEMPT_ARCHIVE_BATCH = int(os.getenv("ATTEMPT_ARCHIVE_BATCH", "5000"))
+
+# Generated questions kept searchable in each worker's question search index (oldest dropped first)
+QUESTION_SEARCH_MAX_GENERATED = int(os.getenv("QUESTION_SEARCH_MAX_GENERATED", "100000"))
+# Postings a search scans before the remaining query words only re-rank what was found (bounds the
+# latency of queries made of very common words)
+QUESTION_SEARCH_MAX_POSTINGS = int(os.getenv("QUESTION_SEARCH_MAX_POSTINGS", "50000"))
+
+# Validated generated questions are stored (generated_questions) with per-question stats, which each
+# worker adds to the store at most every GENERATED_STATS_FLUSH_SECONDS. Up to GENERATED_REUSE_FRACTION
+# of a generation is served from stored questions the user hasn't answered that have at least
+# GENERATED_REUSE_MIN_ATTEMPTS answers and an accuracy within [GENERATED_REUSE_MIN_ACCURACY,
+# GENERATED_REUSE_MAX_ACCURACY]; from GENERATED_CALIBRATION_MIN_ATTEMPTS answers on, a stored
+# question is served at the difficulty its rating has settled on instead of the one the LLM gave it
+GENERATED_STATS_FLUSH_SECONDS = float(os.getenv("GENERATED_STATS_FLUSH_SECONDS", "30"))
+GENERATED_REUSE_FRACTION = float(os.getenv("GENERATED_REUSE_FRACTION", "0.5"))
+GENERATED_REUSE_MIN_ATTEMPTS = int(os.getenv("GENERATED_REUSE_MIN_ATTEMPTS", "5"))
+GENERATED_REUSE_MIN_ACCURACY = float(os.getenv("GENERATED_REUSE_MIN_ACCURACY", "0.2"))
+GENERATED_REUSE_MAX_ACCURACY = float(os.getenv("GENERATED_REUSE_MAX_ACCURACY", "0.9"))
+GENERATED_CALIBRATION_MIN_ATTEMPTS = int(os.getenv("GENERATED_CALIBRATION_MIN_ATTEMPTS", "20"))
+
+# Health endpoints answer from a background prober (database, LLM, web search) that runs every
+# HEALTH_PROBE_INTERVAL_SECONDS (0: probe on demand, at most once per interval). Readiness fails when a
+# required dependency is down or its last successful probe is older than HEALTH_STALE_SECONDS
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "15"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "3"))
+HEALTH_STALE_SECONDS = float(os.getenv("HEALTH_STALE_SECONDS", "60"))
+HEALTH_REQUIRED_DEPENDENCIES = [d.strip() for d in os.getenv("HEALTH_REQUIRED_DEPENDENCIES", "database").split(",") if d.strip()]
+HEALTH_SEARCH_URL = os.getenv("HEALTH_SEARCH_URL", "https://duckduckgo.com/")
+# Dependencies not in HEALTH_REQUIRED_DEPENDENCIES (LLM, web search by default) are third-party APIs
+# shared with generation, so they are probed far less often and within the shared rate limits
+HEALTH_OPTIONAL_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_OPTIONAL_PROBE_INTERVAL_SECONDS", "600"))
+
+# On-demand request profiling (src/middleware/profiling.py): requests sending X-Profile-Token equal to
+# PROFILE_TOKEN, or a PROFILE_SAMPLE_RATE fraction of requests under PROFILE_PATHS, are sampled every
+# PROFILE_INTERVAL_MS (for up to PROFILE_MAX_SECONDS) and written as folded stacks to PROFILE_DIR, which
+# keeps the newest PROFILE_MAX_FILES. With no token and a zero rate the middleware is not installed
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_PATHS = [p.strip() for p in os.getenv("PROFILE_PATHS", "/api").split(",") if p.strip()]
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
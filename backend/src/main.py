@@ -3,24 +3,47 @@ FastAPI Backend for NYU Hacks Arcade
 Handles authentication, game scores, user statistics, and question bank
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from backend/.env
-env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-if os.path.exists(env_path):
-    load_dotenv(env_path)
-else:
-    load_dotenv()
+# src.config loads backend/.env - the only place environment files are read
+try:
+    from src import config
+except ImportError:
+    # If running as script, use relative imports
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from src import config
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prime pooled connections before serving (not run under Mangum - see /api/health/warm)"""
+    if config.WARMUP_ON_STARTUP:
+        from src.services.warmup import warm_up
+        print(f"Warm-up: {await warm_up()}")
+    # Resume generation jobs left queued or running by a previous process
+    from src.services.generation_jobs import get_generation_jobs
+    get_generation_jobs().ensure_started()
+    # Move old question attempts to the archive tier periodically
+    from src.services.attempt_archive import get_attempt_archiver
+    get_attempt_archiver().ensure_started()
+    # Health endpoints serve the prober's cached dependency checks
+    from src.services.dependency_prober import get_dependency_prober
+    get_dependency_prober().ensure_started()
+    # Flush quiet live sessions and finalize abandoned ones
+    from src.services.live_session_service import get_live_session_service
+    get_live_session_service().ensure_started()
+    yield
 
 # Initialize FastAPI app
 app = FastAPI(
     title="NYU Hacks Arcade API",
     description="Backend API for NYU Hacks Arcade - Authentication, Scores, Statistics, and Question Bank",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - MUST be added before routers
@@ -48,21 +71,36 @@ app.add_middleware(
 )
 
 # Import routers
-try:
-    from src.api import auth, games, stats, questions, health
-except ImportError:
-    # If running as script, use relative imports
-    import sys
-    import os
-    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from src.api import auth, games, stats, questions, health
+from src.api import auth, feed, games, live, stats, questions, health, metrics
+
+# Database round trips per request (see src/utils/query_log.py)
+from src.middleware.db_accounting import QueryAccountingMiddleware
+app.add_middleware(QueryAccountingMiddleware)
+
+# Compress question sets and stats (inside metrics, so response sizes are bytes on the wire)
+from src.middleware.compression import CompressionMiddleware
+app.add_middleware(CompressionMiddleware, paths=("/api/questions", "/api/stats"))
+
+# On-demand request profiles - not installed at all unless a token or sample rate is set
+if config.PROFILE_TOKEN or config.PROFILE_SAMPLE_RATE > 0:
+    from src.middleware.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+# Request metrics - added last so it wraps CORS and sees every response
+if config.METRICS_ENABLED:
+    from src.middleware.metrics import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(health.router, prefix="/api/health", tags=["Health"])
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(games.router, prefix="/api/games", tags=["Games"])
+app.include_router(live.router, prefix="/api/games/live", tags=["Games"])
 app.include_router(stats.router, prefix="/api/stats", tags=["Statistics"])
+app.include_router(feed.router, prefix="/api/feed", tags=["Feed"])
 app.include_router(questions.router, prefix="/api/questions", tags=["Questions"])
+if config.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,161 @@
+"""
+Negotiated response compression
+Compresses buffered JSON responses on the given path prefixes with brotli
+(when the brotli package is installed) or gzip, above a size threshold.
+Streaming responses pass through untouched. Responses with a strong ETag
+are deterministic, so their compressed bodies are memoized.
+"""
+
+import gzip
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from src.config import COMPRESSION_MIN_BYTES
+from src.utils.http_cache import encoded_etag
+from src.utils.metrics import REGISTRY
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+# Levels tuned for dynamic content - near-best ratio for JSON at a fraction of the CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Compressed bodies kept per worker for ETagged (identical) responses
+MEMO_SIZE = 256
+
+INPUT_BYTES = REGISTRY.counter("http_compression_input_bytes_total", "Response bytes before compression", ("encoding",))
+OUTPUT_BYTES = REGISTRY.counter("http_compression_output_bytes_total", "Response bytes after compression", ("encoding",))
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported coding in an Accept-Encoding header: "br", "gzip" or None"""
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_q = None, 0.0
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        candidates = supported if name == "*" else (name,) if name in supported else ()
+        for candidate in candidates:
+            # Ties go to the earlier (better) coding in `supported`
+            if q > best_q or (q == best_q and best is not None and supported.index(candidate) < supported.index(best)):
+                best, best_q = candidate, q
+    return best if best_q > 0 else None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+class CompressionMiddleware:
+    def __init__(self, app, paths: Sequence[str] = ("/",), minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.paths = tuple(paths)
+        self.minimum_size = minimum_size
+        self._memo: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Dict] = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    # Revalidated - report the ETag of the variant this client would have received
+                    passthrough = True
+                    headers = [
+                        (name, encoded_etag(value.decode("latin-1"), encoding).encode("latin-1") if name == b"etag" else value)
+                        for name, value in message.get("headers", ())
+                    ]
+                    await send({**message, "headers": headers})
+                    return
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._compressible(start_message, body):
+                # Streaming or not worth it - send as is from here on
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            await self._send_compressed(send, start_message, body, encoding)
+
+        await self.app(scope, receive, compressing_send)
+
+    def _compressible(self, start_message: Dict, body: bytes) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        content_type = ""
+        for name, value in start_message.get("headers", ()):
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _send_compressed(self, send, start_message: Dict, body: bytes, encoding: str):
+        headers = []
+        etag = None
+        for name, value in start_message.get("headers", ()):
+            if name == b"etag":
+                etag = value.decode("latin-1")
+            elif name not in (b"content-length", b"vary"):
+                headers.append((name, value))
+            elif name == b"vary":
+                vary = value.decode("latin-1")
+                if "accept-encoding" not in vary.lower():
+                    vary += ", Accept-Encoding"
+                headers.append((b"vary", vary.encode("latin-1")))
+        if not any(name == b"vary" for name, _ in headers):
+            headers.append((b"vary", b"Accept-Encoding"))
+
+        compressed = None
+        if etag:
+            headers.append((b"etag", encoded_etag(etag, encoding).encode("latin-1")))
+            compressed = self._memo.get((etag, encoding))
+            if compressed is not None:
+                self._memo.move_to_end((etag, encoding))
+        if compressed is None:
+            compressed = compress(body, encoding)
+            if etag:
+                self._memo[(etag, encoding)] = compressed
+                if len(self._memo) > MEMO_SIZE:
+                    self._memo.popitem(last=False)
+
+        INPUT_BYTES.inc((encoding,), len(body))
+        OUTPUT_BYTES.inc((encoding,), len(compressed))
+
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(compressed)).encode()))
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": compressed})
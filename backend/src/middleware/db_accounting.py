@@ -0,0 +1,49 @@
+"""
+Per-request database round-trip accounting
+Flags requests over DB_QUERY_BUDGET and, in DEBUG, reports the counts in
+X-DB-Queries / X-DB-Time-Ms response headers.
+"""
+
+from src.config import DB_QUERY_BUDGET, DEBUG
+from src.middleware.metrics import route_template
+from src.utils.metrics import REGISTRY
+from src.utils.query_log import start_request
+
+QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "db_queries_per_request", "Database round trips per HTTP request", ("method", "route"),
+    (0, 1, 2, 4, 6, 8, 12, 16, 24, 32, 64),
+)
+OVER_BUDGET = REGISTRY.counter(
+    "db_query_budget_exceeded_total", "Requests making more than DB_QUERY_BUDGET round trips", ("method", "route"),
+)
+
+class QueryAccountingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = start_request()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and DEBUG:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(queries.count).encode()),
+                    (b"x-db-time-ms", f"{queries.duration_ms:.1f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            labels = (scope["method"], route_template(scope))
+            QUERIES_PER_REQUEST.observe(labels, queries.count)
+            if queries.count > DB_QUERY_BUDGET:
+                OVER_BUDGET.inc(labels)
+                print(
+                    f"Query budget exceeded: {labels[0]} {labels[1]} made {queries.count} round trips "
+                    f"({queries.duration_ms:.0f}ms): {queries.summary()}"
+                )
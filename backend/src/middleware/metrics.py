@@ -0,0 +1,108 @@
+"""
+Request metrics middleware
+Records latency, status, payload sizes and in-flight requests per route
+template (e.g. /api/stats/user/{user_id}) into the worker's metrics registry.
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+from src.config import HTTP_KEEPALIVE_SECONDS, METRICS_DIR
+from src.utils.metrics import REGISTRY, SIZE_BUCKETS
+
+REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+LATENCY = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+REQUEST_SIZE = REGISTRY.histogram("http_request_size_bytes", "HTTP request body size", ("method", "route"), SIZE_BUCKETS)
+RESPONSE_SIZE = REGISTRY.histogram("http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS)
+IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being handled", ("method", "route"))
+# cold: first request in this process; warm_first: first after the connection pool
+# has gone idle (HTTP_KEEPALIVE_SECONDS); warm: everything else
+PHASE_REQUESTS = REGISTRY.counter("http_requests_by_phase_total", "HTTP requests by container phase", ("phase", "route"))
+PHASE_LATENCY = REGISTRY.histogram("http_request_duration_by_phase_seconds", "HTTP request latency by container phase", ("phase", "route"))
+
+# (method, path) -> route template, so in-flight requests can be labelled
+# before routing has run. Bounded so arbitrary paths can't grow it forever.
+_TEMPLATE_CACHE_SIZE = 2048
+
+def route_template(scope) -> str:
+    """Route template for a handled request, e.g. /api/stats/user/{user_id}"""
+    route = scope.get("route")
+    if route is None or not getattr(route, "path", None):
+        return "unmatched"
+    # Routers that FastAPI includes lazily leave their own route here, whose
+    # path lacks the include prefix; the prefix is what the route didn't match
+    template = route.path
+    path, root_path = scope["path"], scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    segments = [s for s in path.split("/") if s]
+    own = len([s for s in template.split("/") if s])
+    if len(segments) > own:
+        template = "/" + "/".join(segments[:len(segments) - own]) + template
+    return template
+
+def container_phase(last_request_at: Optional[float], now: float) -> str:
+    if last_request_at is None:
+        return "cold"
+    if now - last_request_at > HTTP_KEEPALIVE_SECONDS:
+        return "warm_first"
+    return "warm"
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[Tuple[str, str], str] = {}
+        self._last_request_at: Optional[float] = None
+        REGISTRY.start_snapshots(METRICS_DIR)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        key = (method, scope["path"])
+        in_flight = (method, self._templates.get(key, "unresolved"))
+        IN_FLIGHT.inc(in_flight)
+
+        start = time.perf_counter()
+        now = time.monotonic()
+        phase = container_phase(self._last_request_at, now)
+        self._last_request_at = now
+        state = {"status": 500, "request_bytes": 0, "response_bytes": 0}
+        content_length = None
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
+                content_length = int(value) if value.isdigit() else None
+                break
+
+        async def counting_receive():
+            message = await receive()
+            if content_length is None and message["type"] == "http.request":
+                state["request_bytes"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["response_bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive if content_length is None else receive, counting_send)
+        finally:
+            IN_FLIGHT.dec(in_flight)
+            template = route_template(scope)
+            if template != "unmatched" and key not in self._templates:
+                if len(self._templates) >= _TEMPLATE_CACHE_SIZE:
+                    self._templates.clear()
+                self._templates[key] = template
+
+            labels = (method, template)
+            REQUESTS.inc((method, template, str(state["status"])))
+            LATENCY.observe(labels, time.perf_counter() - start)
+            REQUEST_SIZE.observe(labels, content_length if content_length is not None else state["request_bytes"])
+            RESPONSE_SIZE.observe(labels, state["response_bytes"])
+            PHASE_REQUESTS.inc((phase, template))
+            PHASE_LATENCY.observe((phase, template), time.perf_counter() - start)
@@ -0,0 +1,113 @@
+"""
+On-demand profiling of individual requests
+A request is profiled when it sends X-Profile-Token matching PROFILE_TOKEN,
+or at random with probability PROFILE_SAMPLE_RATE, on PROFILE_PATHS. Its
+samples (src/utils/sampling_profiler.py) are written to PROFILE_DIR as
+<id>-<method>-<route>-<ms>ms.folded, and the response carries X-Profile-Id.
+Only installed when a token or rate is configured (see main.py).
+"""
+
+import asyncio
+import hmac
+import os
+import random
+import re
+import secrets
+import sys
+import time
+from typing import Optional, Sequence
+
+from src.config import (
+    PROFILE_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_MAX_FILES,
+    PROFILE_MAX_SECONDS,
+    PROFILE_PATHS,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_TOKEN,
+)
+from src.middleware.metrics import route_template
+from src.utils.metrics import REGISTRY
+from src.utils.sampling_profiler import Profile, Sampler
+
+PROFILES = REGISTRY.counter("request_profiles_total", "Requests profiled", ("trigger",))
+
+PROFILE_SUFFIX = ".folded"
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+def write_profile(directory: str, name: str, profile: Profile, max_files: int) -> str:
+    """Write a profile atomically, then delete the oldest beyond max_files"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write(profile.folded())
+    os.replace(temp, path)
+
+    # Names start with a millisecond timestamp, so they sort oldest first
+    names = sorted(n for n in os.listdir(directory) if n.endswith(PROFILE_SUFFIX))
+    for old in names[:max(len(names) - max_files, 0)]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            pass  # another worker pruned it
+    return path
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app,
+        token: str = PROFILE_TOKEN,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        paths: Sequence[str] = PROFILE_PATHS,
+        directory: str = PROFILE_DIR,
+        max_files: int = PROFILE_MAX_FILES,
+    ):
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.paths = tuple(paths)
+        self.directory = directory
+        self.max_files = max_files
+        self.sampler = Sampler(PROFILE_INTERVAL_MS / 1000)
+
+    def _trigger(self, scope) -> Optional[str]:
+        if not scope["path"].startswith(self.paths):
+            return None
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile-token":
+                    return "header" if hmac.compare_digest(value, self.token) else None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{int(time.time() * 1000)}-{secrets.token_hex(4)}"
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        # This frame is the root of every sampled stack
+        profile = self.sampler.start(asyncio.current_task(), sys._getframe(), PROFILE_MAX_SECONDS)
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            self.sampler.stop(profile)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            route = _UNSAFE.sub("_", route_template(scope).strip("/")) or "root"
+            name = f"{profile_id}-{scope['method']}-{route}-{elapsed_ms:.0f}ms{PROFILE_SUFFIX}"
+            try:
+                write_profile(self.directory, name, profile, self.max_files)
+                PROFILES.inc((trigger,))
+                print(f"Profiled {scope['method']} {scope['path']} ({elapsed_ms:.0f}ms, {profile.samples} samples): {name}")
+            except OSError as e:
+                print(f"Error writing request profile: {e}")
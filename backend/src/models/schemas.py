@@ -2,8 +2,8 @@
 Pydantic schemas for request/response validation
 """
 
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import List, NamedTuple, Optional, Dict
 from datetime import datetime
 
 # Authentication Schemas
@@ -48,10 +48,78 @@ class SaveScoreRequest(BaseModel):
     gameId: str
     analytics: GameAnalytics
 
+# Columnar save-score encoding: questionAttempts as parallel arrays, validated
+# per column instead of per object (Content-Type application/vnd.arcade.columnar+json
+# or application/msgpack)
+class AttemptRow(NamedTuple):
+    questionId: int
+    topic: str
+    difficulty: str
+    isCorrect: bool
+    timeSpent: int
+
+class AttemptColumns(BaseModel):
+    questionId: List[int]
+    topic: List[str]
+    difficulty: List[str]
+    isCorrect: List[bool]
+    timeSpent: List[int]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if not (len(self.questionId) == len(self.topic) == len(self.difficulty) == len(self.isCorrect) == len(self.timeSpent)):
+            raise ValueError("attempt columns must all have the same length")
+        return self
+
+    def __len__(self) -> int:
+        return len(self.questionId)
+
+    def rows(self) -> List[AttemptRow]:
+        """Row view with QuestionAttempt's attribute names, for the per-attempt services"""
+        return list(map(AttemptRow._make, zip(self.questionId, self.topic, self.difficulty, self.isCorrect, self.timeSpent)))
+
+class ColumnarGameAnalytics(BaseModel):
+    gameId: str
+    score: int
+    accuracy: float
+    correctAnswers: int
+    wrongAnswers: int
+    attempts: AttemptColumns
+    streakInfo: dict = {}
+    averageResponseTime: int
+
+class ColumnarSaveScoreRequest(BaseModel):
+    gameId: str
+    analytics: ColumnarGameAnalytics
+
 class SaveScoreResponse(BaseModel):
     success: bool
     sessionId: str
 
+# Live sessions - answers streamed during the game, then a small finalize
+class LiveSessionStart(BaseModel):
+    gameId: str
+
+class LiveSessionResponse(BaseModel):
+    sessionId: str
+    acked: int = 0
+
+class AnswerEvent(BaseModel):
+    seq: int  # 0-based answer number within the session; resent events are ignored
+    questionId: int
+    topic: str
+    difficulty: str
+    isCorrect: bool
+    timeSpent: int
+    score: Optional[int] = None  # the game's running score after this answer
+
+class AnswerEventBatch(BaseModel):
+    events: List[AnswerEvent]
+
+class LiveSessionFinalize(BaseModel):
+    score: int
+    maxStreak: Optional[int] = None
+
 # Statistics Schemas
 class UserStatsResponse(BaseModel):
     total_games_played: int
@@ -65,6 +133,14 @@ class UserStatsResponse(BaseModel):
     strong_topics: List[str]
     updated_at: str
 
+class PaceResponse(BaseModel):
+    topic: str
+    difficulty: Optional[str]
+    samples: int
+    p50: Optional[float]
+    p90: Optional[float]
+    fasterThanPercent: Optional[float] = None
+
 class GameSessionResponse(BaseModel):
     id: str
     game_id: str
@@ -75,6 +151,15 @@ class GameSessionResponse(BaseModel):
     max_streak: int
     created_at: str
 
+class AttemptHistoryItem(BaseModel):
+    session_id: str
+    question_id: int
+    topic: str
+    difficulty: str
+    is_correct: bool
+    time_spent: int
+    created_at: str
+
 # Question Bank Schemas
 class Question(BaseModel):
     id: int
@@ -89,3 +174,31 @@ class QuestionResponse(BaseModel):
     questions: List[Question]
     total: int
 
+class QuestionSearchHit(Question):
+    score: float
+
+class QuestionSearchResponse(BaseModel):
+    questions: List[QuestionSearchHit]
+    total: int
+
+class GeneratedQuestionStats(Question):
+    """A stored generated question; difficulty is the calibrated one once it has enough answers"""
+    generatedDifficulty: str
+    attempts: int
+    accuracy: Optional[float] = None
+    medianTimeMs: Optional[float] = None
+    createdAt: Optional[str] = None
+
+# Generation jobs - long AI generations run in the background and are polled
+class GenerationJobRequest(BaseModel):
+    numQuestions: int = Field(10, ge=1, le=100)
+    useWebSearch: bool = False
+
+class GenerationJobResponse(BaseModel):
+    jobId: str
+    status: str  # queued, running, succeeded or failed
+    requested: int
+    completed: int
+    attempts: int
+    questions: List[Question] = []
+    error: Optional[str] = None
@@ -0,0 +1,27 @@
+"""
+Repositories - storage backends selected by DATABASE_BACKEND
+- supabase (default): Supabase / PostgREST
+- sqlite: embedded database at SQLITE_PATH
+"""
+
+from typing import Optional
+
+from src.config import DATABASE_BACKEND, SQLITE_PATH
+from src.repositories.base import Repository
+
+_repository: Optional[Repository] = None
+
+def get_repository() -> Repository:
+    """Get the configured repository (also used as a FastAPI dependency)"""
+    global _repository
+    if _repository is None:
+        if DATABASE_BACKEND == "sqlite":
+            from src.repositories.sqlite_repository import SQLiteRepository
+            _repository = SQLiteRepository(SQLITE_PATH)
+        elif DATABASE_BACKEND == "supabase":
+            from src.repositories.supabase_repository import SupabaseRepository
+            from src.utils.database import Database
+            _repository = SupabaseRepository(Database.get_client())
+        else:
+            raise ValueError(f"Unknown DATABASE_BACKEND '{DATABASE_BACKEND}' (expected supabase or sqlite)")
+    return _repository
@@ -0,0 +1,166 @@
+"""
+Repository interface - every read and write the backend makes to its database
+Rows are plain dicts using the column names from database/schema.sql
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+class Repository(ABC):
+    """Storage backend for sessions, attempts, stats and the derived tables
+
+    `auth` exposes sign_up / sign_in_with_password with the same call and
+    response shape as the Supabase auth client.
+    """
+
+    auth: Any
+
+    # Game sessions
+    @abstractmethod
+    def create_session(self, session: Dict) -> Optional[Dict]:
+        """Insert a game session and return the stored row (with id)"""
+
+    @abstractmethod
+    def recent_sessions(self, user_id: str, limit: int) -> List[Dict]:
+        """Most recent sessions for a user, newest first"""
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        """A game session row, or None"""
+
+    @abstractmethod
+    def update_session(self, session_id: str, fields: Dict):
+        """Update columns of a game session"""
+
+    @abstractmethod
+    def update_open_session(self, session_id: str, fields: Dict, finalize: bool = False) -> bool:
+        """Update a live session's columns (and set finalized_at if finalize)
+        in one update conditional on finalized_at IS NULL; False if the
+        session was already finalized"""
+
+    # Question attempts
+    @abstractmethod
+    def insert_attempts(self, attempts: List[Dict]):
+        """Bulk insert question attempt rows"""
+
+    @abstractmethod
+    def insert_attempt_columns(self, session_id: str, user_id: str, columns: Dict[str, List]):
+        """Bulk insert attempts given as parallel arrays keyed by question_id, topic,
+        difficulty, is_correct and time_spent (no per-row dicts)"""
+
+    @abstractmethod
+    def user_topic_totals(self, user_id: str) -> List[Dict]:
+        """Per-topic attempts, correct and time_spent of a user's attempts still in
+        question_attempts, aggregated in the database (archived ones are in attempt_rollups)"""
+
+    @abstractmethod
+    def attempt_topics(self) -> List[str]:
+        """Distinct topics that have been attempted (including archived attempts)"""
+
+    @abstractmethod
+    def attempt_history(
+        self,
+        user_id: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 1000,
+    ) -> List[Dict]:
+        """Up to limit of a user's attempts in question_attempts with created_at
+        in [since, until), oldest first, after the (created_at, id) of the
+        previous page's last row; rows include id"""
+
+    # Attempt archive
+    @abstractmethod
+    def attempt_rollups(self, user_id: str) -> List[Dict]:
+        """attempt_rollups rows (per-topic totals of archived attempts) for a user"""
+
+    @abstractmethod
+    def archivable_users(self, cutoff: str, limit: int) -> List[str]:
+        """Up to limit users with attempts created before cutoff"""
+
+    @abstractmethod
+    def archivable_attempts(self, user_id: str, cutoff: str, limit: int) -> List[Dict]:
+        """A user's oldest attempts created before cutoff (full rows, oldest first)"""
+
+    @abstractmethod
+    def archive_attempts(self, user_id: str, attempt_ids: List[str]) -> int:
+        """Fold attempts into attempt_rollups and delete them (atomically); returns rows removed"""
+
+    # User stats
+    @abstractmethod
+    def get_user_stats(self, user_id: str) -> Optional[Dict]:
+        """The user's stats row, or None"""
+
+    @abstractmethod
+    def create_user_stats(self, stats: Dict):
+        """Insert a user_stats row"""
+
+    @abstractmethod
+    def update_user_stats(self, user_id: str, fields: Dict):
+        """Update columns of a user's stats row"""
+
+    # Response time sketches
+    @abstractmethod
+    def load_sketches(self) -> List[Dict]:
+        """All rows of response_time_sketches"""
+
+    @abstractmethod
+    def merge_sketches(self, rows: List[Dict]) -> List[Dict]:
+        """Merge each row's digest and sample_count (a worker's samples since its
+        last merge) into the stored sketch of its topic and difficulty, atomically
+        with respect to other workers; returns the merged rows"""
+
+    # Skill ratings
+    @abstractmethod
+    def user_ratings(self, user_id: str) -> List[Dict]:
+        """user_topic_ratings rows for a user"""
+
+    @abstractmethod
+    def question_ratings(self, question_ids: Iterable[int]) -> List[Dict]:
+        """question_ratings rows for the given questions"""
+
+    @abstractmethod
+    def apply_rating_deltas(self, user_id: str, topics: List[Dict], questions: List[Dict]):
+        """Add one game's rating changes to the stored ratings, atomically with respect to other workers
+
+        topics: {topic, rating_delta, attempts, time_spent} for the user (new rows start at 1500);
+        questions: {question_id, prior, rating_delta, attempts} (new rows start at prior)
+        """
+
+    # Review scheduling
+    @abstractmethod
+    def review_states(self, user_id: str, question_ids: Iterable[int]) -> List[Dict]:
+        """review_items rows for some of a user's questions"""
+
+    @abstractmethod
+    def review_schedule(self, user_id: str, limit: int) -> List[Dict]:
+        """question_id and due_at of a user's limit soonest-due review items, soonest first"""
+
+    @abstractmethod
+    def save_review_items(self, rows: List[Dict]):
+        """Upsert review_items rows on (user_id, question_id)"""
+
+    # Generated questions
+    @abstractmethod
+    def save_generated_questions(self, rows: List[Dict]):
+        """Insert generated_questions rows, skipping ids that are already stored"""
+
+    @abstractmethod
+    def generated_questions(self, question_ids: Iterable[int]) -> List[Dict]:
+        """generated_questions rows (content and stats) for the given ids"""
+
+    @abstractmethod
+    def reusable_questions(self, topics: List[str], min_attempts: int, limit: int) -> List[Dict]:
+        """Stored questions of the given topics with at least min_attempts, most answered first"""
+
+    @abstractmethod
+    def record_question_stats(self, rows: List[Dict]) -> int:
+        """Add attempts/correct/time_spent deltas to stored questions and merge each row's
+        time_digest (a worker's samples since its last flush) into the stored one, atomically
+        with respect to other workers; median_time_ms follows the merged digest"""
+
+    # Health
+    @abstractmethod
+    def ping(self):
+        """Run a trivial query; raises if the database is unreachable"""
@@ -0,0 +1,459 @@
+"""
+Embedded SQLite repository - single-box deployments and local benchmarking
+Mirrors database/schema.sql (see database/sqlite_schema.sql) and includes a
+small local stand-in for Supabase auth.
+"""
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from itertools import repeat
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import LOCAL_AUTH_HASH_ITERATIONS, LOCAL_JWT_SECRET
+from src.repositories.base import Repository
+from src.utils.query_log import record_query
+from src.utils.tdigest import TDigest
+
+SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "database",
+    "sqlite_schema.sql",
+)
+
+# Columns stored as JSON text
+JSON_COLUMNS = {"weak_topics", "strong_topics", "digest", "options", "time_digest"}
+# Columns stored as 0/1
+BOOL_COLUMNS = {"is_correct"}
+
+def _encode(column: str, value):
+    if column in JSON_COLUMNS and value is not None and not isinstance(value, str):
+        return json.dumps(value)
+    if column in BOOL_COLUMNS:
+        return 1 if value else 0
+    return value
+
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+def _describe(sql: str):
+    """(table, operation) of a statement for query accounting"""
+    match = _TABLE_PATTERN.search(sql)
+    return (match.group(1) if match else "unknown"), sql.split(None, 1)[0].lower()
+
+def _decode(row: sqlite3.Row) -> Dict:
+    data = dict(row)
+    for column in JSON_COLUMNS.intersection(data):
+        if isinstance(data[column], str):
+            data[column] = json.loads(data[column])
+    for column in BOOL_COLUMNS.intersection(data):
+        data[column] = bool(data[column])
+    return data
+
+class SQLiteRepository(Repository):
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with open(SCHEMA_PATH, encoding="utf-8") as f:
+            self._conn.executescript(f.read())
+        self.auth = LocalAuth(self)
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        start = time.perf_counter()
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+        record_query(*_describe(sql), len(rows), (time.perf_counter() - start) * 1000)
+        return [_decode(row) for row in rows]
+
+    def _execute(self, sql: str, params: Iterable = ()):
+        start = time.perf_counter()
+        with self._lock, self._conn:
+            rowcount = self._conn.execute(sql, tuple(params)).rowcount
+        record_query(*_describe(sql), rowcount, (time.perf_counter() - start) * 1000)
+        return rowcount
+
+    def _insert(self, table: str, rows: List[Dict], ignore_existing: bool = False):
+        if not rows:
+            return
+        columns = list(rows[0])
+        sql = f"INSERT {'OR IGNORE ' if ignore_existing else ''}INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        start = time.perf_counter()
+        with self._lock, self._conn:
+            self._conn.executemany(sql, [[_encode(c, row.get(c)) for c in columns] for row in rows])
+        record_query(table, "insert", len(rows), (time.perf_counter() - start) * 1000)
+
+    def _upsert(self, table: str, rows: List[Dict], conflict: List[str]):
+        if not rows:
+            return
+        columns = list(rows[0])
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in conflict)
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT ({', '.join(conflict)}) DO UPDATE SET {updates}"
+        )
+        start = time.perf_counter()
+        with self._lock, self._conn:
+            self._conn.executemany(sql, [[_encode(c, row.get(c)) for c in columns] for row in rows])
+        record_query(table, "upsert", len(rows), (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def _placeholders(values: List) -> str:
+        return ", ".join("?" for _ in values)
+
+    # Game sessions
+    def create_session(self, session: Dict) -> Optional[Dict]:
+        row = {"id": str(uuid.uuid4()), **session}
+        self._insert("game_sessions", [row])
+        rows = self._query("SELECT * FROM game_sessions WHERE id = ?", [row["id"]])
+        return rows[0] if rows else None
+
+    def recent_sessions(self, user_id: str, limit: int) -> List[Dict]:
+        return self._query(
+            "SELECT * FROM game_sessions WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+            [user_id, limit],
+        )
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT * FROM game_sessions WHERE id = ?", [session_id])
+        return rows[0] if rows else None
+
+    def update_session(self, session_id: str, fields: Dict):
+        assignments = ", ".join(f"{c} = ?" for c in fields)
+        self._execute(
+            f"UPDATE game_sessions SET {assignments} WHERE id = ?",
+            [_encode(c, v) for c, v in fields.items()] + [session_id],
+        )
+
+    def update_open_session(self, session_id: str, fields: Dict, finalize: bool = False) -> bool:
+        assignments = [f"{c} = ?" for c in fields]
+        if finalize:
+            assignments.append("finalized_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')")
+        updated = self._execute(
+            f"UPDATE game_sessions SET {', '.join(assignments)} WHERE id = ? AND finalized_at IS NULL",
+            [_encode(c, v) for c, v in fields.items()] + [session_id],
+        )
+        return updated > 0
+
+    # Question attempts
+    def insert_attempts(self, attempts: List[Dict]):
+        self._insert("question_attempts", [{"id": str(uuid.uuid4()), **a} for a in attempts])
+
+    def insert_attempt_columns(self, session_id: str, user_id: str, columns: Dict[str, List]):
+        count = len(columns["question_id"])
+        if not count:
+            return
+        start = time.perf_counter()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO question_attempts (id, session_id, user_id, question_id, topic, difficulty, is_correct, time_spent) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                zip(
+                    (str(uuid.uuid4()) for _ in range(count)),
+                    repeat(session_id),
+                    repeat(user_id),
+                    columns["question_id"],
+                    columns["topic"],
+                    columns["difficulty"],
+                    columns["is_correct"],
+                    columns["time_spent"],
+                ),
+            )
+        record_query("question_attempts", "insert", count, (time.perf_counter() - start) * 1000)
+
+    def user_topic_totals(self, user_id: str) -> List[Dict]:
+        return self._query(
+            "SELECT topic, count(*) AS attempts, sum(is_correct) AS correct, COALESCE(sum(time_spent), 0) AS time_spent "
+            "FROM question_attempts WHERE user_id = ? GROUP BY topic",
+            [user_id],
+        )
+
+    def attempt_topics(self) -> List[str]:
+        return [
+            row["topic"]
+            for row in self._query("SELECT topic FROM question_attempts UNION SELECT topic FROM attempt_rollups")
+        ]
+
+    def attempt_history(
+        self,
+        user_id: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 1000,
+    ) -> List[Dict]:
+        after_created, after_id = after or ("", "")
+        return self._query(
+            "SELECT id, session_id, question_id, topic, difficulty, is_correct, time_spent, created_at FROM question_attempts "
+            "WHERE user_id = ? AND created_at >= ? AND created_at < ? AND (created_at > ? OR (created_at = ? AND id > ?)) "
+            "ORDER BY created_at, id LIMIT ?",
+            [user_id, since or "", until or "~", after_created, after_created, after_id, limit],
+        )
+
+    # Attempt archive
+    def attempt_rollups(self, user_id: str) -> List[Dict]:
+        return self._query(
+            "SELECT topic, attempts, correct, time_spent, last_attempt_at FROM attempt_rollups WHERE user_id = ?",
+            [user_id],
+        )
+
+    def archivable_users(self, cutoff: str, limit: int) -> List[str]:
+        rows = self._query(
+            "SELECT DISTINCT user_id FROM question_attempts WHERE created_at < ? LIMIT ?",
+            [cutoff, limit],
+        )
+        return [row["user_id"] for row in rows]
+
+    def archivable_attempts(self, user_id: str, cutoff: str, limit: int) -> List[Dict]:
+        return self._query(
+            "SELECT * FROM question_attempts WHERE user_id = ? AND created_at < ? ORDER BY created_at, id LIMIT ?",
+            [user_id, cutoff, limit],
+        )
+
+    def archive_attempts(self, user_id: str, attempt_ids: List[str]) -> int:
+        if not attempt_ids:
+            return 0
+        ids = self._placeholders(attempt_ids)
+        start = time.perf_counter()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO attempt_rollups (user_id, topic, attempts, correct, time_spent, last_attempt_at) "
+                "SELECT user_id, topic, count(*), sum(is_correct), sum(time_spent), max(created_at) FROM question_attempts "
+                f"WHERE user_id = ? AND id IN ({ids}) GROUP BY user_id, topic "
+                "ON CONFLICT (user_id, topic) DO UPDATE SET "
+                "attempts = attempts + excluded.attempts, correct = correct + excluded.correct, "
+                "time_spent = time_spent + excluded.time_spent, "
+                "last_attempt_at = max(coalesce(last_attempt_at, ''), excluded.last_attempt_at), "
+                "updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')",
+                [user_id, *attempt_ids],
+            )
+            removed = self._conn.execute(
+                f"DELETE FROM question_attempts WHERE user_id = ? AND id IN ({ids})",
+                [user_id, *attempt_ids],
+            ).rowcount
+        record_query("question_attempts", "archive", removed, (time.perf_counter() - start) * 1000)
+        return removed
+
+    # User stats
+    def get_user_stats(self, user_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT * FROM user_stats WHERE user_id = ?", [user_id])
+        return rows[0] if rows else None
+
+    def create_user_stats(self, stats: Dict):
+        self._insert("user_stats", [{"id": str(uuid.uuid4()), **stats}])
+
+    def update_user_stats(self, user_id: str, fields: Dict):
+        assignments = ", ".join(f"{c} = ?" for c in fields)
+        self._execute(
+            f"UPDATE user_stats SET {assignments} WHERE user_id = ?",
+            [_encode(c, v) for c, v in fields.items()] + [user_id],
+        )
+
+    # Response time sketches
+    def load_sketches(self) -> List[Dict]:
+        return self._query("SELECT topic, difficulty, digest FROM response_time_sketches")
+
+    def merge_sketches(self, rows: List[Dict]) -> List[Dict]:
+        if not rows:
+            return []
+        merged = []
+        start = time.perf_counter()
+        # The write lock is taken before reading, so no other process merges in between
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for row in rows:
+                stored = self._conn.execute(
+                    "SELECT digest FROM response_time_sketches WHERE topic = ? AND difficulty = ?",
+                    [row["topic"], row["difficulty"]],
+                ).fetchone()
+                digest = TDigest.from_dict(row["digest"])
+                if stored is not None:
+                    digest = TDigest.from_dict(json.loads(stored["digest"]))
+                    digest.merge(TDigest.from_dict(row["digest"]))
+                merged.append({"topic": row["topic"], "difficulty": row["difficulty"], "digest": digest.to_dict()})
+                self._conn.execute(
+                    "INSERT INTO response_time_sketches (topic, difficulty, digest, sample_count) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (topic, difficulty) DO UPDATE SET digest = excluded.digest, "
+                    "sample_count = sample_count + excluded.sample_count, "
+                    "updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')",
+                    [row["topic"], row["difficulty"], json.dumps(merged[-1]["digest"]), row["sample_count"]],
+                )
+        record_query("response_time_sketches", "merge", len(rows), (time.perf_counter() - start) * 1000)
+        return merged
+
+    # Skill ratings
+    def user_ratings(self, user_id: str) -> List[Dict]:
+        return self._query(
+            "SELECT topic, rating, attempts, avg_time_ms FROM user_topic_ratings WHERE user_id = ?",
+            [user_id],
+        )
+
+    def question_ratings(self, question_ids: Iterable[int]) -> List[Dict]:
+        ids = list(question_ids)
+        if not ids:
+            return []
+        return self._query(
+            f"SELECT question_id, rating, attempts FROM question_ratings WHERE question_id IN ({self._placeholders(ids)})",
+            ids,
+        )
+
+    def apply_rating_deltas(self, user_id: str, topics: List[Dict], questions: List[Dict]):
+        # Same statements as apply_rating_deltas in add_rating_deltas.sql
+        now = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+        start = time.perf_counter()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO user_topic_ratings (user_id, topic) VALUES (?, ?)",
+                [[user_id, row["topic"]] for row in topics],
+            )
+            self._conn.executemany(
+                "UPDATE user_topic_ratings SET rating = rating + ?, "
+                "avg_time_ms = (avg_time_ms * attempts + ?) / (attempts + ?), attempts = attempts + ?, "
+                f"updated_at = {now} WHERE user_id = ? AND topic = ?",
+                [[row["rating_delta"], row["time_spent"], row["attempts"], row["attempts"], user_id, row["topic"]] for row in topics],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO question_ratings (question_id, rating) VALUES (?, ?)",
+                [[row["question_id"], row["prior"]] for row in questions],
+            )
+            self._conn.executemany(
+                f"UPDATE question_ratings SET rating = rating + ?, attempts = attempts + ?, updated_at = {now} WHERE question_id = ?",
+                [[row["rating_delta"], row["attempts"], row["question_id"]] for row in questions],
+            )
+        record_query("user_topic_ratings", "update", len(topics) + len(questions), (time.perf_counter() - start) * 1000)
+
+    # Review scheduling
+    def review_states(self, user_id: str, question_ids: Iterable[int]) -> List[Dict]:
+        ids = list(question_ids)
+        if not ids:
+            return []
+        return self._query(
+            "SELECT question_id, ease, repetitions, interval_days, lapses FROM review_items "
+            f"WHERE user_id = ? AND question_id IN ({self._placeholders(ids)})",
+            [user_id] + ids,
+        )
+
+    def review_schedule(self, user_id: str, limit: int) -> List[Dict]:
+        return self._query(
+            "SELECT question_id, due_at FROM review_items WHERE user_id = ? ORDER BY due_at LIMIT ?",
+            [user_id, limit],
+        )
+
+    def save_review_items(self, rows: List[Dict]):
+        self._upsert("review_items", rows, ["user_id", "question_id"])
+
+    # Generated questions
+    def save_generated_questions(self, rows: List[Dict]):
+        self._insert("generated_questions", rows, ignore_existing=True)
+
+    def generated_questions(self, question_ids: Iterable[int]) -> List[Dict]:
+        ids = list(question_ids)
+        if not ids:
+            return []
+        return self._query(f"SELECT * FROM generated_questions WHERE id IN ({self._placeholders(ids)})", ids)
+
+    def reusable_questions(self, topics: List[str], min_attempts: int, limit: int) -> List[Dict]:
+        if not topics:
+            return []
+        return self._query(
+            f"SELECT * FROM generated_questions WHERE topic IN ({self._placeholders(topics)}) AND attempts >= ? "
+            "ORDER BY attempts DESC LIMIT ?",
+            topics + [min_attempts, limit],
+        )
+
+    def record_question_stats(self, rows: List[Dict]) -> int:
+        if not rows:
+            return 0
+        # Same merge as record_generated_question_stats in add_atomic_question_stats.sql
+        sql = (
+            "UPDATE generated_questions SET attempts = attempts + ?, correct = correct + ?, "
+            "time_spent = time_spent + ?, time_digest = ?, median_time_ms = COALESCE(?, median_time_ms), "
+            "updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = ?"
+        )
+        updated = 0
+        start = time.perf_counter()
+        # The write lock is taken before reading, so no other process merges in between
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for row in rows:
+                stored = self._conn.execute("SELECT time_digest FROM generated_questions WHERE id = ?", [row["id"]]).fetchone()
+                if stored is None:
+                    continue
+                digest, median = stored["time_digest"], None
+                if row["time_digest"]:
+                    merged = TDigest.from_dict(row["time_digest"])
+                    if digest:
+                        merged = TDigest.from_dict(json.loads(digest))
+                        merged.merge(TDigest.from_dict(row["time_digest"]))
+                    digest, median = json.dumps(merged.to_dict()), merged.quantile(0.5)
+                updated += self._conn.execute(
+                    sql, [row["attempts"], row["correct"], row["time_spent"], digest, median, row["id"]]
+                ).rowcount
+        record_query("generated_questions", "update", updated, (time.perf_counter() - start) * 1000)
+        return updated
+
+    # Health
+    def ping(self):
+        self._query("SELECT 1")
+
+class LocalAuth:
+    """Email/password auth against the users table
+
+    Mirrors the parts of the Supabase auth client that AuthService uses and
+    issues HS256 JWTs with the same claims (sub, email, exp).
+    """
+
+    TOKEN_TTL_SECONDS = 3600
+
+    def __init__(self, repo: SQLiteRepository):
+        self.repo = repo
+
+    @staticmethod
+    def _hash(password: str, salt: str) -> str:
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), LOCAL_AUTH_HASH_ITERATIONS)
+        return f"{salt}${digest.hex()}"
+
+    def _session(self, user: SimpleNamespace) -> SimpleNamespace:
+        import jwt
+
+        now = int(time.time())
+        token = jwt.encode(
+            {"sub": user.id, "email": user.email, "iat": now, "exp": now + self.TOKEN_TTL_SECONDS},
+            LOCAL_JWT_SECRET,
+            algorithm="HS256",
+        )
+        return SimpleNamespace(access_token=token, refresh_token=secrets.token_urlsafe(24))
+
+    def sign_up(self, credentials: Dict) -> SimpleNamespace:
+        email = credentials["email"].lower()
+        if self.repo._query("SELECT id FROM users WHERE email = ?", [email]):
+            raise ValueError("User already registered")
+
+        user = SimpleNamespace(id=str(uuid.uuid4()), email=email)
+        self.repo._insert("users", [{
+            "id": user.id,
+            "email": email,
+            "password_hash": self._hash(credentials["password"], secrets.token_hex(8)),
+        }])
+        return SimpleNamespace(user=user, session=self._session(user))
+
+    def sign_in_with_password(self, credentials: Dict) -> SimpleNamespace:
+        email = credentials["email"].lower()
+        rows = self.repo._query("SELECT id, email, password_hash FROM users WHERE email = ?", [email])
+        if rows:
+            salt = rows[0]["password_hash"].split("$", 1)[0]
+            if secrets.compare_digest(self._hash(credentials["password"], salt), rows[0]["password_hash"]):
+                user = SimpleNamespace(id=rows[0]["id"], email=rows[0]["email"])
+                return SimpleNamespace(user=user, session=self._session(user))
+        raise ValueError("Invalid login credentials")
@@ -0,0 +1,304 @@
+"""
+Supabase (PostgREST) repository - the production backend
+"""
+
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from src.repositories.base import Repository
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+class SupabaseRepository(Repository):
+    def __init__(self, client: "Client"):
+        self.client = client
+        self.auth = client.auth
+        # Until the columnar insert function turns out to be missing
+        self._columnar_insert = True
+
+    # Game sessions
+    def create_session(self, session: Dict) -> Optional[Dict]:
+        result = self.client.table("game_sessions").insert(session).execute()
+        return result.data[0] if result.data else None
+
+    def recent_sessions(self, user_id: str, limit: int) -> List[Dict]:
+        result = (
+            self.client.table("game_sessions")
+            .select("*")
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return result.data or []
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        result = self.client.table("game_sessions").select("*").eq("id", session_id).execute()
+        return result.data[0] if result.data else None
+
+    def update_session(self, session_id: str, fields: Dict):
+        self.client.table("game_sessions").update(fields).eq("id", session_id).execute()
+
+    def update_open_session(self, session_id: str, fields: Dict, finalize: bool = False) -> bool:
+        # database/add_live_session_finalized.sql
+        if finalize:
+            fields = {**fields, "finalized_at": datetime.now(timezone.utc).isoformat()}
+        result = (
+            self.client.table("game_sessions")
+            .update(fields)
+            .eq("id", session_id)
+            .is_("finalized_at", "null")
+            .execute()
+        )
+        return bool(result.data)
+
+    # Question attempts
+    def insert_attempts(self, attempts: List[Dict]):
+        if attempts:
+            self.client.table("question_attempts").insert(attempts).execute()
+
+    def insert_attempt_columns(self, session_id: str, user_id: str, columns: Dict[str, List]):
+        # database/add_columnar_attempt_insert.sql - unnests the arrays server-side
+        if not columns["question_id"]:
+            return
+        if self._columnar_insert:
+            try:
+                self.client.rpc("insert_question_attempts", {
+                    "p_session_id": session_id,
+                    "p_user_id": user_id,
+                    "p_question_ids": columns["question_id"],
+                    "p_topics": columns["topic"],
+                    "p_difficulties": columns["difficulty"],
+                    "p_is_correct": columns["is_correct"],
+                    "p_time_spent": columns["time_spent"],
+                }).execute()
+                return
+            except Exception as e:
+                # PGRST202: the function doesn't exist - the migration hasn't been run
+                if getattr(e, "code", None) != "PGRST202":
+                    raise
+                print("insert_question_attempts is missing (run database/add_columnar_attempt_insert.sql) - inserting rows")
+                self._columnar_insert = False
+        self.insert_attempts([
+            {
+                "session_id": session_id,
+                "user_id": user_id,
+                "question_id": question_id,
+                "topic": topic,
+                "difficulty": difficulty,
+                "is_correct": is_correct,
+                "time_spent": time_spent,
+            }
+            for question_id, topic, difficulty, is_correct, time_spent in zip(
+                columns["question_id"], columns["topic"], columns["difficulty"], columns["is_correct"], columns["time_spent"]
+            )
+        ])
+
+    def user_topic_totals(self, user_id: str) -> List[Dict]:
+        # database/add_topic_aggregates.sql - one row per topic instead of every attempt
+        result = self.client.rpc("user_topic_totals", {"p_user_id": user_id}).execute()
+        return result.data or []
+
+    def attempt_topics(self) -> List[str]:
+        # database/add_topic_aggregates.sql - DISTINCT in the database, not over max-rows rows
+        result = self.client.rpc("attempted_topics", {}).execute()
+        return [row["topic"] for row in result.data or []]
+
+    def attempt_history(
+        self,
+        user_id: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 1000,
+    ) -> List[Dict]:
+        query = (
+            self.client.table("question_attempts")
+            .select("id, session_id, question_id, topic, difficulty, is_correct, time_spent, created_at")
+            .eq("user_id", user_id)
+        )
+        if since:
+            query = query.gte("created_at", since)
+        if until:
+            query = query.lt("created_at", until)
+        if after:
+            # Keyset on (created_at, id); timestamps are quoted for their ':' and '+'
+            created_at, attempt_id = after
+            query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{attempt_id})')
+        result = query.order("created_at").order("id").limit(limit).execute()
+        return result.data or []
+
+    # Attempt archive
+    def attempt_rollups(self, user_id: str) -> List[Dict]:
+        result = (
+            self.client.table("attempt_rollups")
+            .select("topic, attempts, correct, time_spent, last_attempt_at")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return result.data or []
+
+    def archivable_users(self, cutoff: str, limit: int) -> List[str]:
+        # database/add_attempt_archive.sql
+        result = self.client.rpc("archivable_attempt_users", {"p_cutoff": cutoff, "p_limit": limit}).execute()
+        return [row["user_id"] for row in result.data or []]
+
+    def archivable_attempts(self, user_id: str, cutoff: str, limit: int) -> List[Dict]:
+        result = (
+            self.client.table("question_attempts")
+            .select("*")
+            .eq("user_id", user_id)
+            .lt("created_at", cutoff)
+            .order("created_at")
+            .order("id")
+            .limit(limit)
+            .execute()
+        )
+        return result.data or []
+
+    def archive_attempts(self, user_id: str, attempt_ids: List[str]) -> int:
+        if not attempt_ids:
+            return 0
+        result = self.client.rpc("archive_question_attempts", {"p_user_id": user_id, "p_ids": attempt_ids}).execute()
+        return result.data or 0
+
+    # User stats
+    def get_user_stats(self, user_id: str) -> Optional[Dict]:
+        result = self.client.table("user_stats").select("*").eq("user_id", user_id).execute()
+        return result.data[0] if result.data else None
+
+    def create_user_stats(self, stats: Dict):
+        self.client.table("user_stats").insert(stats).execute()
+
+    def update_user_stats(self, user_id: str, fields: Dict):
+        self.client.table("user_stats").update(fields).eq("user_id", user_id).execute()
+
+    # Response time sketches
+    def load_sketches(self) -> List[Dict]:
+        result = self.client.table("response_time_sketches").select("topic, difficulty, digest").execute()
+        return result.data or []
+
+    def merge_sketches(self, rows: List[Dict]) -> List[Dict]:
+        if not rows:
+            return []
+        # database/add_atomic_sketch_merge.sql
+        result = self.client.rpc("merge_response_time_sketches", {
+            "p_topics": [row["topic"] for row in rows],
+            "p_difficulties": [row["difficulty"] for row in rows],
+            "p_digests": [row["digest"] for row in rows],
+            "p_sample_counts": [row["sample_count"] for row in rows],
+        }).execute()
+        return result.data or []
+
+    # Skill ratings
+    def user_ratings(self, user_id: str) -> List[Dict]:
+        result = (
+            self.client.table("user_topic_ratings")
+            .select("topic, rating, attempts, avg_time_ms")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return result.data or []
+
+    def question_ratings(self, question_ids: Iterable[int]) -> List[Dict]:
+        ids = list(question_ids)
+        if not ids:
+            return []
+        result = (
+            self.client.table("question_ratings")
+            .select("question_id, rating, attempts")
+            .in_("question_id", ids)
+            .execute()
+        )
+        return result.data or []
+
+    def apply_rating_deltas(self, user_id: str, topics: List[Dict], questions: List[Dict]):
+        if not topics and not questions:
+            return
+        # database/add_rating_deltas.sql - deltas are added server-side
+        self.client.rpc("apply_rating_deltas", {
+            "p_user_id": user_id,
+            "p_topics": [row["topic"] for row in topics],
+            "p_topic_deltas": [row["rating_delta"] for row in topics],
+            "p_topic_attempts": [row["attempts"] for row in topics],
+            "p_topic_time_spent": [row["time_spent"] for row in topics],
+            "p_question_ids": [row["question_id"] for row in questions],
+            "p_question_priors": [row["prior"] for row in questions],
+            "p_question_deltas": [row["rating_delta"] for row in questions],
+            "p_question_attempts": [row["attempts"] for row in questions],
+        }).execute()
+
+    # Review scheduling
+    def review_states(self, user_id: str, question_ids: Iterable[int]) -> List[Dict]:
+        ids = list(question_ids)
+        if not ids:
+            return []
+        result = (
+            self.client.table("review_items")
+            .select("question_id, ease, repetitions, interval_days, lapses")
+            .eq("user_id", user_id)
+            .in_("question_id", ids)
+            .execute()
+        )
+        return result.data or []
+
+    def review_schedule(self, user_id: str, limit: int) -> List[Dict]:
+        # Index range scan on (user_id, due_at)
+        result = (
+            self.client.table("review_items")
+            .select("question_id, due_at")
+            .eq("user_id", user_id)
+            .order("due_at")
+            .limit(limit)
+            .execute()
+        )
+        return result.data or []
+
+    def save_review_items(self, rows: List[Dict]):
+        if rows:
+            self.client.table("review_items").upsert(rows, on_conflict="user_id,question_id").execute()
+
+    # Generated questions
+    def save_generated_questions(self, rows: List[Dict]):
+        if rows:
+            self.client.table("generated_questions").upsert(rows, on_conflict="id", ignore_duplicates=True).execute()
+
+    def generated_questions(self, question_ids: Iterable[int]) -> List[Dict]:
+        ids = list(question_ids)
+        if not ids:
+            return []
+        result = self.client.table("generated_questions").select("*").in_("id", ids).execute()
+        return result.data or []
+
+    def reusable_questions(self, topics: List[str], min_attempts: int, limit: int) -> List[Dict]:
+        if not topics:
+            return []
+        result = (
+            self.client.table("generated_questions")
+            .select("*")
+            .in_("topic", topics)
+            .gte("attempts", min_attempts)
+            .order("attempts", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return result.data or []
+
+    def record_question_stats(self, rows: List[Dict]) -> int:
+        if not rows:
+            return 0
+        # database/add_atomic_question_stats.sql - counters and digests are merged server-side
+        result = self.client.rpc("record_generated_question_stats", {
+            "p_ids": [row["id"] for row in rows],
+            "p_attempts": [row["attempts"] for row in rows],
+            "p_correct": [row["correct"] for row in rows],
+            "p_time_spent": [row["time_spent"] for row in rows],
+            "p_time_digests": [row["time_digest"] for row in rows],
+        }).execute()
+        return result.data or 0
+
+    # Health
+    def ping(self):
+        # No rows needed - a round trip is enough, and it reads no user data
+        self.client.table("game_sessions").select("id").limit(0).execute()
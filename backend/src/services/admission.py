@@ -0,0 +1,153 @@
+"""
+Admission control for slow, expensive work (AI question generation)
+At most max_concurrency calls run per worker and max_per_user per caller
+(callers that can't be identified only count against the worker limit);
+up to queue_size more wait in FIFO order for at most `timeout` seconds.
+Anything beyond that is rejected straight away, so callers can shed load
+or downgrade instead of piling up behind the slow path.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from src.config import (
+    AGENT_MAX_CONCURRENCY,
+    AGENT_MAX_PER_USER,
+    AGENT_QUEUE_SIZE,
+    AGENT_QUEUE_TIMEOUT_SECONDS,
+)
+from src.utils.metrics import REGISTRY
+from src.utils.resilience import BudgetExceeded, timeout_for
+
+ACTIVE = REGISTRY.gauge("admission_active", "Calls currently admitted", ("pool",))
+QUEUE_DEPTH = REGISTRY.gauge("admission_queue_depth", "Calls waiting for admission", ("pool",))
+WAIT_TIME = REGISTRY.histogram("admission_wait_seconds", "Time spent waiting for admission", ("pool",))
+ADMISSIONS = REGISTRY.counter("admission_total", "Admission decisions", ("pool", "outcome"))
+
+class AdmissionRejected(Exception):
+    """Not admitted - reason is "user" (caller at its limit), "queue_full" or "timeout" """
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many concurrent requests ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Concurrency limiter with a bounded, deadline-limited wait queue (event-loop only)"""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_per_user: int,
+        queue_size: int,
+        timeout: float,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._active = 0
+        self._per_user: Dict[str, int] = {}
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @asynccontextmanager
+    async def admit(self, key: Optional[str]):
+        """Hold a slot for the duration of the block; raises AdmissionRejected
+        (key None skips the per-caller limit)"""
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release(key)
+
+    def _reject(self, key: Optional[str], reason: str):
+        if key is not None:
+            self._leave(key)
+        ADMISSIONS.inc((self.name, reason))
+        raise AdmissionRejected(reason, retry_after=self.timeout)
+
+    def _leave(self, key: Optional[str]):
+        if key is None:
+            return
+        remaining = self._per_user.get(key, 1) - 1
+        if remaining:
+            self._per_user[key] = remaining
+        else:
+            self._per_user.pop(key, None)
+
+    async def _acquire(self, key: Optional[str]):
+        if key is not None:
+            if self._per_user.get(key, 0) >= self.max_per_user:
+                self._reject(None, "user")
+            # Queued calls count against the caller too
+            self._per_user[key] = self._per_user.get(key, 0) + 1
+
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            ACTIVE.set((self.name,), self._active)
+            ADMISSIONS.inc((self.name, "admitted"))
+            WAIT_TIME.observe((self.name,), 0.0)
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            self._reject(key, "queue_full")
+        try:
+            # Never wait past the request's latency budget
+            timeout = timeout_for(self.timeout)
+        except BudgetExceeded:
+            self._reject(key, "timeout")
+
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        QUEUE_DEPTH.set((self.name,), len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                self._hand_over()  # a slot arrived as we gave up - pass it on
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            QUEUE_DEPTH.set((self.name,), len(self._waiters))
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject(key, "timeout")
+            self._leave(key)
+            raise
+
+        # _hand_over passed its slot (and _active count) to this waiter
+        QUEUE_DEPTH.set((self.name,), len(self._waiters))
+        ADMISSIONS.inc((self.name, "queued"))
+        WAIT_TIME.observe((self.name,), time.perf_counter() - start)
+
+    def _hand_over(self):
+        """Give a finished call's slot to the oldest live waiter, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+        ACTIVE.set((self.name,), self._active)
+
+    def _release(self, key: Optional[str]):
+        self._leave(key)
+        self._hand_over()
+
+_agent_admission: Optional[AdmissionController] = None
+
+def get_agent_admission() -> AdmissionController:
+    global _agent_admission
+    if _agent_admission is None:
+        _agent_admission = AdmissionController(
+            "agent",
+            AGENT_MAX_CONCURRENCY,
+            AGENT_MAX_PER_USER,
+            AGENT_QUEUE_SIZE,
+            AGENT_QUEUE_TIMEOUT_SECONDS,
+        )
+    return _agent_admission
@@ -1,21 +1,62 @@
-from openai import OpenAI
-from typing import List, Dict
+from typing import List, Dict, Optional
+import asyncio
 import json
 import time
-from src.config import OPENROUTER_API_KEY
-from ddgs import DDGS
+from src.config import (
+    AGENT_TOPUP_ROUNDS,
+    GENERATED_REUSE_FRACTION,
+    OPENROUTER_API_KEY,
+    OPENROUTER_BASE_URL,
+    QUESTION_TOPICS,
+    SEARCH_BUDGET_SECONDS,
+    SEARCH_CACHE_SECONDS,
+    SEARCH_RATE_BURST,
+    SEARCH_RATE_PER_MINUTE,
+    SEARCH_TIMEOUT_SECONDS,
+)
 from src.services.supabase_agent_ops import SupabaseAgentOps
-
-# Use OpenRouter (compatible with OpenAI API)
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=OPENROUTER_API_KEY
+from src.services.generated_questions import get_generated_question_store
+from src.services.pace_service import get_pace_service
+from src.services.rating_service import (
+    DIFFICULTY_PRIORS,
+    expected_score,
+    get_rating_engine,
+    rating_to_difficulty,
 )
+from src.repositories import get_repository
+from src.services.llm_router import get_llm_router
+from src.services.question_search import get_question_search
+from src.services.question_validation import question_key, validate_batch
+from src.shared_state import get_shared_state
+from src.utils.http import pool_limits
+from src.utils.resilience import BudgetExceeded, CircuitOpenError, get_breaker, remaining, timeout_for
+
+# openai and ddgs are imported on first use - together they are most of a
+# cold start, and most requests (health, stats, scores) never need them
+_clients = {}
+
+def get_llm_client():
+    """Get the async OpenRouter client (compatible with OpenAI API) for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        # Pooled connections belong to one loop - drop clients of loops that are gone
+        for stale in [l for l in _clients if l.is_closed()]:
+            del _clients[stale]
+        client = _clients[loop] = AsyncOpenAI(
+            base_url=OPENROUTER_BASE_URL,
+            api_key=OPENROUTER_API_KEY,
+            # Keep connections across warm invocations (see src/utils/http.py)
+            http_client=DefaultAsyncHttpxClient(limits=pool_limits())
+        )
+    return client
 
 # Initialize DuckDuckGo search with retry capability
 def get_ddg_instance():
     """Get a fresh DuckDuckGo instance"""
-    return DDGS()
+    from ddgs import DDGS
+    return DDGS(timeout=timeout_for(SEARCH_TIMEOUT_SECONDS))
 
 class SATLearningAgent:
     """
@@ -29,49 +70,138 @@ class SATLearningAgent:
     def __init__(self, user_id: str):
         self.user_id = user_id
         self.context_memory = []
+        # How the last generation was cut down to fit a latency budget
+        self.adjustments: List[str] = []
         print(f"🔗 Agent initialized for user {user_id}")
         
     def analyze_performance(self) -> Dict:
         """Analyzes user's historical performance from Supabase"""
         
         performance = SupabaseAgentOps.get_user_performance(self.user_id)
-        topic_breakdown = SupabaseAgentOps.get_topic_performance(self.user_id)
+        skills = self._load_skills()
         
         analysis = {
             "total_attempts": performance.get('total_attempts', 0),
             "recent_accuracy": performance.get('accuracy', 0),
-            "topic_breakdown": topic_breakdown,
+            "topic_breakdown": {},
             "weak_topics": performance.get('weak_topics', []),
             "strong_topics": performance.get('strong_topics', []),
             "recommended_difficulty": "medium"
         }
         
-        # Determine difficulty
-        if analysis["recent_accuracy"] < 50:
-            analysis["recommended_difficulty"] = "easy"
-        elif analysis["recent_accuracy"] > 75:
-            analysis["recommended_difficulty"] = "hard"
+        if skills:
+            # Skill ratings already summarize every attempt - no history scan needed
+            for topic, data in skills.items():
+                analysis["topic_breakdown"][topic] = {
+                    "rating": data["rating"],
+                    "attempts": data["attempts"],
+                    "avg_time": data["avg_time"],
+                    "accuracy": expected_score(data["rating"], DIFFICULTY_PRIORS["medium"]) * 100,
+                }
+            analysis["weak_topics"], analysis["strong_topics"] = get_rating_engine().topic_labels(self.user_id)
+            
+            total = sum(data["attempts"] for data in skills.values())
+            mean_rating = sum(data["rating"] * data["attempts"] for data in skills.values()) / total
+            analysis["recommended_difficulty"] = rating_to_difficulty(mean_rating)
+        else:
+            # No ratings yet (e.g. history from before ratings existed)
+            analysis["topic_breakdown"] = SupabaseAgentOps.get_topic_performance(self.user_id)
+            
+            # Determine difficulty
+            if analysis["recent_accuracy"] < 50:
+                analysis["recommended_difficulty"] = "easy"
+            elif analysis["recent_accuracy"] > 75:
+                analysis["recommended_difficulty"] = "hard"
+        
+        analysis["pace_percentile"] = self._rank_pace(analysis["topic_breakdown"])
+        
+        # Accurate but much slower than other students: not ready for hard yet
+        pace_percentile = analysis["pace_percentile"]
+        if pace_percentile is not None:
+            if analysis["recommended_difficulty"] == "hard" and pace_percentile < 25:
+                analysis["recommended_difficulty"] = "medium"
+            elif analysis["recommended_difficulty"] == "medium" and pace_percentile > 90 and analysis["recent_accuracy"] > 65:
+                analysis["recommended_difficulty"] = "hard"
         
         return analysis
     
+    def _load_skills(self) -> Dict[str, Dict]:
+        """Gets the user's per-topic skill ratings"""
+        ratings = get_rating_engine()
+        try:
+            ratings.load_user(get_repository(), self.user_id)
+        except Exception as e:
+            print(f"Skill ratings unavailable: {e}")
+        return {topic: data for topic, data in ratings.user_skills(self.user_id).items() if data["attempts"] > 0}
+    
+    def _rank_pace(self, topic_breakdown: Dict) -> Optional[float]:
+        """Ranks the user's average time per topic against all students
+        
+        Sets "faster_than" on each topic and returns the attempt-weighted
+        average, or None when there is nothing to compare against.
+        """
+        try:
+            pace = get_pace_service()
+            pace.load(get_repository())
+        except Exception as e:
+            print(f"Pace sketches unavailable: {e}")
+            return None
+        
+        weighted_sum = 0.0
+        weight = 0
+        for topic, data in topic_breakdown.items():
+            if not data.get('avg_time'):
+                continue
+            faster_than = pace.faster_than(topic, None, data['avg_time'])
+            if faster_than is None:
+                continue
+            data['faster_than'] = faster_than
+            weighted_sum += faster_than * data['attempts']
+            weight += data['attempts']
+        
+        return weighted_sum / weight if weight else None
+    
     def search_sat_resources(self, topic: str, num_results: int = 5, max_retries: int = 3) -> str:
-        """Search DuckDuckGo for real SAT questions and resources with retry logic"""
+        """Search DuckDuckGo for real SAT questions and resources (cached across workers)"""
+        left = remaining()
+        result = get_shared_state().get_or_compute(
+            f"search:{topic.lower()}:{num_results}",
+            SEARCH_CACHE_SECONDS,
+            # Empty results (errors, rate limits) aren't cached
+            lambda: self._search(topic, num_results, max_retries).encode() or None,
+            wait=SEARCH_TIMEOUT_SECONDS if left is None else min(left, SEARCH_TIMEOUT_SECONDS),
+        )
+        return result.decode() if result else ""
+    
+    def _search(self, topic: str, num_results: int, max_retries: int) -> str:
+        """Search DuckDuckGo with retry logic"""
         query = f"SAT {topic} practice questions examples"
         print(f"   🦆 DuckDuckGo searching: '{query}'")
         
+        breaker = get_breaker("duckduckgo")
+        shared = get_shared_state()
         for attempt in range(max_retries):
             try:
-                # Create fresh instance for each attempt
-                ddg = get_ddg_instance()
-                
                 # Add delay between retries (exponential backoff)
                 if attempt > 0:
                     wait_time = (2 ** attempt) * 2  # 4s, 8s, 16s
+                    left = remaining()
+                    if left is not None and left < wait_time + SEARCH_TIMEOUT_SECONDS:
+                        print(f"   ⏱️  No latency budget left to retry, skipping search")
+                        return ""
                     print(f"   ⏳ Waiting {wait_time}s before retry {attempt + 1}...")
                     time.sleep(wait_time)
                 
-                # Use the text search method with the new API
-                results = list(ddg.text(query, max_results=num_results))
+                # One search rate limit for all workers, so adding workers doesn't get us blocked
+                if not shared.allow("duckduckgo", SEARCH_RATE_PER_MINUTE / 60, SEARCH_RATE_BURST):
+                    print(f"   ⚠️  Search rate limit reached, skipping search")
+                    return ""
+                
+                with breaker.guard():
+                    # Create fresh instance for each attempt
+                    ddg = get_ddg_instance()
+                    # Use the text search method with the new API
+                    results = list(ddg.text(query, max_results=num_results))
                 
                 context = f"\n### Real SAT Resources for {topic}:\n"
                 found_count = 0
@@ -91,6 +221,9 @@ class SATLearningAgent:
                     print(f"   ⚠️  No results found for {topic}")
                     return ""
                     
+            except (CircuitOpenError, BudgetExceeded) as e:
+                print(f"   ⚠️  Skipping search: {e}")
+                return ""
             except Exception as e:
                 error_msg = str(e)
                 if "202" in error_msg or "Ratelimit" in error_msg:
@@ -127,7 +260,12 @@ STRONG TOPICS (Can challenge more):
 TOPIC PERFORMANCE:
 """
         for topic, data in analysis['topic_breakdown'].items():
-            context += f"- {topic}: {data['accuracy']:.1f}% accuracy, {data['attempts']} attempts\n"
+            context += f"- {topic}: {data['accuracy']:.1f}% accuracy, {data['attempts']} attempts"
+            if 'rating' in data:
+                context += f", skill rating {data['rating']:.0f} (easy={DIFFICULTY_PRIORS['easy']:.0f}, hard={DIFFICULTY_PRIORS['hard']:.0f})"
+            if 'faster_than' in data:
+                context += f", faster than {data['faster_than']:.0f}% of students"
+            context += "\n"
         
         return context
     
@@ -136,7 +274,117 @@ TOPIC PERFORMANCE:
         Generates personalized SAT questions using AI agent with context
         Can optionally search the web for real SAT question examples
         """
+        num_questions, use_web_search = self.plan_for_budget(num_questions, use_web_search)
+        
+        # Database reads and search back-off sleeps block - build the context in a
+        # worker thread so the event loop keeps serving other routes
+        analysis, context = await asyncio.to_thread(self._question_context, use_web_search)
+        
+        # Part of the batch can come from stored questions that have proven themselves
+        store = get_generated_question_store()
+        reused = await asyncio.to_thread(
+            store.reusable,
+            get_repository(),
+            self.user_id,
+            analysis['weak_topics'] or QUESTION_TOPICS,
+            int(num_questions * GENERATED_REUSE_FRACTION)
+        )
+        if reused:
+            print(f"   ♻️  Reusing {len(reused)} stored questions")
+        taken = {q["id"] for q in reused}
+        wanted = num_questions - len(reused)
+        
+        seen = set()
+        questions = []
+        if wanted > 0:
+            print(f"   🤖 Calling LLM via OpenRouter...")
+            questions, rejected = validate_batch(
+                await self._request_questions(analysis, context, wanted, avoid=[q["question"] for q in reused]),
+                seen
+            )
+            questions = self._keep_new(questions, taken)
+            print(f"   ✅ LLM response received! {len(questions)} valid, rejected: {rejected or 'none'}")
+        
+        # Replace only what was invalid or missing instead of regenerating the batch
+        for _ in range(AGENT_TOPUP_ROUNDS):
+            missing = wanted - len(questions)
+            if missing <= 0:
+                break
+            left = remaining()
+            estimate = get_llm_router().estimate("questions", missing)
+            if left is not None and estimate is not None and estimate > left:
+                break
+            print(f"   🔁 Requesting {missing} replacement questions...")
+            try:
+                more, rejected = validate_batch(
+                    await self._request_questions(analysis, context, missing, avoid=[q["question"] for q in reused + questions]),
+                    seen
+                )
+            except BudgetExceeded:
+                break  # keep the valid questions we have
+            questions.extend(self._keep_new(more, taken)[:missing])
+        
+        questions = questions[:wanted]
+        # Stored under their content ids, which attempts refer back to
+        await asyncio.to_thread(store.save, get_repository(), questions)
+        questions += reused
+        # Searchable by authors and later generations (GET /api/questions/search)
+        get_question_search().add_generated(questions)
+        return questions
+    
+    @staticmethod
+    def _keep_new(questions: List[Dict], taken: set) -> List[Dict]:
+        """Give validated questions their content ids, dropping any already in the batch"""
+        kept = []
+        for question in questions:
+            question["id"] = question_key(question["question"])
+            if question["id"] not in taken:
+                taken.add(question["id"])
+                kept.append(question)
+        return kept
+    
+    async def _request_questions(self, analysis: Dict, context: str, num_questions: int, avoid: Optional[List[str]] = None) -> List[Dict]:
+        # Routed and hedged across the configured models (see llm_router.py)
+        content = await get_llm_router().complete(
+            "questions",
+            [
+                {"role": "system", "content": "You are an expert SAT tutor AI that generates personalized practice questions. Always respond with valid JSON."},
+                {"role": "user", "content": self._question_prompt(analysis, context, num_questions, avoid)}
+            ],
+            temperature=0.7,
+            max_tokens=8000,
+            size=num_questions
+        )
+        return self._parse_questions(content, analysis)
+    
+    def plan_for_budget(self, num_questions: int, use_web_search: bool):
+        """Fit a generation into the request's latency budget (max_latency_ms), if it has one
+        
+        Skips web search, then halves the batch until the expected LLM time fits;
+        raises BudgetExceeded when even one question won't.
+        """
+        left = remaining()
+        if left is None:
+            return num_questions, use_web_search
+        
+        router = get_llm_router()
+        if use_web_search and left < SEARCH_BUDGET_SECONDS + (router.estimate("questions", num_questions) or 0.0):
+            use_web_search = False
+            self.adjustments.append("no-web-search")
         
+        requested = num_questions
+        estimate = router.estimate("questions", num_questions)
+        while estimate is not None and estimate > left and num_questions > 1:
+            num_questions //= 2
+            estimate = router.estimate("questions", num_questions)
+        if estimate is not None and estimate > left:
+            raise BudgetExceeded(f"Generation takes ~{estimate:.1f}s, {left:.1f}s left")
+        if num_questions < requested:
+            self.adjustments.append(f"questions={num_questions}")
+        return num_questions, use_web_search
+    
+    def _question_context(self, use_web_search: bool):
+        """(analysis, context) for a generation"""
         # Analyze performance
         analysis = self.analyze_performance()
         
@@ -150,6 +398,9 @@ TOPIC PERFORMANCE:
                 print(f"   📉 Focusing on weak topics: {', '.join(analysis['weak_topics'][:2])}")
                 for i, topic in enumerate(analysis['weak_topics'][:2]):  # Search top 2 weak topics
                     if i > 0:
+                        left = remaining()
+                        if left is not None and left < 3 + SEARCH_BUDGET_SECONDS:
+                            break
                         time.sleep(3)  # 3s delay between different topic searches
                     web_context += self.search_sat_resources(topic, num_results=3)
             else:
@@ -166,6 +417,9 @@ TOPIC PERFORMANCE:
         else:
             print(f"   ℹ️  No web search performed (use_web_search={use_web_search})")
         
+        return analysis, context
+    
+    def _question_prompt(self, analysis: Dict, context: str, num_questions: int, avoid: Optional[List[str]] = None) -> str:
         # Calculate distribution (focus on weak topics)
         weak_topic_ratio = 0.6  # 60% weak topics
         balanced_ratio = 0.3    # 30% mixed
@@ -212,25 +466,15 @@ IMPORTANT:
 - Vary question types within topics
 - Questions should build on each other
 - Add "reasoning" field explaining why this question helps the student
-
-Generate exactly {num_questions} questions now:"""
-
-        # Call OpenRouter API with Haiku 4.5 (fastest & cheapest!)
-        print(f"   🤖 Calling Claude Haiku 4.5 via OpenRouter...")
-        response = client.chat.completions.create(
-            model="anthropic/claude-haiku-4.5",  # Latest Haiku model!
-            messages=[
-                {"role": "system", "content": "You are an expert SAT tutor AI that generates personalized practice questions. Always respond with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=8000
-        )
-        print(f"   ✅ Claude response received!")
-        
-        # Parse response
-        content = response.choices[0].message.content
+- "options" has exactly 4 distinct choices and "correctAnswer" is the 0-based index of the right one
+- "topic" is one of: {', '.join(QUESTION_TOPICS)}; "difficulty" is easy, medium or hard
+"""
+        if avoid:
+            prompt += "\nDo not repeat any of these questions:\n" + "\n".join(f"- {q}" for q in avoid) + "\n"
         
+        return prompt + f"\nGenerate exactly {num_questions} questions now:"
+    
+    def _parse_questions(self, content: str, analysis: Dict) -> List[Dict]:
         # Extract JSON from response
         try:
             # Try to find JSON array in the response
@@ -265,8 +509,7 @@ Generate exactly {num_questions} questions now:"""
     
     async def get_learning_insights(self) -> Dict:
         """Generates personalized learning insights using AI"""
-        
-        analysis = self.analyze_performance()
+        analysis = await asyncio.to_thread(self.analyze_performance)
         context = self.build_agent_context(analysis)
         
         prompt = f"""{context}
@@ -286,9 +529,9 @@ Respond in JSON:
 }}
 """
         
-        response = client.chat.completions.create(
-            model="anthropic/claude-haiku-4.5",  # Latest Haiku for insights!
-            messages=[
+        content = await get_llm_router().complete(
+            "insights",
+            [
                 {"role": "system", "content": "You are a supportive SAT learning coach."},
                 {"role": "user", "content": prompt}
             ],
@@ -296,8 +539,6 @@ Respond in JSON:
             max_tokens=500
         )
         
-        content = response.choices[0].message.content
-        
         try:
             start_idx = content.find('{')
             end_idx = content.rfind('}') + 1
@@ -0,0 +1,331 @@
+"""
+Attempt archive - question attempts older than ATTEMPT_RETENTION_DAYS move out
+of question_attempts into per-user columnar segment files under
+ATTEMPT_ARCHIVE_PATH. Each run folds them into attempt_rollups (so per-topic
+stats stay complete) in the same transaction that deletes them, after their
+segment is on disk. attempt_history() reads both tiers, so history queries
+and exports don't care where a row lives. Archiving is off unless
+ATTEMPT_ARCHIVE_PATH names durable storage shared by every worker.
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from src.config import (
+    ATTEMPT_ARCHIVE_BATCH,
+    ATTEMPT_ARCHIVE_INTERVAL_HOURS,
+    ATTEMPT_ARCHIVE_PATH,
+    ATTEMPT_ARCHIVE_USERS_PER_RUN,
+    ATTEMPT_RETENTION_DAYS,
+)
+from src.repositories import Repository, get_repository
+from src.shared_state import get_shared_state
+from src.utils.metrics import REGISTRY
+
+ARCHIVED = REGISTRY.counter("attempts_archived_total", "Question attempts moved to the archive")
+ARCHIVE_RUNS = REGISTRY.counter("attempt_archive_runs_total", "Archive runs", ("outcome",))
+
+SEGMENT_MAGIC = b"QAS1"
+SEGMENT_SUFFIX = ".seg"
+# Hot rows fetched per query - at most PostgREST's default max-rows, which would cut larger pages short
+HISTORY_PAGE_SIZE = 1000
+
+def to_ms(timestamp: str) -> int:
+    """Epoch milliseconds of an ISO-8601 timestamp (naive ones are UTC)"""
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+def to_iso(ms: int) -> str:
+    """ISO-8601 UTC with milliseconds - sorts and compares as text in both databases"""
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{ms % 1000:03d}Z"
+
+def _pack(typecode: str, values) -> bytes:
+    data = array(typecode, values)
+    if sys.byteorder == "big":
+        data.byteswap()  # segments are little-endian
+    return data.tobytes()
+
+def _unpack(typecode: str, raw: bytes) -> array:
+    data = array(typecode)
+    data.frombytes(raw)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+def _dictionary(values: List[str]) -> Dict:
+    """Dictionary-encode a low-cardinality text column"""
+    index: Dict[str, int] = {}
+    codes = [index.setdefault(value, len(index)) for value in values]
+    return {"values": list(index), "codes": _pack("I", codes)}
+
+def encode_segment(rows: List[Dict]) -> bytes:
+    """Rows (oldest first) as one compressed columnar segment
+
+    Timestamps are delta-encoded milliseconds, text columns are dictionary
+    encoded and numbers are packed arrays, then the whole segment is
+    zlib-compressed - a few bytes per attempt.
+    """
+    import msgpack
+
+    times = [to_ms(row["created_at"]) for row in rows]
+    columns = {
+        "created_at": _pack("q", [t - p for t, p in zip(times, [0] + times[:-1])]),
+        "session_id": _dictionary([str(row["session_id"]) for row in rows]),
+        "question_id": _pack("q", [row["question_id"] for row in rows]),
+        "topic": _dictionary([row["topic"] for row in rows]),
+        "difficulty": _dictionary([row["difficulty"] for row in rows]),
+        "is_correct": _pack("B", [1 if row["is_correct"] else 0 for row in rows]),
+        "time_spent": _pack("i", [row["time_spent"] for row in rows]),
+    }
+    header = {"count": len(rows), "first_ms": times[0], "last_ms": times[-1]}
+    body = zlib.compress(msgpack.packb(columns), 6)
+    return SEGMENT_MAGIC + msgpack.packb({**header, "body": body})
+
+def segment_header(data: bytes) -> Dict:
+    import msgpack
+
+    if not data.startswith(SEGMENT_MAGIC):
+        raise ValueError("Not an attempt archive segment")
+    return msgpack.unpackb(data[len(SEGMENT_MAGIC):])
+
+def decode_segment(data: bytes) -> List[Dict]:
+    import msgpack
+
+    segment = segment_header(data)
+    columns = msgpack.unpackb(zlib.decompress(segment["body"]))
+    times, current = [], 0
+    for delta in _unpack("q", columns["created_at"]):
+        current += delta
+        times.append(current)
+
+    def decoded(name: str) -> List[str]:
+        values = columns[name]["values"]
+        return [values[code] for code in _unpack("I", columns[name]["codes"])]
+
+    return [
+        {
+            "session_id": session_id,
+            "question_id": question_id,
+            "topic": topic,
+            "difficulty": difficulty,
+            "is_correct": bool(is_correct),
+            "time_spent": time_spent,
+            "created_at": to_iso(ms),
+        }
+        for ms, session_id, question_id, topic, difficulty, is_correct, time_spent in zip(
+            times,
+            decoded("session_id"),
+            _unpack("q", columns["question_id"]),
+            decoded("topic"),
+            decoded("difficulty"),
+            _unpack("B", columns["is_correct"]),
+            _unpack("i", columns["time_spent"]),
+        )
+    ]
+
+class AttemptArchive:
+    """Segment files under root/<first 2 chars of user id>/<user id>/"""
+
+    def __init__(self, root: str = ATTEMPT_ARCHIVE_PATH):
+        self.root = root
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.root)
+
+    def require_configured(self):
+        """Refuse to archive without an explicit path - rows written to a
+        container's local disk would be lost with it"""
+        if not self.configured:
+            raise RuntimeError(
+                "Attempt archiving needs ATTEMPT_ARCHIVE_PATH set to durable storage shared by every worker"
+            )
+
+    def _user_dir(self, user_id: str) -> str:
+        return os.path.join(self.root, user_id[:2], user_id)
+
+    def write(self, user_id: str, rows: List[Dict]) -> str:
+        """Write rows as a segment named by their attempt ids
+
+        The name is a content address, so re-archiving the same rows after a
+        crash (before they were deleted) replaces the segment instead of
+        duplicating it.
+        """
+        self.require_configured()
+        digest = hashlib.sha256("\n".join(str(row["id"]) for row in rows).encode()).hexdigest()[:32]
+        directory = self._user_dir(user_id)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{to_ms(rows[0]['created_at'])}-{digest}{SEGMENT_SUFFIX}")
+        temp = f"{path}.tmp"
+        with open(temp, "wb") as f:
+            f.write(encode_segment(rows))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+        return path
+
+    def segments(self, user_id: str) -> List[str]:
+        if not self.configured:
+            return []
+        directory = self._user_dir(user_id)
+        if not os.path.isdir(directory):
+            return []
+        # Names start with the first attempt's time, so this is chronological
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def read(self, user_id: str, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict]:
+        """Archived attempts with created_at in [since, until), oldest first"""
+        since_ms = to_ms(since) if since else None
+        until_ms = to_ms(until) if until else None
+        since = to_iso(since_ms) if since_ms is not None else None
+        until = to_iso(until_ms) if until_ms is not None else None
+        for path in self.segments(user_id):
+            with open(path, "rb") as f:
+                data = f.read()
+            header = segment_header(data)
+            # Skip segments outside the range without decompressing them
+            if (since_ms is not None and header["last_ms"] < since_ms) or (until_ms is not None and header["first_ms"] >= until_ms):
+                continue
+            for row in decode_segment(data):
+                # to_iso timestamps compare correctly as text
+                if (since is None or row["created_at"] >= since) and (until is None or row["created_at"] < until):
+                    yield row
+
+def attempt_history(
+    repo: Repository,
+    user_id: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    archive: Optional[AttemptArchive] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Dict]:
+    """A user's attempts from both tiers, oldest first (at most limit)
+
+    Archived rows are always older than hot ones, so the archive is read
+    first and the two never need merging. Hot rows are fetched a page at a
+    time, keyed on (created_at, id), and never more than are still wanted.
+    """
+    # Same format as stored timestamps, so the database can compare them as text
+    since = to_iso(to_ms(since)) if since else None
+    until = to_iso(to_ms(until)) if until else None
+    remaining = limit
+    for row in (archive or get_attempt_archive()).read(user_id, since, until):
+        if remaining is not None:
+            if remaining <= 0:
+                return
+            remaining -= 1
+        yield row
+
+    after = None
+    while remaining is None or remaining > 0:
+        size = HISTORY_PAGE_SIZE if remaining is None else min(remaining, HISTORY_PAGE_SIZE)
+        page = repo.attempt_history(user_id, since, until, after=after, limit=size)
+        for row in page:
+            yield {
+                "session_id": row["session_id"],
+                "question_id": row["question_id"],
+                "topic": row["topic"],
+                "difficulty": row["difficulty"],
+                "is_correct": bool(row["is_correct"]),
+                "time_spent": row["time_spent"],
+                "created_at": to_iso(to_ms(row["created_at"])),
+            }
+        if len(page) < size:
+            return
+        if remaining is not None:
+            remaining -= len(page)
+        # The stored value, not the millisecond one yielded, so no row is skipped or repeated
+        after = (page[-1]["created_at"], page[-1]["id"])
+
+def archive_old_attempts(
+    repo: Repository,
+    archive: AttemptArchive,
+    retention_days: float = ATTEMPT_RETENTION_DAYS,
+    max_users: int = ATTEMPT_ARCHIVE_USERS_PER_RUN,
+    batch: int = ATTEMPT_ARCHIVE_BATCH,
+) -> Dict:
+    """One archive pass over up to max_users users; returns counts"""
+    cutoff = to_iso(int((time.time() - retention_days * 86400) * 1000))
+    users = repo.archivable_users(cutoff, max_users)
+    archived = 0
+    for user_id in users:
+        while True:
+            rows = repo.archivable_attempts(user_id, cutoff, batch)
+            if not rows:
+                break
+            # File first: a crash in between leaves the rows hot, and the next
+            # run rewrites the same segment
+            archive.write(user_id, rows)
+            removed = repo.archive_attempts(user_id, [row["id"] for row in rows])
+            archived += removed
+            ARCHIVED.inc((), removed)
+            if len(rows) < batch or not removed:
+                break
+    return {"users": len(users), "attempts": archived, "cutoff": cutoff}
+
+class AttemptArchiver:
+    """Runs archive_old_attempts every ATTEMPT_ARCHIVE_INTERVAL_HOURS in one worker at a time"""
+
+    def __init__(self, archive: AttemptArchive):
+        self.archive = archive
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_started(self):
+        if ATTEMPT_ARCHIVE_INTERVAL_HOURS <= 0 or (self._task and not self._task.done()):
+            return
+        # Fail startup rather than archive to a default directory
+        self.archive.require_configured()
+        self._task = asyncio.create_task(self._loop(), name="attempt-archiver")
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                ARCHIVE_RUNS.inc(("failed",))
+                print(f"Attempt archive run failed: {e}")
+            await asyncio.sleep(ATTEMPT_ARCHIVE_INTERVAL_HOURS * 3600)
+
+    def run_once(self) -> Optional[Dict]:
+        """Archive pass, unless another worker is running one (then None)"""
+        self.archive.require_configured()
+        # The lock expires on its own if the worker holding it dies mid-run
+        with get_shared_state().lock("attempt-archive", ttl=3600) as acquired:
+            if not acquired:
+                ARCHIVE_RUNS.inc(("skipped",))
+                return None
+            result = archive_old_attempts(get_repository(), self.archive)
+        ARCHIVE_RUNS.inc(("succeeded",))
+        if result["attempts"]:
+            print(f"Archived {result['attempts']} attempts of {result['users']} users (before {result['cutoff']})")
+        return result
+
+_attempt_archive: Optional[AttemptArchive] = None
+_attempt_archiver: Optional[AttemptArchiver] = None
+
+def get_attempt_archive() -> AttemptArchive:
+    global _attempt_archive
+    if _attempt_archive is None:
+        _attempt_archive = AttemptArchive()
+    return _attempt_archive
+
+def get_attempt_archiver() -> AttemptArchiver:
+    global _attempt_archiver
+    if _attempt_archiver is None:
+        _attempt_archiver = AttemptArchiver(get_attempt_archive())
+    return _attempt_archiver
+
+if __name__ == "__main__":
+    # One pass, e.g. from cron:  python -m src.services.attempt_archive
+    print(get_attempt_archiver().run_once())
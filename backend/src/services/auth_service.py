@@ -1,17 +1,17 @@
 """
 Authentication service - handles Supabase authentication
+(or the local stand-in when DATABASE_BACKEND=sqlite)
 """
 
-from supabase import Client
-from src.utils.database import Database
+from src.repositories import Repository
 from src.models.schemas import UserSignup, UserLogin
 from typing import Optional, Dict
 
 class AuthService:
-    def __init__(self, db: Client):
+    def __init__(self, db: Repository):
         self.db = db
     
-    def _get_auth_client(self) -> Client:
+    def _get_auth_client(self) -> Repository:
         """Get a Supabase client configured for authentication"""
         # Use the same client but ensure it's configured for auth operations
         return self.db
@@ -0,0 +1,232 @@
+"""
+Dependency prober - measures database, LLM and web search reachability in
+the background every HEALTH_PROBE_INTERVAL_SECONDS, so health endpoints
+answer from the latest results instead of querying dependencies per request.
+Optional dependencies (not required for readiness) are third-party APIs,
+so they are only re-probed every HEALTH_OPTIONAL_PROBE_INTERVAL_SECONDS and
+take a token from the same shared rate limit as generation does.
+Where the app lifespan doesn't run (serverless), the first health request
+after the results go stale probes inline, at most once per interval.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from src.config import (
+    HEALTH_OPTIONAL_PROBE_INTERVAL_SECONDS,
+    HEALTH_PROBE_INTERVAL_SECONDS,
+    HEALTH_PROBE_TIMEOUT_SECONDS,
+    HEALTH_REQUIRED_DEPENDENCIES,
+    HEALTH_SEARCH_URL,
+    HEALTH_STALE_SECONDS,
+    LLM_RATE_BURST,
+    LLM_RATE_PER_SECOND,
+    OPENROUTER_API_KEY,
+    SEARCH_RATE_BURST,
+    SEARCH_RATE_PER_MINUTE,
+)
+from src.repositories import get_repository
+from src.shared_state import get_shared_state
+from src.utils.metrics import REGISTRY
+
+PROBE_SECONDS = REGISTRY.histogram("dependency_probe_seconds", "Dependency probe latency", ("dependency",))
+LATENCY = REGISTRY.gauge("dependency_latency_seconds", "Latency of the last dependency probe", ("dependency",))
+UP = REGISTRY.gauge("dependency_up", "1 if the last probe of the dependency succeeded (summed across workers)", ("dependency",))
+FAILURES = REGISTRY.counter("dependency_probe_failures_total", "Failed dependency probes", ("dependency",))
+
+# Shared rate limit bucket (rate per second, burst) each probe draws from, as the agent's calls do
+RATE_LIMITS: Dict[str, Tuple[str, float, int]] = {
+    "search": ("duckduckgo", SEARCH_RATE_PER_MINUTE / 60, SEARCH_RATE_BURST),
+    "llm": ("openrouter", LLM_RATE_PER_SECOND, LLM_RATE_BURST),
+}
+
+class DependencyProber:
+    def __init__(
+        self,
+        interval: float = HEALTH_PROBE_INTERVAL_SECONDS,
+        timeout: float = HEALTH_PROBE_TIMEOUT_SECONDS,
+        stale_after: float = HEALTH_STALE_SECONDS,
+        optional_interval: float = HEALTH_OPTIONAL_PROBE_INTERVAL_SECONDS,
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.optional_interval = optional_interval
+        self.results: Dict[str, Dict] = {}
+        # monotonic time of the last completed round
+        self.last_round: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing = threading.Lock()
+        # Blocking probes still running in a worker thread (after timing out)
+        self._busy = set()
+        self._http = None
+
+    def probes(self) -> Dict[str, Callable]:
+        probes = {"database": self._probe_database, "search": self._probe_search}
+        if OPENROUTER_API_KEY:
+            probes["llm"] = self._probe_llm
+        return probes
+
+    def ensure_started(self):
+        if self.interval <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._loop(), name="dependency-prober")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"Dependency probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _due(self, name: str) -> bool:
+        """Required dependencies are probed every round, optional ones every optional_interval"""
+        if name in HEALTH_REQUIRED_DEPENDENCIES:
+            return True
+        result = self.results.get(name)
+        return result is None or time.monotonic() - result["_monotonic"] >= self.optional_interval
+
+    async def _rate_limited(self, name: str) -> bool:
+        limit = RATE_LIMITS.get(name)
+        if limit is None:
+            return False
+        try:
+            return not await asyncio.to_thread(get_shared_state().allow, *limit)
+        except Exception as e:
+            print(f"Probe rate limit unavailable for {name}: {e}")
+            return True
+
+    async def probe_all(self) -> Dict[str, Dict]:
+        """Probe every dependency that is due concurrently and record the results"""
+        probes = self.probes()
+        await asyncio.gather(*(self._probe(name, probe) for name, probe in probes.items() if self._due(name)))
+        # Dependencies that are no longer probed drop out
+        for name in set(self.results) - set(probes):
+            self.results.pop(name, None)
+        self.last_round = time.monotonic()
+        return self.results
+
+    async def _probe(self, name: str, probe: Callable):
+        # Out of tokens: keep the previous result rather than compete with real traffic
+        if await self._rate_limited(name):
+            return
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(probe(), self.timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout:g}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        elapsed = time.perf_counter() - start
+
+        PROBE_SECONDS.observe((name,), elapsed)
+        LATENCY.set((name,), elapsed)
+        UP.set((name,), 0 if error else 1)
+        if error:
+            FAILURES.inc((name,))
+        self.results[name] = {
+            "status": "down" if error else "up",
+            "latency_ms": round(elapsed * 1000, 1),
+            "error": error,
+            "checked_at": time.time(),
+            "_monotonic": time.monotonic(),
+        }
+
+    async def _blocking(self, name: str, call: Callable):
+        """Run a blocking probe in a thread, never more than one per dependency
+        (a hung call keeps its thread after the timeout - don't pile up more)"""
+        if name in self._busy:
+            raise RuntimeError("previous probe still running")
+        self._busy.add(name)
+
+        def run():
+            try:
+                call()
+            finally:
+                self._busy.discard(name)
+
+        await asyncio.to_thread(run)
+
+    async def _probe_database(self):
+        await self._blocking("database", get_repository().ping)
+
+    async def _probe_llm(self):
+        from src.services.agent import get_llm_client  # deferred: pulls in openai
+
+        try:
+            # Cheapest authenticated endpoint (also keeps the pooled connection warm)
+            await get_llm_client().get("/key", cast_to=object, options={"max_retries": 0, "timeout": self.timeout})
+        except Exception as e:
+            # Any non-5xx HTTP response means the service is reachable
+            status = getattr(e, "status_code", None)
+            if status is None or status >= 500:
+                raise
+
+    async def _probe_search(self):
+        if self._http is None:
+            from src.utils.http import pooled_async_client  # deferred: pulls in httpx
+
+            self._http = pooled_async_client(timeout=self.timeout)
+        response = await self._http.head(HEALTH_SEARCH_URL)
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    def _stale(self) -> bool:
+        return self.last_round is None or time.monotonic() - self.last_round >= self.interval
+
+    async def current(self) -> Dict[str, Dict]:
+        """Latest results, probing inline first if nothing runs in the background and they are stale"""
+        if not self.running and self._stale() and self._refreshing.acquire(blocking=False):
+            try:
+                await self.probe_all()
+            finally:
+                self._refreshing.release()
+        now = time.monotonic()
+        return {
+            name: {
+                **{k: v for k, v in result.items() if not k.startswith("_")},
+                "age_seconds": round(now - result["_monotonic"], 1),
+            }
+            for name, result in self.results.items()
+        }
+
+    def liveness(self) -> Dict:
+        """Whether this worker is making progress (dependencies don't matter here)"""
+        age = time.monotonic() - self.last_round if self.last_round is not None else None
+        # Only a background prober that stopped completing rounds means a wedged worker
+        stalled = self.running and age is not None and age > self.stale_after
+        return {
+            "alive": not stalled,
+            "prober": "background" if self.running else "on-demand",
+            "last_round_age_seconds": round(age, 1) if age is not None else None,
+        }
+
+    async def readiness(self) -> Dict:
+        """Ready when every required dependency was up in a probe within HEALTH_STALE_SECONDS"""
+        dependencies = await self.current()
+        problems = []
+        for name in HEALTH_REQUIRED_DEPENDENCIES:
+            result = dependencies.get(name)
+            if result is None:
+                problems.append(f"{name}: not probed")
+            elif result["status"] != "up":
+                problems.append(f"{name}: {result['error']}")
+            elif result["age_seconds"] > self.stale_after:
+                problems.append(f"{name}: last probe {result['age_seconds']:.0f}s ago")
+        return {"ready": not problems, "problems": problems, "dependencies": dependencies}
+
+_dependency_prober: Optional[DependencyProber] = None
+
+def get_dependency_prober() -> DependencyProber:
+    global _dependency_prober
+    if _dependency_prober is None:
+        _dependency_prober = DependencyProber()
+    return _dependency_prober
@@ -2,20 +2,25 @@
 Game score service - handles saving game sessions and analytics
 """
 
-from supabase import Client
-from src.models.schemas import GameAnalytics, SaveScoreRequest
-from typing import Dict
+from src.models.schemas import AttemptColumns, ColumnarGameAnalytics, GameAnalytics, SaveScoreRequest
+from src.services.generated_questions import get_generated_question_store
+from src.services.pace_service import get_pace_service
+from src.services.rating_service import get_rating_engine
+from src.services.review_scheduler import get_review_scheduler
+from src.services.score_feed import get_score_feed, score_event
+from src.repositories.base import Repository
+from typing import Dict, List, Union
 from datetime import datetime
 
 class GameService:
-    def __init__(self, db: Client):
-        self.db = db
+    def __init__(self, repo: Repository):
+        self.repo = repo
     
     async def save_game_session(
         self, 
         user_id: str, 
         game_id: str, 
-        analytics: GameAnalytics
+        analytics: Union[GameAnalytics, ColumnarGameAnalytics]
     ) -> Dict:
         """Save a game session and update user statistics"""
         try:
@@ -31,19 +36,21 @@ class GameService:
                 "average_response_time": analytics.averageResponseTime,
             }
             
-            session_result = self.db.table("game_sessions").insert(session_data).execute()
+            session = self.repo.create_session(session_data)
             
-            if not session_result.data:
+            if not session:
                 return {"success": False, "error": "Failed to create game session"}
             
-            session = session_result.data[0]
             session_id = session["id"]
             
             # Insert question attempts
-            if analytics.questionAttempts:
+            if isinstance(analytics, ColumnarGameAnalytics):
+                self.record_attempt_columns(session_id, user_id, analytics.attempts)
+            elif analytics.questionAttempts:
                 attempts_data = [
                     {
                         "session_id": session_id,
+                        "user_id": user_id,
                         "question_id": attempt.questionId,
                         "topic": attempt.topic,
                         "difficulty": attempt.difficulty,
@@ -53,10 +60,29 @@ class GameService:
                     for attempt in analytics.questionAttempts
                 ]
                 
-                self.db.table("question_attempts").insert(attempts_data).execute()
+                self.repo.insert_attempts(attempts_data)
+                self._apply_attempts(user_id, analytics.questionAttempts)
             
             # Update user stats
-            await self._update_user_stats(user_id, analytics)
+            await self.update_user_stats(
+                user_id,
+                score=analytics.score,
+                correct=analytics.correctAnswers,
+                wrong=analytics.wrongAnswers,
+                accuracy=analytics.accuracy
+            )
+            
+            get_score_feed().publish(score_event(
+                session_id,
+                user_id,
+                game_id,
+                score=analytics.score,
+                accuracy=analytics.accuracy,
+                correct=analytics.correctAnswers,
+                wrong=analytics.wrongAnswers,
+                max_streak=session_data["max_streak"],
+                final=True
+            ))
             
             return {
                 "success": True,
@@ -69,61 +95,100 @@ class GameService:
                 "error": str(e)
             }
     
-    async def _update_user_stats(self, user_id: str, analytics: GameAnalytics):
-        """Update or create user statistics"""
+    def record_attempt_columns(self, session_id: str, user_id: str, columns: AttemptColumns):
+        """Store a batch of attempts as they arrived (no per-row dicts) and apply them"""
+        if not len(columns):
+            return
+        self.repo.insert_attempt_columns(session_id, user_id, {
+            "question_id": columns.questionId,
+            "topic": columns.topic,
+            "difficulty": columns.difficulty,
+            "is_correct": columns.isCorrect,
+            "time_spent": columns.timeSpent,
+        })
+        self._apply_attempts(user_id, columns.rows())
+    
+    def _apply_attempts(self, user_id: str, attempts: List):
+        """Feed attempts into pace sketches, generated question stats, skill ratings and review schedules"""
+        self._record_pace(attempts)
+        self._record_question_stats(attempts)
+        # Ratings and reviews are per question, so only for questions the server can identify
+        try:
+            known = get_generated_question_store().known(self.repo, (a.questionId for a in attempts))
+        except Exception as e:
+            print(f"Error looking up attempted questions: {e}")
+            return
+        attempts = [a for a in attempts if a.questionId in known]
+        get_rating_engine().record_attempts(self.repo, user_id, attempts)
+        get_review_scheduler().record_attempts(self.repo, user_id, attempts)
+    
+    def _record_pace(self, attempts: List):
+        """Feed response times into the pace sketches (never fails the save)"""
+        try:
+            pace = get_pace_service()
+            pace.load(self.repo)
+            pace.record_attempts(attempts)
+            pace.maybe_flush(self.repo)
+        except Exception as e:
+            print(f"Error recording pace: {e}")
+    
+    def _record_question_stats(self, attempts: List):
+        """Feed attempts on generated questions into their stored stats (never fails the save)"""
+        try:
+            store = get_generated_question_store()
+            store.record_attempts(attempts)
+            store.maybe_flush(self.repo)
+        except Exception as e:
+            print(f"Error recording question stats: {e}")
+    
+    async def update_user_stats(self, user_id: str, score: int, correct: int, wrong: int, accuracy: float):
+        """Update or create user statistics with one finished game"""
         # Get existing stats
-        stats_result = self.db.table("user_stats").select("*").eq("user_id", user_id).execute()
-        
-        # Calculate weak/strong topics
-        weak_topics = []
-        strong_topics = []
+        existing = self.repo.get_user_stats(user_id)
         
-        for topic, perf in analytics.topicPerformance.items():
-            if perf.total > 0:
-                if perf.accuracy < 0.5:
-                    weak_topics.append(topic)
-                elif perf.accuracy >= 0.8:
-                    strong_topics.append(topic)
+        # Weak/strong topics come from the skill ratings, which account for
+        # every past attempt and the difficulty of each question. This worker may
+        # not have the user's ratings yet (a game without attempts, a live session)
+        ratings = get_rating_engine()
+        ratings.load_user(self.repo, user_id)
+        if ratings.user_skills(user_id) or not existing:
+            weak_topics, strong_topics = ratings.topic_labels(user_id)
+        else:
+            # Ratings couldn't be read - keep the stored labels rather than clear them
+            weak_topics, strong_topics = existing.get("weak_topics") or [], existing.get("strong_topics") or []
         
-        total_questions = analytics.correctAnswers + analytics.wrongAnswers
+        total_questions = correct + wrong
         
-        if stats_result.data:
+        if existing:
             # Update existing stats
-            existing = stats_result.data[0]
-            
             new_total_games = existing["total_games_played"] + 1
-            new_total_score = existing["total_score"] + analytics.score
+            new_total_score = existing["total_score"] + score
             new_total_questions = existing["total_questions_answered"] + total_questions
-            new_total_correct = existing["total_correct"] + analytics.correctAnswers
-            new_total_wrong = existing["total_wrong"] + analytics.wrongAnswers
+            new_total_correct = existing["total_correct"] + correct
+            new_total_wrong = existing["total_wrong"] + wrong
             new_accuracy = new_total_correct / new_total_questions if new_total_questions > 0 else 0
             
-            # Merge topics
-            merged_weak = list(set(existing.get("weak_topics", []) + weak_topics))
-            merged_strong = list(set(existing.get("strong_topics", []) + strong_topics))
-            
-            self.db.table("user_stats").update({
+            self.repo.update_user_stats(user_id, {
                 "total_games_played": new_total_games,
                 "total_score": new_total_score,
                 "total_questions_answered": new_total_questions,
                 "total_correct": new_total_correct,
                 "total_wrong": new_total_wrong,
                 "overall_accuracy": new_accuracy,
-                "weak_topics": merged_weak,
-                "strong_topics": merged_strong,
+                "weak_topics": weak_topics,
+                "strong_topics": strong_topics,
                 "updated_at": datetime.utcnow().isoformat(),
-            }).eq("user_id", user_id).execute()
+            })
         else:
             # Create new stats
-            self.db.table("user_stats").insert({
+            self.repo.create_user_stats({
                 "user_id": user_id,
                 "total_games_played": 1,
-                "total_score": analytics.score,
+                "total_score": score,
                 "total_questions_answered": total_questions,
-                "total_correct": analytics.correctAnswers,
-                "total_wrong": analytics.wrongAnswers,
-                "overall_accuracy": analytics.accuracy,
+                "total_correct": correct,
+                "total_wrong": wrong,
+                "overall_accuracy": accuracy,
                 "weak_topics": weak_topics,
                 "strong_topics": strong_topics,
-            }).execute()
-
+            })
@@ -0,0 +1,227 @@
+"""
+Generated question store - every validated question the agent generates is
+kept in generated_questions under question_key(text), so attempts join back
+to content and good questions can be served again instead of regenerated.
+Attempt counts, accuracy and a response time digest per question are
+buffered in each worker and added to the store periodically, like the pace
+sketches.
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.config import (
+    GENERATED_CALIBRATION_MIN_ATTEMPTS,
+    GENERATED_REUSE_MAX_ACCURACY,
+    GENERATED_REUSE_MIN_ACCURACY,
+    GENERATED_REUSE_MIN_ATTEMPTS,
+    GENERATED_STATS_FLUSH_SECONDS,
+)
+from src.repositories.base import Repository
+from src.services.question_bank import QuestionBank
+from src.services.rating_service import get_rating_engine, rating_to_difficulty
+from src.utils.metrics import REGISTRY
+from src.utils.tdigest import TDigest
+
+STORED = REGISTRY.counter("generated_questions_stored_total", "Generated questions written to the question store")
+REUSED = REGISTRY.counter("generated_questions_reused_total", "Stored questions served instead of generating new ones")
+
+# Per-question digests see few samples, so a coarse one is plenty for a median
+DIGEST_COMPRESSION = 25.0
+# Reuse candidates fetched per question wanted, before filtering by accuracy and what the user has seen
+CANDIDATES_PER_QUESTION = 4
+
+class _PendingStats:
+    """Attempts on one question not yet added to the store"""
+
+    __slots__ = ("attempts", "correct", "time_spent", "times")
+
+    def __init__(self):
+        self.attempts = 0
+        self.correct = 0
+        self.time_spent = 0
+        self.times = TDigest(DIGEST_COMPRESSION)
+
+    def merge(self, other: "_PendingStats"):
+        self.attempts += other.attempts
+        self.correct += other.correct
+        self.time_spent += other.time_spent
+        self.times.merge(other.times)
+
+def to_row(question: Dict) -> Dict:
+    """generated_questions row for a normalized question (id already set)"""
+    return {
+        "id": question["id"],
+        "question": question["question"],
+        "options": question["options"],
+        "correct_answer": question["correctAnswer"],
+        "topic": question["topic"],
+        "difficulty": question["difficulty"],
+        "explanation": question.get("explanation", ""),
+    }
+
+def accuracy(row: Dict) -> Optional[float]:
+    return row["correct"] / row["attempts"] if row.get("attempts") else None
+
+class GeneratedQuestionStore:
+    """Question persistence and per-question stats shared by every request in this worker"""
+
+    def __init__(self, flush_interval: float = GENERATED_STATS_FLUSH_SECONDS):
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, _PendingStats] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def save(self, repo: Repository, questions: List[Dict]) -> bool:
+        """Store questions that aren't stored yet (never fails the generation)"""
+        if not questions:
+            return False
+        try:
+            repo.save_generated_questions([to_row(q) for q in questions])
+            STORED.inc((), len(questions))
+            return True
+        except Exception as e:
+            print(f"Error storing generated questions: {e}")
+            return False
+
+    def record_attempts(self, attempts: Iterable) -> int:
+        """Buffer the attempts on generated (non-bank) questions"""
+        attempts = list(attempts)
+        bank = {q["id"] for q in QuestionBank.get_by_ids([a.questionId for a in attempts])}
+        count = 0
+        with self._lock:
+            for attempt in attempts:
+                if attempt.questionId in bank:
+                    continue
+                stats = self._pending.get(attempt.questionId)
+                if stats is None:
+                    stats = self._pending[attempt.questionId] = _PendingStats()
+                stats.attempts += 1
+                stats.correct += 1 if attempt.isCorrect else 0
+                if attempt.timeSpent > 0:
+                    stats.time_spent += attempt.timeSpent
+                    stats.times.add(attempt.timeSpent)
+                count += 1
+        return count
+
+    def maybe_flush(self, repo: Repository, force: bool = False) -> bool:
+        """Add buffered stats to the store if the interval elapsed"""
+        if not force and time.monotonic() - self._last_flush < self.flush_interval:
+            return False
+        self._last_flush = time.monotonic()
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return False
+
+        try:
+            # Only this worker's deltas - the database merges them into the stored stats,
+            # and ids that aren't stored questions (e.g. from before the store existed) match no row
+            repo.record_question_stats([
+                {
+                    "id": question_id,
+                    "attempts": stats.attempts,
+                    "correct": stats.correct,
+                    "time_spent": stats.time_spent,
+                    "time_digest": stats.times.to_dict() if len(stats.times) else None,
+                }
+                for question_id, stats in pending.items()
+            ])
+            return True
+        except Exception as e:
+            # Put the stats back so they are retried on the next flush
+            print(f"Error flushing generated question stats: {e}")
+            with self._lock:
+                for question_id, stats in pending.items():
+                    current = self._pending.get(question_id)
+                    if current is None:
+                        self._pending[question_id] = stats
+                    else:
+                        current.merge(stats)
+            return False
+
+    def calibrated_difficulty(self, row: Dict) -> str:
+        """The difficulty the question's rating has settled on, or the generated one until it has enough answers"""
+        if row.get("attempts", 0) < GENERATED_CALIBRATION_MIN_ATTEMPTS:
+            return row["difficulty"]
+        return rating_to_difficulty(get_rating_engine().question_rating(row["id"], row["difficulty"]))
+
+    def to_question(self, row: Dict) -> Dict:
+        """Agent-format question for a stored row, at its calibrated difficulty"""
+        return {
+            "id": row["id"],
+            "question": row["question"],
+            "options": row["options"],
+            "correctAnswer": row["correct_answer"],
+            "topic": row["topic"],
+            "difficulty": self.calibrated_difficulty(row),
+            "explanation": row["explanation"],
+        }
+
+    def reusable(self, repo: Repository, user_id: str, topics: List[str], limit: int) -> List[Dict]:
+        """Up to limit stored questions on the topics that discriminate well and the user hasn't answered"""
+        if limit <= 0 or not topics:
+            return []
+        try:
+            candidates = [
+                row for row in repo.reusable_questions(topics, GENERATED_REUSE_MIN_ATTEMPTS, limit * CANDIDATES_PER_QUESTION)
+                if GENERATED_REUSE_MIN_ACCURACY <= accuracy(row) <= GENERATED_REUSE_MAX_ACCURACY
+            ]
+            if not candidates:
+                return []
+            # Every answered question has a review item
+            seen = {item["question_id"] for item in repo.review_states(user_id, [row["id"] for row in candidates])}
+            candidates = [row for row in candidates if row["id"] not in seen]
+            chosen = random.sample(candidates, min(limit, len(candidates)))
+            get_rating_engine().load_questions(repo, (row["id"] for row in chosen))
+        except Exception as e:
+            print(f"Error loading reusable questions: {e}")
+            return []
+        REUSED.inc((), len(chosen))
+        return [self.to_question(row) for row in chosen]
+
+    def known(self, repo: Repository, question_ids: Iterable[int]) -> Set[int]:
+        """The ids that are bank or stored questions (anything else is a game's own numbering)"""
+        ids = set(question_ids)
+        bank = {q["id"] for q in QuestionBank.get_by_ids(list(ids))}
+        rest = ids - bank
+        return bank | ({row["id"] for row in repo.generated_questions(rest)} if rest else set())
+
+    def questions(self, repo: Repository, question_ids: List[int]) -> List[Dict]:
+        """Stored questions by id, keeping the given order and skipping unknown ids"""
+        rows = {row["id"]: row for row in repo.generated_questions(question_ids)}
+        get_rating_engine().load_questions(repo, rows)
+        return [self.to_question(rows[qid]) for qid in question_ids if qid in rows]
+
+    def get(self, repo: Repository, question_id: int) -> Optional[Dict]:
+        """A stored question with its stats (including this worker's unflushed attempts)"""
+        rows = repo.generated_questions([question_id])
+        if not rows:
+            return None
+        row = dict(rows[0])
+        with self._lock:
+            pending = self._pending.get(question_id)
+            if pending is not None:
+                row["attempts"] += pending.attempts
+                row["correct"] += pending.correct
+        get_rating_engine().load_questions(repo, [question_id])
+        return {
+            **self.to_question(row),
+            "generatedDifficulty": row["difficulty"],
+            "attempts": row["attempts"],
+            "accuracy": accuracy(row),
+            "medianTimeMs": row.get("median_time_ms"),
+            "createdAt": row.get("created_at"),
+        }
+
+_generated_question_store: Optional[GeneratedQuestionStore] = None
+
+def get_generated_question_store() -> GeneratedQuestionStore:
+    """Get the per-worker generated question store"""
+    global _generated_question_store
+    if _generated_question_store is None:
+        _generated_question_store = GeneratedQuestionStore()
+    return _generated_question_store
@@ -0,0 +1,320 @@
+"""
+Background question generation jobs
+A job is stored in a local SQLite file and its id returned right away; worker
+tasks generate the questions in chunks of GENERATION_CHUNK_SIZE and save each
+chunk, so polls see partial results. A failed chunk is retried with back-off
+up to GENERATION_MAX_ATTEMPTS, identical submissions share one job, and jobs
+left running by a process that died are picked up again. Processes are told
+apart by a boot id generated at startup (PIDs are reused, e.g. after a
+container restart) and prove they are alive with a heartbeat row. Each chunk
+waits for a slot from the agent admission controller, like a use_agent
+request, so jobs can't take more than their share of generation capacity.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from src.config import (
+    GENERATION_CHUNK_SIZE,
+    GENERATION_DEDUP_SECONDS,
+    GENERATION_JOB_TTL_HOURS,
+    GENERATION_JOBS_PATH,
+    GENERATION_MAX_ATTEMPTS,
+    GENERATION_POLL_SECONDS,
+    GENERATION_WORKERS,
+)
+from src.services.admission import AdmissionRejected, get_agent_admission
+from src.utils.metrics import REGISTRY
+
+JOBS = REGISTRY.counter("generation_jobs_total", "Generation job events", ("outcome",))
+JOB_DURATION = REGISTRY.histogram("generation_job_seconds", "Time from submission to a finished job", ("status",))
+
+# Identifies this process in owner_boot and generation_workers
+BOOT_ID = uuid.uuid4().hex
+# A process whose heartbeat is older than this many poll intervals is presumed dead
+HEARTBEAT_STALE_POLLS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generation_jobs (
+  id TEXT PRIMARY KEY,
+  dedup_key TEXT NOT NULL,
+  user_id TEXT NOT NULL,
+  num_questions INTEGER NOT NULL,
+  use_web_search INTEGER NOT NULL,
+  status TEXT NOT NULL,
+  questions TEXT NOT NULL DEFAULT '[]',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  owner_pid INTEGER,
+  owner_boot TEXT,
+  available_at REAL NOT NULL,
+  created_at REAL NOT NULL,
+  updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_dedup ON generation_jobs(dedup_key, created_at);
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_status ON generation_jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS generation_workers (
+  boot_id TEXT PRIMARY KEY,
+  pid INTEGER NOT NULL,
+  seen_at REAL NOT NULL
+);
+"""
+
+def _decode(row: sqlite3.Row) -> Dict:
+    job = dict(row)
+    job["questions"] = json.loads(job["questions"])
+    job["use_web_search"] = bool(job["use_web_search"])
+    return job
+
+class JobStore:
+    """Jobs in a SQLite file shared by every worker process on the box"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(generation_jobs)")}
+        if "owner_boot" not in columns:
+            # Job files from before boot ids
+            self._conn.execute("ALTER TABLE generation_jobs ADD COLUMN owner_boot TEXT")
+
+    def submit(self, dedup_key: str, user_id: str, num_questions: int, use_web_search: bool) -> Tuple[Dict, bool]:
+        """(job, created) - a pending or recently finished job with the same key is reused"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM generation_jobs WHERE dedup_key = ? "
+                    "AND (status IN ('queued', 'running') OR (status = 'succeeded' AND updated_at > ?)) "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (dedup_key, now - GENERATION_DEDUP_SECONDS),
+                ).fetchone()
+                created = row is None
+                if created:
+                    row = self._conn.execute(
+                        "INSERT INTO generation_jobs (id, dedup_key, user_id, num_questions, use_web_search, "
+                        "status, available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?) RETURNING *",
+                        (str(uuid.uuid4()), dedup_key, user_id, num_questions, int(use_web_search), now, now, now),
+                    ).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return _decode(row), created
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM generation_jobs WHERE id = ?", (job_id,)).fetchone()
+        return _decode(row) if row else None
+
+    def claim(self) -> Optional[Dict]:
+        """Mark the oldest runnable job as running in this process (atomic across processes)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE generation_jobs SET status = 'running', owner_pid = ?, owner_boot = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM generation_jobs WHERE status = 'queued' AND available_at <= ? "
+                "ORDER BY created_at LIMIT 1) RETURNING *",
+                (os.getpid(), BOOT_ID, now, now),
+            ).fetchone()
+        return _decode(row) if row else None
+
+    def _update(self, job_id: str, fields: Dict):
+        fields = {**fields, "updated_at": time.time()}
+        assignments = ", ".join(f"{c} = ?" for c in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE generation_jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+
+    def save_progress(self, job_id: str, questions: List[Dict]):
+        self._update(job_id, {"questions": json.dumps(questions)})
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None, attempts: Optional[int] = None):
+        fields = {"status": status, "error": error, "owner_pid": None, "owner_boot": None}
+        if attempts is not None:
+            fields["attempts"] = attempts
+        self._update(job_id, fields)
+
+    def retry(self, job_id: str, error: str, attempts: int, delay: float):
+        self._update(job_id, {
+            "status": "queued",
+            "error": error,
+            "attempts": attempts,
+            "owner_pid": None,
+            "owner_boot": None,
+            "available_at": time.time() + delay,
+        })
+
+    def heartbeat(self):
+        """Record that this process (BOOT_ID) is alive"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO generation_workers (boot_id, pid, seen_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (boot_id) DO UPDATE SET seen_at = excluded.seen_at",
+                (BOOT_ID, os.getpid(), time.time()),
+            )
+
+    def requeue_orphans(self, stale_after: float) -> int:
+        """Jobs marked running by a process other than this one whose heartbeat
+        stopped go back to the queue (a restarted process has a new boot id,
+        even if it got the same PID)"""
+        now = time.time()
+        with self._lock:
+            requeued = self._conn.execute(
+                "UPDATE generation_jobs SET status = 'queued', owner_pid = NULL, owner_boot = NULL, updated_at = ? "
+                "WHERE status = 'running' AND (owner_boot IS NULL OR (owner_boot != ? AND owner_boot NOT IN "
+                "(SELECT boot_id FROM generation_workers WHERE seen_at > ?)))",
+                (now, BOOT_ID, now - stale_after),
+            ).rowcount
+            self._conn.execute("DELETE FROM generation_workers WHERE seen_at <= ?", (now - stale_after,))
+        return requeued
+
+    def purge(self, older_than: float):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM generation_jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+                (older_than,),
+            )
+
+class GenerationJobService:
+    """Job submission plus this process's pool of worker tasks"""
+
+    def __init__(self, store: JobStore, workers: int = GENERATION_WORKERS, chunk_size: int = GENERATION_CHUNK_SIZE):
+        self.store = store
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def dedup_key(user_id: str, num_questions: int, use_web_search: bool, idempotency_key: Optional[str] = None) -> str:
+        raw = f"{user_id}|key:{idempotency_key}" if idempotency_key else f"{user_id}|{num_questions}|{use_web_search}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def submit(
+        self,
+        user_id: str,
+        num_questions: int,
+        use_web_search: bool,
+        idempotency_key: Optional[str] = None,
+    ) -> Dict:
+        self.ensure_started()
+        key = self.dedup_key(user_id, num_questions, use_web_search, idempotency_key)
+        job, created = await asyncio.to_thread(self.store.submit, key, user_id, num_questions, use_web_search)
+        JOBS.inc(("submitted" if created else "deduplicated",))
+        if created:
+            self._wake.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        self.ensure_started()
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def ensure_started(self):
+        """Start the worker tasks on the running loop (once per process)"""
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        self._wake = asyncio.Event()
+        self.store.heartbeat()
+        self.store.requeue_orphans(self.stale_after)
+        self.store.purge(time.time() - GENERATION_JOB_TTL_HOURS * 3600)
+        self._tasks = [asyncio.create_task(self._work(), name=f"generation-worker-{i}") for i in range(self.workers)]
+        # Workers busy with long jobs don't poll, so liveness has its own task
+        self._tasks.append(asyncio.create_task(self._heartbeat(), name="generation-heartbeat"))
+
+    @property
+    def stale_after(self) -> float:
+        return GENERATION_POLL_SECONDS * HEARTBEAT_STALE_POLLS
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(GENERATION_POLL_SECONDS)
+            try:
+                await asyncio.to_thread(self.store.heartbeat)
+            except Exception as e:
+                print(f"Error recording generation worker heartbeat: {e}")
+
+    async def _work(self):
+        while True:
+            self._wake.clear()
+            try:
+                job = await asyncio.to_thread(self.store.claim)
+            except Exception as e:
+                print(f"Error claiming generation job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), GENERATION_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    # Also catches jobs orphaned by another process sharing the job file
+                    await asyncio.to_thread(self.store.requeue_orphans, self.stale_after)
+                continue
+            try:
+                await self._run(job)
+            except Exception as e:
+                print(f"Generation job {job['id']} crashed: {e}")
+                await asyncio.to_thread(self.store.finish, job["id"], "failed", str(e))
+
+    async def _run(self, job: Dict):
+        from src.services.agent import SATLearningAgent  # deferred: pulls in openai
+
+        agent = SATLearningAgent(job["user_id"])
+        questions = job["questions"]
+        while len(questions) < job["num_questions"]:
+            count = min(self.chunk_size, job["num_questions"] - len(questions))
+            try:
+                async with get_agent_admission().admit(f"user:{job['user_id']}"):
+                    # Search results only help the first chunk; later ones reuse the same analysis
+                    chunk = await agent.generate_questions(
+                        num_questions=count,
+                        use_web_search=job["use_web_search"] and not questions
+                    )
+                # Questions keep their content ids; a chunk can repeat stored questions already in the job
+                taken = {q["id"] for q in questions}
+                chunk = [q for q in chunk if q["id"] not in taken]
+                if not chunk:
+                    raise ValueError("No new questions generated")
+            except AdmissionRejected as busy:
+                # Generation is at capacity - try again later without using up an attempt
+                await asyncio.to_thread(self.store.retry, job["id"], str(busy), job["attempts"], busy.retry_after)
+                JOBS.inc(("deferred",))
+                return
+            except Exception as e:
+                attempts = job["attempts"] + 1
+                if attempts >= GENERATION_MAX_ATTEMPTS:
+                    print(f"Generation job {job['id']} failed after {attempts} attempts: {e}")
+                    await asyncio.to_thread(self.store.finish, job["id"], "failed", str(e), attempts)
+                    self._finished(job, "failed")
+                else:
+                    await asyncio.to_thread(self.store.retry, job["id"], str(e), attempts, 2 ** attempts)
+                    JOBS.inc(("retried",))
+                return
+
+            questions.extend(chunk[:count])
+            await asyncio.to_thread(self.store.save_progress, job["id"], questions)
+
+        await asyncio.to_thread(self.store.finish, job["id"], "succeeded")
+        self._finished(job, "succeeded")
+
+    @staticmethod
+    def _finished(job: Dict, status: str):
+        JOBS.inc((status,))
+        JOB_DURATION.observe((status,), time.time() - job["created_at"])
+
+_generation_jobs: Optional[GenerationJobService] = None
+
+def get_generation_jobs() -> GenerationJobService:
+    global _generation_jobs
+    if _generation_jobs is None:
+        _generation_jobs = GenerationJobService(JobStore(GENERATION_JOBS_PATH))
+    return _generation_jobs
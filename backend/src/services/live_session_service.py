@@ -0,0 +1,284 @@
+"""
+Live game sessions - answers streamed while the game is played
+Each session keeps running totals and a small buffer of answers that is
+written as one columnar micro-batch (attempts, ratings, pace, reviews) once
+it reaches LIVE_BATCH_SIZE or LIVE_FLUSH_SECONDS, so finishing a game is a
+single small update. A session can resume on any worker from its
+game_sessions row, which carries the running totals of everything flushed.
+Open sessions have finalized_at NULL; every write is conditional on that,
+so once one worker finalizes a game no other can add to it or count it again.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.config import LIVE_BATCH_SIZE, LIVE_FLUSH_SECONDS, LIVE_REAP_SECONDS, LIVE_SESSION_IDLE_SECONDS
+from src.models.schemas import AnswerEvent, AttemptColumns
+from src.repositories import get_repository
+from src.repositories.base import Repository
+from src.services.game_service import GameService
+from src.services.score_feed import get_score_feed, score_event
+from src.utils.metrics import REGISTRY
+
+EVENTS = REGISTRY.counter("live_answer_events_total", "Answer events received by live sessions", ("outcome",))
+BATCH_SIZE = REGISTRY.histogram(
+    "live_flush_batch_size", "Attempts written per live-session micro-batch", (), (1, 2, 5, 10, 20, 50, 100),
+)
+
+class LiveSessionError(Exception):
+    """Unknown, foreign or finished session"""
+
+class SessionFinalizedError(LiveSessionError):
+    """The session was already finalized (possibly by another worker)"""
+
+class LiveSession:
+    def __init__(self, session_id: str, user_id: str, game_id: str):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.game_id = game_id
+        self.lock = threading.Lock()
+        # Answers written to the database (= next seq the client must not resend)
+        self.durable = 0
+        self.correct = 0
+        self.wrong = 0
+        self.total_time = 0
+        # Running score reported with the answers (kept if the game is abandoned)
+        self.score = 0
+        self.streak = 0
+        self.max_streak = 0
+        self.buffer: List[AnswerEvent] = []
+        self.last_flush = time.monotonic()
+        self.last_seen = time.monotonic()
+        self.finalized = False
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "LiveSession":
+        """Resume from the running totals of the last flush"""
+        session = cls(row["id"], row["user_id"], row["game_id"])
+        session.correct = row["correct_answers"]
+        session.wrong = row["wrong_answers"]
+        session.durable = session.correct + session.wrong
+        session.total_time = row["average_response_time"] * session.durable
+        session.max_streak = row["max_streak"]
+        session.score = row["score"]
+        return session
+
+    @property
+    def received(self) -> int:
+        return self.durable + len(self.buffer)
+
+    def totals(self) -> Dict:
+        answered = self.correct + self.wrong
+        return {
+            "correct_answers": self.correct,
+            "wrong_answers": self.wrong,
+            "accuracy": self.correct / answered * 100 if answered else 0.0,
+            "max_streak": self.max_streak,
+            "average_response_time": self.total_time // answered if answered else 0,
+            "score": self.score,
+        }
+
+class LiveSessionService:
+    """Open live sessions of this worker"""
+
+    def __init__(
+        self,
+        batch_size: int = LIVE_BATCH_SIZE,
+        flush_seconds: float = LIVE_FLUSH_SECONDS,
+        idle_seconds: float = LIVE_SESSION_IDLE_SECONDS,
+        reap_seconds: float = LIVE_REAP_SECONDS,
+    ):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.idle_seconds = idle_seconds
+        self.reap_seconds = reap_seconds
+        self._sessions: Dict[str, LiveSession] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, repo: Repository, user_id: str, game_id: str) -> LiveSession:
+        """Create the game session row up front so attempts can reference it"""
+        row = repo.create_session({
+            "user_id": user_id,
+            "game_id": game_id,
+            "score": 0,
+            "accuracy": 0.0,
+            "correct_answers": 0,
+            "wrong_answers": 0,
+            "max_streak": 0,
+            "average_response_time": 0,
+            "finalized_at": None,
+        })
+        if not row:
+            raise LiveSessionError("Failed to create game session")
+        session = LiveSession(row["id"], user_id, game_id)
+        with self._lock:
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, repo: Repository, session_id: str, user_id: str) -> LiveSession:
+        """This worker's copy of a session, resumed from the database if needed"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            row = repo.get_session(session_id)
+            if not row:
+                raise LiveSessionError("Unknown session")
+            if row.get("finalized_at"):
+                raise SessionFinalizedError("Session already finalized")
+            session = LiveSession.from_row(row)
+            with self._lock:
+                session = self._sessions.setdefault(session_id, session)
+        if session.user_id != user_id:
+            raise LiveSessionError("Unknown session")
+        if session.finalized:
+            raise SessionFinalizedError("Session already finalized")
+        return session
+
+    def record(self, repo: Repository, session: LiveSession, events: List[AnswerEvent]) -> int:
+        """Add answer events (in seq order, duplicates ignored); returns the durable count"""
+        with session.lock:
+            if session.finalized:
+                raise SessionFinalizedError("Session already finalized")
+            session.last_seen = time.monotonic()
+            for event in sorted(events, key=lambda e: e.seq):
+                if event.seq < session.received:
+                    EVENTS.inc(("duplicate",))
+                    continue
+                if event.seq > session.received:
+                    # Gap - the client resends everything from the acked count
+                    EVENTS.inc(("out_of_order",))
+                    break
+                EVENTS.inc(("accepted",))
+                session.buffer.append(event)
+                session.total_time += event.timeSpent
+                if event.score is not None:
+                    session.score = event.score
+                if event.isCorrect:
+                    session.correct += 1
+                    session.streak += 1
+                    session.max_streak = max(session.max_streak, session.streak)
+                else:
+                    session.wrong += 1
+                    session.streak = 0
+
+            if len(session.buffer) >= self.batch_size or time.monotonic() - session.last_flush >= self.flush_seconds:
+                self._flush(repo, session)
+            return session.durable
+
+    def flush(self, repo: Repository, session: LiveSession) -> int:
+        with session.lock:
+            self._flush(repo, session)
+            return session.durable
+
+    def _flush(self, repo: Repository, session: LiveSession):
+        """Write the buffered answers as one micro-batch (caller holds session.lock)"""
+        session.last_flush = time.monotonic()
+        if not session.buffer or session.finalized:
+            return
+        batch = session.buffer
+        # Totals go first, in the update that checks the game is still open, so
+        # no attempts are added once another worker has finalized it (a crash
+        # before the attempts land loses them rather than counting them twice)
+        totals = session.totals()
+        if not repo.update_open_session(session.session_id, totals):
+            self._close(session)
+            raise SessionFinalizedError("Session already finalized")
+        columns = AttemptColumns.model_construct(
+            questionId=[e.questionId for e in batch],
+            topic=[e.topic for e in batch],
+            difficulty=[e.difficulty for e in batch],
+            isCorrect=[e.isCorrect for e in batch],
+            timeSpent=[e.timeSpent for e in batch],
+        )
+        GameService(repo).record_attempt_columns(session.session_id, session.user_id, columns)
+        session.buffer = []
+        session.durable += len(batch)
+        BATCH_SIZE.observe((), len(batch))
+        self._publish(session, totals, score=None, final=False)
+
+    @staticmethod
+    def _publish(session: LiveSession, totals: Dict, score: Optional[int], final: bool):
+        get_score_feed().publish(score_event(
+            session.session_id,
+            session.user_id,
+            session.game_id,
+            score=score,
+            accuracy=totals["accuracy"],
+            correct=totals["correct_answers"],
+            wrong=totals["wrong_answers"],
+            max_streak=totals["max_streak"],
+            final=final,
+        ))
+
+    async def finalize(self, repo: Repository, session: LiveSession, score: int, max_streak: Optional[int] = None) -> str:
+        """Flush what's left, record the final score and fold the game into user stats
+
+        Only the caller whose conditional update sets finalized_at folds the
+        game in; a retried or concurrent finalize raises LiveSessionError.
+        """
+        with session.lock:
+            if session.finalized:
+                raise SessionFinalizedError("Session already finalized")
+            self._flush(repo, session)
+            if max_streak is not None:
+                session.max_streak = max(session.max_streak, max_streak)
+            session.score = score
+            totals = session.totals()
+            won = repo.update_open_session(session.session_id, totals, finalize=True)
+            self._close(session)
+        if not won:
+            raise SessionFinalizedError("Session already finalized")
+
+        await GameService(repo).update_user_stats(
+            session.user_id,
+            score=score,
+            correct=session.correct,
+            wrong=session.wrong,
+            accuracy=totals["accuracy"]
+        )
+        self._publish(session, totals, score=score, final=True)
+        return session.session_id
+
+    def _close(self, session: LiveSession):
+        """Stop accepting answers for a finalized session (caller holds session.lock)"""
+        session.finalized = True
+        session.buffer = []
+        with self._lock:
+            self._sessions.pop(session.session_id, None)
+
+    def ensure_started(self):
+        if self.reap_seconds <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._loop(), name="live-session-reaper")
+
+    async def _loop(self):
+        while True:
+            await self.reap(get_repository())
+            await asyncio.sleep(self.reap_seconds)
+
+    async def reap(self, repo: Repository):
+        """Flush idle buffers; finalize sessions abandoned for idle_seconds (closed tabs)
+        with the last running score their answers reported"""
+        now = time.monotonic()
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            try:
+                if now - session.last_seen >= self.idle_seconds:
+                    print(f"Live session {session.session_id} abandoned - finalizing with {session.received} answers")
+                    await self.finalize(repo, session, score=session.score)
+                elif session.buffer and now - session.last_flush >= self.flush_seconds:
+                    self.flush(repo, session)
+            except Exception as e:
+                print(f"Error reaping live session {session.session_id}: {e}")
+
+_live_sessions: Optional[LiveSessionService] = None
+
+def get_live_session_service() -> LiveSessionService:
+    global _live_sessions
+    if _live_sessions is None:
+        _live_sessions = LiveSessionService()
+    return _live_sessions
@@ -0,0 +1,211 @@
+"""
+LLM routing - model choice and hedged requests per call site
+Keeps recent latencies per (call site, model, request size). A call still
+running past the LLM_HEDGE_QUANTILE of its history gets a duplicate sent to
+the next configured model (or the same one); the first answer wins and the
+other request is cancelled. Small requests go to whichever healthy model has
+the lowest median latency.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.config import (
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_QUANTILE,
+    LLM_INSIGHTS_HEDGE,
+    LLM_INSIGHTS_MODELS,
+    LLM_LATENCY_WINDOW,
+    LLM_RATE_BURST,
+    LLM_RATE_MAX_WAIT_SECONDS,
+    LLM_RATE_PER_SECOND,
+    LLM_QUESTIONS_HEDGE,
+    LLM_QUESTIONS_MODELS,
+    LLM_SMALL_REQUEST_TOKENS,
+    LLM_TIMEOUT_SECONDS,
+)
+from src.shared_state import RateLimited, get_shared_state
+from src.shared_state.base import THROTTLED
+from src.utils.metrics import REGISTRY
+from src.utils.resilience import BudgetExceeded, CircuitOpenError, get_breaker, remaining, timeout_for
+
+LATENCY = REGISTRY.histogram("llm_request_seconds", "LLM call latency", ("site", "model", "outcome"))
+HEDGES = REGISTRY.counter("llm_hedges_total", "Hedged LLM calls by which request answered first", ("site", "winner"))
+
+# Below this many recent calls a model counts as healthy regardless of failures
+_MIN_HEALTH_SAMPLES = 5
+# Medians need fewer samples than tail quantiles
+_MIN_ROUTING_SAMPLES = 5
+
+def _is_outage(error: BaseException) -> bool:
+    """Timeouts, connection errors, 429s and 5xx count against a model's breaker"""
+    status = getattr(error, "status_code", None)
+    return status is None or status >= 500 or status == 429
+
+class CallSite:
+    def __init__(self, name: str, models: str, hedge: bool):
+        self.name = name
+        self.models = [m.strip() for m in models.split(",") if m.strip()]
+        self.hedge = hedge
+
+class ModelStats:
+    __slots__ = ("latencies", "outcomes")
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+
+    def record(self, seconds: float, ok: bool):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        if len(self.latencies) < min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def healthy(self) -> bool:
+        recent = list(self.outcomes)[-20:]
+        return len(recent) < _MIN_HEALTH_SAMPLES or recent.count(False) / len(recent) < 0.5
+
+class LLMRouter:
+    def __init__(self, sites: List[CallSite]):
+        self.sites = {site.name: site for site in sites}
+        self._stats: Dict[Tuple[str, str, int], ModelStats] = {}
+
+    def stats(self, site: str, model: str, size: int) -> ModelStats:
+        # Latency grows with output size, so sizes are compared within power-of-two buckets
+        key = (site, model, max(size, 1).bit_length())
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ModelStats()
+        return stats
+
+    def candidates(self, site: CallSite, max_tokens: int, size: int) -> List[str]:
+        """Configured models in the order to try them"""
+        healthy = [
+            m for m in site.models
+            if self.stats(site.name, m, size).healthy and get_breaker(f"llm:{m}").available
+        ] or list(site.models)
+        if max_tokens <= LLM_SMALL_REQUEST_TOKENS:
+            # Unmeasured models sort first so every model gets sampled
+            healthy.sort(key=lambda m: self.stats(site.name, m, size).quantile(0.5, _MIN_ROUTING_SAMPLES) or 0.0)
+        return healthy
+
+    def estimate(self, site_name: str, size: int) -> Optional[float]:
+        """Median latency of the preferred model for requests of this size, if measured"""
+        site = self.sites[site_name]
+        model = self.candidates(site, LLM_SMALL_REQUEST_TOKENS + 1, size)[0]
+        return self.stats(site.name, model, size).quantile(0.5, _MIN_ROUTING_SAMPLES)
+
+    async def complete(
+        self,
+        site_name: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        size: int = 1,
+    ) -> str:
+        """Message content of the first successful completion"""
+        site = self.sites[site_name]
+        models = self.candidates(site, max_tokens, size)
+        primary = models[0]
+        first = asyncio.create_task(self._call(site, primary, messages, temperature, max_tokens, size))
+
+        delay = self.stats(site.name, primary, size).quantile(LLM_HEDGE_QUANTILE, LLM_HEDGE_MIN_SAMPLES) if site.hedge else None
+        if delay is None:
+            return await first
+
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+
+            hedge_model = models[1] if len(models) > 1 else primary
+            second = asyncio.create_task(self._call(site, hedge_model, messages, temperature, max_tokens, size))
+            tasks.add(second)
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        HEDGES.inc((site.name, "primary" if task is first else "hedge"))
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()  # closes the losing request's connection
+
+    async def _call(self, site: CallSite, model: str, messages: List[Dict], temperature: float, max_tokens: int, size: int) -> str:
+        from src.services.agent import get_llm_client  # deferred: pulls in openai
+
+        await self._rate_limit()
+        timeout = timeout_for(LLM_TIMEOUT_SECONDS)
+        budget_limited = timeout < LLM_TIMEOUT_SECONDS
+        # Retries can't fit in a latency budget - hedging covers slow calls instead
+        client = get_llm_client().with_options(timeout=timeout, max_retries=0 if remaining() is not None else 2)
+        start = time.perf_counter()
+        try:
+            with get_breaker(f"llm:{model}").guard(_is_outage):
+                try:
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens
+                        ),
+                        timeout
+                    )
+                except Exception as e:
+                    # Cut short by the caller's budget, not the model's fault
+                    if budget_limited and (isinstance(e, TimeoutError) or type(e).__name__ == "APITimeoutError"):
+                        raise BudgetExceeded(f"{model} did not answer within the latency budget") from e
+                    raise
+        except asyncio.CancelledError:
+            LATENCY.observe((site.name, model, "cancelled"), time.perf_counter() - start)
+            raise
+        except (BudgetExceeded, CircuitOpenError):
+            raise
+        except Exception:
+            elapsed = time.perf_counter() - start
+            self.stats(site.name, model, size).record(elapsed, ok=False)
+            LATENCY.observe((site.name, model, "error"), elapsed)
+            raise
+        elapsed = time.perf_counter() - start
+        self.stats(site.name, model, size).record(elapsed, ok=True)
+        LATENCY.observe((site.name, model, "ok"), elapsed)
+        return response.choices[0].message.content
+
+    @staticmethod
+    async def _rate_limit():
+        """Wait for a token from the OpenRouter rate limit shared by all workers"""
+        state = get_shared_state()
+        interval = 1 / LLM_RATE_PER_SECOND
+        deadline = time.monotonic() + timeout_for(LLM_RATE_MAX_WAIT_SECONDS)
+        while not await asyncio.to_thread(state.take, "openrouter", LLM_RATE_PER_SECOND, LLM_RATE_BURST):
+            left = deadline - time.monotonic()
+            if left <= 0:
+                THROTTLED.inc(("openrouter",))
+                raise RateLimited("OpenRouter rate limit reached")
+            await asyncio.sleep(min(interval, left))
+
+_llm_router: Optional[LLMRouter] = None
+
+def get_llm_router() -> LLMRouter:
+    global _llm_router
+    if _llm_router is None:
+        _llm_router = LLMRouter([
+            CallSite("questions", LLM_QUESTIONS_MODELS, LLM_QUESTIONS_HEDGE),
+            CallSite("insights", LLM_INSIGHTS_MODELS, LLM_INSIGHTS_HEDGE),
+        ])
+    return _llm_router
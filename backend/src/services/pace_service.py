@@ -0,0 +1,164 @@
+"""
+Pace service - streaming response time percentiles per topic and difficulty
+Keeps one t-digest per (topic, difficulty) in memory, periodically merges
+the new samples into the response_time_sketches table and reloads it
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.repositories.base import Repository
+from src.config import PACE_FLUSH_INTERVAL_SECONDS, PACE_RELOAD_SECONDS
+from src.utils.tdigest import TDigest
+
+# Sketch key used for the per-topic rollup across all difficulties
+ALL_DIFFICULTIES = "all"
+
+# Quantile grid cached per sketch so lookups don't walk the centroids
+_GRID = [i / 100 for i in range(101)]
+
+class _PaceSketch:
+    """Global digest plus the local delta not yet written to the database"""
+
+    def __init__(self, digest: Optional[TDigest] = None):
+        self.digest = digest or TDigest()
+        self.pending = TDigest()
+        self._grid: Optional[List[float]] = None
+
+    def add(self, value: float):
+        self.digest.add(value)
+        self.pending.add(value)
+        self._grid = None
+
+    def grid(self) -> List[float]:
+        if self._grid is None:
+            self._grid = self.digest.quantiles(_GRID)
+        return self._grid
+
+class PaceService:
+    """Response time sketches shared by every request in this worker"""
+
+    def __init__(
+        self,
+        flush_interval: float = PACE_FLUSH_INTERVAL_SECONDS,
+        reload_interval: float = PACE_RELOAD_SECONDS,
+    ):
+        self.flush_interval = flush_interval
+        self.reload_interval = reload_interval
+        self._sketches: Dict[Tuple[str, str], _PaceSketch] = {}
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._last_flush = time.monotonic()
+
+    def load(self, repo: Repository):
+        """Load persisted sketches, again every reload_interval to pick up other workers' samples"""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.reload_interval:
+            return
+        self._loaded_at = time.monotonic()
+        try:
+            self._refresh(repo.load_sketches())
+        except Exception as e:
+            print(f"Error loading pace sketches: {e}")
+
+    def _refresh(self, rows: Iterable[Dict]):
+        """Replace the global view with stored sketches, keeping samples not merged yet"""
+        with self._lock:
+            for row in rows:
+                sketch = self._sketches.setdefault((row["topic"], row["difficulty"]), _PaceSketch())
+                refreshed = TDigest.from_dict(row["digest"])
+                refreshed.merge(sketch.pending)
+                sketch.digest = refreshed
+                sketch._grid = None
+
+    def record_attempts(self, attempts: Iterable) -> int:
+        """Add the timeSpent of each attempt to its sketches"""
+        count = 0
+        with self._lock:
+            for attempt in attempts:
+                if attempt.timeSpent <= 0:
+                    continue
+                for key in ((attempt.topic, attempt.difficulty), (attempt.topic, ALL_DIFFICULTIES)):
+                    sketch = self._sketches.get(key)
+                    if sketch is None:
+                        sketch = self._sketches[key] = _PaceSketch()
+                    sketch.add(attempt.timeSpent)
+                count += 1
+        return count
+
+    def _get(self, topic: str, difficulty: Optional[str]) -> Optional[_PaceSketch]:
+        return self._sketches.get((topic, difficulty or ALL_DIFFICULTIES))
+
+    def faster_than(self, topic: str, difficulty: Optional[str], time_spent: float) -> Optional[float]:
+        """Percent of recorded answers that were slower than time_spent"""
+        sketch = self._get(topic, difficulty)
+        if sketch is None or not len(sketch.digest):
+            return None
+        grid = sketch.grid()
+        # Position of time_spent in the 101-point quantile grid
+        rank = bisect.bisect_left(grid, time_spent)
+        if rank <= 0:
+            return 100.0
+        if rank > 100:
+            return 0.0
+        low, high = grid[rank - 1], grid[rank]
+        fraction = (time_spent - low) / (high - low) if high > low else 0.0
+        return round(100.0 - (rank - 1 + fraction), 1)
+
+    def pace_targets(self, topic: str, difficulty: Optional[str]) -> Optional[Dict]:
+        """p50/p90 response times for a topic and difficulty"""
+        sketch = self._get(topic, difficulty)
+        if sketch is None or not len(sketch.digest):
+            return None
+        grid = sketch.grid()
+        return {
+            "samples": len(sketch.digest),
+            "p50": grid[50],
+            "p90": grid[90],
+        }
+
+    def maybe_flush(self, repo: Repository, force: bool = False) -> bool:
+        """Merge pending samples into the stored sketches if the interval elapsed
+
+        Only the samples gathered since the last flush are sent; the database
+        merges them into the stored digests under a row lock, so flushes from
+        different workers never overwrite each other.
+        """
+        if not force and time.monotonic() - self._last_flush < self.flush_interval:
+            return False
+        self._last_flush = time.monotonic()
+
+        with self._lock:
+            pending = {key: s.pending for key, s in self._sketches.items() if len(s.pending)}
+            for key in pending:
+                self._sketches[key].pending = TDigest()
+
+        if not pending:
+            return False
+
+        try:
+            merged = repo.merge_sketches([
+                {"topic": topic, "difficulty": difficulty, "digest": delta.to_dict(), "sample_count": len(delta)}
+                for (topic, difficulty), delta in pending.items()
+            ])
+        except Exception as e:
+            # Put the delta back so it is retried on the next flush
+            print(f"Error flushing pace sketches: {e}")
+            with self._lock:
+                for key, delta in pending.items():
+                    self._sketches[key].pending.merge(delta)
+            return False
+
+        # The merged sketches include what other workers have flushed
+        self._refresh(merged)
+        return True
+
+_pace_service: Optional[PaceService] = None
+
+def get_pace_service() -> PaceService:
+    """Get the per-worker pace service"""
+    global _pace_service
+    if _pace_service is None:
+        _pace_service = PaceService()
+    return _pace_service
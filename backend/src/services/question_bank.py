@@ -0,0 +1,83 @@
+"""
+Static question bank - SAT questions shipped with the backend
+Used when the AI agent is not requested or fails, ordered by how well
+each question matches the user's skill rating. Bank questions are served
+under question_key(text), like generated ones, not the small numbers in
+questions.json - games number their own questions 1..N, so small ids
+don't tell which question an attempt was on.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from src.models.schemas import Question
+from src.services.question_validation import question_key
+from src.services.rating_service import BASE_RATING, RatingEngine, expected_score
+from src.utils.http_cache import make_etag
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "questions.json")
+
+# Questions a student answers correctly ~70% of the time are the best practice
+TARGET_SUCCESS_RATE = 0.7
+
+class QuestionBank:
+    """Loads the bundled questions once per worker"""
+    _questions: Optional[List[Dict]] = None
+    _by_id: Dict[int, Dict] = {}
+    # Hash of questions.json - changes whenever the bank does (see etag)
+    _version: str = ""
+
+    @classmethod
+    def all(cls) -> List[Dict]:
+        if cls._questions is None:
+            with open(QUESTIONS_PATH, "rb") as f:
+                data = f.read()
+            cls._version = hashlib.sha256(data).hexdigest()
+            raw = [{**q, "id": question_key(q["question"])} for q in json.loads(data)["questions"]]
+            # Validated once here, so responses can serve these dicts as they are
+            cls._questions = [q.model_dump() for q in TypeAdapter(List[Question]).validate_python(raw)]
+            cls._by_id = {q["id"]: q for q in cls._questions}
+        return cls._questions
+
+    @classmethod
+    def etag(cls, *query) -> str:
+        """Strong ETag for an unranked (anonymous) question set - depends only on the query and the bank"""
+        cls.all()
+        return make_etag(cls._version, *query)
+
+    @classmethod
+    def get_by_ids(cls, question_ids: List[int]) -> List[Dict]:
+        """Look up questions by id, keeping the given order and skipping unknown ids"""
+        cls.all()
+        return [cls._by_id[qid] for qid in question_ids if qid in cls._by_id]
+
+    @classmethod
+    def get_questions(
+        cls,
+        topic: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        limit: int = 10,
+        user_id: Optional[str] = None,
+        ratings: Optional[RatingEngine] = None,
+    ) -> List[Dict]:
+        """Filter the bank, ranking by rating match when a user is known"""
+        questions = [
+            q for q in cls.all()
+            if (not topic or q["topic"].lower() == topic.lower())
+            and (not difficulty or q["difficulty"].lower() == difficulty.lower())
+        ]
+
+        if user_id and ratings:
+            def distance(q: Dict) -> float:
+                skill = ratings.skill(user_id, q["topic"])
+                rating = skill["rating"] if skill else BASE_RATING
+                p = expected_score(rating, ratings.question_rating(q["id"], q["difficulty"]))
+                return abs(p - TARGET_SUCCESS_RATE)
+
+            questions = sorted(questions, key=distance)
+
+        return questions[:limit]
@@ -0,0 +1,140 @@
+"""
+Question search - keyword search over the question bank and generated questions
+BM25 over question text, options and explanation (src/utils/inverted_index.py).
+The static bank is indexed on first use; questions the agent generates are
+added as they are served, under an id derived from their text, and the
+oldest are dropped past QUESTION_SEARCH_MAX_GENERATED.
+"""
+
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.config import QUESTION_SEARCH_MAX_GENERATED, QUESTION_SEARCH_MAX_POSTINGS
+from src.services.question_bank import QuestionBank
+from src.services.question_validation import question_key
+from src.utils.inverted_index import BM25Index
+from src.utils.metrics import REGISTRY
+
+SEARCH_LATENCY = REGISTRY.histogram("question_search_seconds", "Question search latency")
+INDEXED = REGISTRY.gauge("question_search_documents", "Questions in the search index", ("source",))
+
+def _document(question: Dict) -> str:
+    return " ".join([question["question"], *question.get("options", []), question.get("explanation", "")])
+
+class QuestionSearch:
+    def __init__(self, max_generated: int = QUESTION_SEARCH_MAX_GENERATED):
+        self.max_generated = max_generated
+        self._lock = threading.Lock()
+        self._bank_loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.index = BM25Index()
+        # doc id -> question id, and question id -> doc id
+        self.ids = array("q")
+        self.docs: Dict[int, int] = {}
+        # Generated questions by id, oldest first (bank questions live in QuestionBank)
+        self.generated: "OrderedDict[int, Dict]" = OrderedDict()
+        # Topic and difficulty per doc id as small codes, for filtering without the question dicts
+        self.topics = array("B")
+        self.difficulties = array("B")
+        self._codes: Dict[str, int] = {}
+
+    def _code(self, value: str) -> int:
+        return self._codes.setdefault(value.lower(), len(self._codes))
+
+    def _add(self, question_id: int, question: Dict):
+        # Called with self._lock held
+        doc = self.index.add(_document(question))
+        self.ids.append(question_id)
+        self.docs[question_id] = doc
+        self.topics.append(self._code(question["topic"]))
+        self.difficulties.append(self._code(question["difficulty"]))
+
+    def _ensure_bank(self):
+        if self._bank_loaded:
+            return
+        with self._lock:
+            if not self._bank_loaded:
+                for question in QuestionBank.all():
+                    self._add(question["id"], question)
+                self._bank_loaded = True
+                INDEXED.set(("bank",), len(QuestionBank.all()))
+
+    def add_generated(self, questions: List[Dict]) -> int:
+        """Index generated questions (re-generated texts are skipped); returns how many were new"""
+        self._ensure_bank()
+        added = 0
+        with self._lock:
+            for question in questions:
+                key = question_key(question["question"])
+                if key in self.docs:
+                    continue
+                stored = {**question, "id": key}
+                self.generated[key] = stored
+                self._add(key, stored)
+                added += 1
+            while len(self.generated) > self.max_generated:
+                key, _ = self.generated.popitem(last=False)
+                self.index.delete(self.docs.pop(key))
+            # Dropped questions keep their postings until the index is rebuilt
+            if len(self.index.deleted) > len(self.index) // 2:
+                self._rebuild()
+            INDEXED.set(("generated",), len(self.generated))
+        return added
+
+    def _rebuild(self):
+        # Called with self._lock held
+        generated = self.generated
+        self._reset()
+        for question in QuestionBank.all():
+            self._add(question["id"], question)
+        for key, question in generated.items():
+            self.generated[key] = question
+            self._add(key, question)
+
+    def get(self, question_id: int) -> Optional[Dict]:
+        return self.generated.get(question_id) or next(iter(QuestionBank.get_by_ids([question_id])), None)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        topic: Optional[str] = None,
+        difficulty: Optional[str] = None,
+    ) -> List[Tuple[Dict, float]]:
+        """(question, score) pairs, best match first"""
+        self._ensure_bank()
+        start = time.perf_counter()
+        with self._lock:
+            topic_code = self._codes.get(topic.lower(), -1) if topic else None
+            difficulty_code = self._codes.get(difficulty.lower(), -1) if difficulty else None
+            accept = None
+            if topic_code is not None or difficulty_code is not None:
+                topics, difficulties = self.topics, self.difficulties
+                def accept(doc: int) -> bool:
+                    return (topic_code is None or topics[doc] == topic_code) and (
+                        difficulty_code is None or difficulties[doc] == difficulty_code
+                    )
+            hits = [
+                (self.ids[doc], score)
+                for doc, score in self.index.search(query, limit, accept, QUESTION_SEARCH_MAX_POSTINGS)
+            ]
+        SEARCH_LATENCY.observe((), time.perf_counter() - start)
+        results = []
+        for question_id, score in hits:
+            question = self.get(question_id)
+            if question is not None:
+                results.append((question, score))
+        return results
+
+_question_search: Optional[QuestionSearch] = None
+
+def get_question_search() -> QuestionSearch:
+    global _question_search
+    if _question_search is None:
+        _question_search = QuestionSearch()
+    return _question_search
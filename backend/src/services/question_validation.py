@@ -0,0 +1,125 @@
+"""
+Validation and normalization of AI-generated questions
+Each item is mapped onto the Question schema - key aliases such as
+correct_answer, and answers given as a letter or as the option text, are
+normalized - or rejected with a reason (option count, answer out of range,
+unknown topic or difficulty, duplicate), so the agent can request exactly
+the number of replacements it needs.
+"""
+
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.config import QUESTION_TOPICS
+from src.utils.metrics import REGISTRY
+
+GENERATED = REGISTRY.counter("generated_questions_total", "AI-generated questions by validation outcome", ("outcome",))
+
+OPTION_COUNT = 4
+DIFFICULTIES = ("easy", "medium", "hard")
+ANSWER_KEYS = ("correctAnswer", "correct_answer", "correctAnswerIndex", "correct_answer_index", "answerIndex", "answer")
+DIFFICULTY_ALIASES = {"beginner": "easy", "intermediate": "medium", "moderate": "medium", "advanced": "hard", "difficult": "hard"}
+TOPIC_ALIASES = {"reading comprehension": "Reading", "writing": "Grammar", "vocab": "Vocabulary", "arithmetic": "Math"}
+
+_LETTER = re.compile(r"^\(?([A-Da-d])[).:]?$")
+
+class InvalidQuestion(ValueError):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+def _text_key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def question_key(text: str) -> int:
+    """Stable id for a generated question - 53 bits of a hash of its normalized
+    text, so it is a safe integer in JavaScript and never collides in practice"""
+    return int.from_bytes(hashlib.sha256(_text_key(text).encode()).digest()[:8], "big") >> 11
+
+def _answer_index(raw: Dict, options: List[str]) -> int:
+    for key in ANSWER_KEYS:
+        if key in raw:
+            value = raw[key]
+            break
+    else:
+        raise InvalidQuestion("answer")
+
+    if isinstance(value, str):
+        text = value.strip()
+        letter = _LETTER.match(text.replace("Option ", ""))
+        if letter:
+            value = ord(letter.group(1).upper()) - ord("A")
+        elif text.isdigit():
+            value = int(text)
+        else:
+            matches = [i for i, option in enumerate(options) if _text_key(option) == _text_key(text)]
+            if len(matches) != 1:
+                raise InvalidQuestion("answer")
+            value = matches[0]
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value < len(options):
+        raise InvalidQuestion("answer")
+    return value
+
+def normalize_question(raw, topics: Iterable[str] = QUESTION_TOPICS) -> Dict:
+    """Question-schema dict (without id) for one generated item; raises InvalidQuestion"""
+    if not isinstance(raw, dict):
+        raise InvalidQuestion("format")
+
+    question = raw.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise InvalidQuestion("question")
+
+    options = raw.get("options")
+    if isinstance(options, dict):
+        options = [options[key] for key in sorted(options)]  # {"A": ..., "B": ...}
+    if not isinstance(options, list) or len(options) != OPTION_COUNT:
+        raise InvalidQuestion("options")
+    options = [str(option).strip() for option in options]
+    if not all(options) or len({_text_key(o) for o in options}) != OPTION_COUNT:
+        raise InvalidQuestion("options")
+
+    allowed = {t.lower(): t for t in topics}
+    topic = str(raw.get("topic", "")).strip()
+    topic = allowed.get(topic.lower()) or TOPIC_ALIASES.get(topic.lower())
+    if topic is None or topic.lower() not in allowed:
+        raise InvalidQuestion("topic")
+
+    difficulty = str(raw.get("difficulty", "")).strip().lower()
+    difficulty = DIFFICULTY_ALIASES.get(difficulty, difficulty)
+    if difficulty not in DIFFICULTIES:
+        raise InvalidQuestion("difficulty")
+
+    explanation = raw.get("explanation")
+    return {
+        "question": question.strip(),
+        "options": options,
+        "correctAnswer": _answer_index(raw, options),
+        "topic": topic,
+        "difficulty": difficulty,
+        "explanation": explanation.strip() if isinstance(explanation, str) else "",
+    }
+
+def validate_batch(items, seen: Optional[Set[str]] = None, topics: Iterable[str] = QUESTION_TOPICS) -> Tuple[List[Dict], Dict[str, int]]:
+    """(valid normalized questions, rejection count per reason)
+
+    `seen` holds normalized question texts already accepted (e.g. by earlier
+    batches of the same generation) and is updated in place.
+    """
+    seen = set() if seen is None else seen
+    valid: List[Dict] = []
+    rejected: Dict[str, int] = {}
+    for raw in items if isinstance(items, list) else []:
+        try:
+            question = normalize_question(raw, topics)
+            key = _text_key(question["question"])
+            if key in seen:
+                raise InvalidQuestion("duplicate")
+        except InvalidQuestion as e:
+            rejected[e.reason] = rejected.get(e.reason, 0) + 1
+            GENERATED.inc((e.reason,))
+            continue
+        seen.add(key)
+        valid.append(question)
+        GENERATED.inc(("valid",))
+    return valid, rejected
@@ -0,0 +1,204 @@
+"""
+Rating service - incremental Elo skill ratings per (user, topic) and
+difficulty ratings per question
+
+Each attempt is a "match" between the student's topic skill and the
+question's difficulty, so both estimates update in O(1) as attempts are
+saved and nothing has to re-read question_attempts. Only the change a game
+makes is written, and the database adds it to the stored ratings, so games
+saved at once by different workers don't overwrite each other.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.repositories.base import Repository
+
+BASE_RATING = 1500.0
+
+# Priors for questions that have never been attempted
+DIFFICULTY_PRIORS = {
+    "easy": 1300.0,
+    "medium": 1500.0,
+    "hard": 1700.0,
+}
+
+# K-factor starts high so new users/questions converge fast, then settles
+USER_K = (48.0, 16.0)
+QUESTION_K = (32.0, 8.0)
+K_HALF_LIFE_ATTEMPTS = 20
+
+# Topic labels derived from the expected accuracy on a medium question
+WEAK_THRESHOLD = 0.5
+STRONG_THRESHOLD = 0.8
+MIN_ATTEMPTS_FOR_LABEL = 5
+
+def expected_score(skill: float, difficulty: float) -> float:
+    """Probability that a student with this skill answers correctly"""
+    return 1.0 / (1.0 + 10 ** ((difficulty - skill) / 400.0))
+
+def _k_factor(attempts: int, k: Tuple[float, float]) -> float:
+    initial, floor = k
+    return max(floor, initial / (1 + attempts / K_HALF_LIFE_ATTEMPTS))
+
+def prior_for(difficulty: Optional[str]) -> float:
+    return DIFFICULTY_PRIORS.get((difficulty or "medium").lower(), BASE_RATING)
+
+def rating_to_difficulty(rating: float) -> str:
+    """Map a skill rating to the question difficulty it is best matched with"""
+    if rating < (DIFFICULTY_PRIORS["easy"] + DIFFICULTY_PRIORS["medium"]) / 2:
+        return "easy"
+    if rating > (DIFFICULTY_PRIORS["medium"] + DIFFICULTY_PRIORS["hard"]) / 2:
+        return "hard"
+    return "medium"
+
+class RatingEngine:
+    """In-memory rating cache backed by user_topic_ratings and question_ratings"""
+
+    def __init__(self):
+        # user_id -> topic -> [rating, attempts, avg_time_ms]
+        self._skills: Dict[str, Dict[str, List]] = {}
+        # question_id -> [rating, attempts]
+        self._questions: Dict[int, List] = {}
+        self._loaded_users = set()
+        self._lock = threading.Lock()
+
+    def load_user(self, repo: Repository, user_id: str, refresh: bool = False) -> bool:
+        """Load a user's topic skills (refresh=True to pick up other workers' updates); False if the read failed"""
+        if user_id in self._loaded_users and not refresh:
+            return True
+        try:
+            rows = repo.user_ratings(user_id)
+            with self._lock:
+                topics = self._skills.setdefault(user_id, {})
+                for row in rows:
+                    topics[row["topic"]] = [float(row["rating"]), row["attempts"], float(row.get("avg_time_ms") or 0)]
+            self._loaded_users.add(user_id)
+            return True
+        except Exception as e:
+            print(f"Error loading skill ratings: {e}")
+            return False
+
+    def load_questions(self, repo: Repository, question_ids: Iterable[int]):
+        """Load difficulty ratings for the given questions"""
+        ids = list(set(question_ids))
+        if not ids:
+            return
+        try:
+            rows = repo.question_ratings(ids)
+            with self._lock:
+                for row in rows:
+                    self._questions[row["question_id"]] = [float(row["rating"]), row["attempts"]]
+        except Exception as e:
+            print(f"Error loading question ratings: {e}")
+
+    def skill(self, user_id: str, topic: str) -> Optional[Dict]:
+        entry = self._skills.get(user_id, {}).get(topic)
+        if entry is None:
+            return None
+        return {"rating": entry[0], "attempts": entry[1], "avg_time": entry[2]}
+
+    def user_skills(self, user_id: str) -> Dict[str, Dict]:
+        """All topic skills for a user"""
+        return {
+            topic: {"rating": rating, "attempts": attempts, "avg_time": avg_time}
+            for topic, (rating, attempts, avg_time) in list(self._skills.get(user_id, {}).items())
+        }
+
+    def question_rating(self, question_id: int, difficulty: Optional[str] = None) -> float:
+        entry = self._questions.get(question_id)
+        return entry[0] if entry else prior_for(difficulty)
+
+    def record_attempt(
+        self,
+        user_id: str,
+        question_id: int,
+        topic: str,
+        difficulty: str,
+        is_correct: bool,
+        time_spent: int = 0
+    ) -> Tuple[float, float]:
+        """Update the user's topic skill and the question's difficulty from one attempt;
+        returns how much each rating moved"""
+        with self._lock:
+            topics = self._skills.setdefault(user_id, {})
+            skill = topics.get(topic)
+            if skill is None:
+                skill = topics[topic] = [BASE_RATING, 0, 0.0]
+            question = self._questions.get(question_id)
+            if question is None:
+                question = self._questions[question_id] = [prior_for(difficulty), 0]
+
+            surprise = (1.0 if is_correct else 0.0) - expected_score(skill[0], question[0])
+            skill_delta = _k_factor(skill[1], USER_K) * surprise
+            question_delta = -_k_factor(question[1], QUESTION_K) * surprise
+            skill[0] += skill_delta
+            question[0] += question_delta
+            skill[1] += 1
+            question[1] += 1
+            skill[2] += (time_spent - skill[2]) / skill[1]
+        return skill_delta, question_delta
+
+    def record_attempts(self, repo: Repository, user_id: str, attempts: List) -> bool:
+        """Apply a game's attempts and persist the touched ratings"""
+        if not attempts:
+            return False
+
+        # Deltas are computed from the user's current ratings; from a stale cache they would be off
+        if not self.load_user(repo, user_id, refresh=True):
+            print(f"Skipping rating update for {user_id}: current ratings couldn't be read")
+            return False
+        self.load_questions(repo, (a.questionId for a in attempts))
+
+        topics: Dict[str, Dict] = {}
+        questions: Dict[int, Dict] = {}
+        for attempt in attempts:
+            skill_delta, question_delta = self.record_attempt(
+                user_id,
+                attempt.questionId,
+                attempt.topic,
+                attempt.difficulty,
+                attempt.isCorrect,
+                attempt.timeSpent
+            )
+            topic = topics.setdefault(attempt.topic, {"topic": attempt.topic, "rating_delta": 0.0, "attempts": 0, "time_spent": 0})
+            topic["rating_delta"] += skill_delta
+            topic["attempts"] += 1
+            topic["time_spent"] += attempt.timeSpent
+            question = questions.setdefault(attempt.questionId, {
+                "question_id": attempt.questionId,
+                "prior": prior_for(attempt.difficulty),
+                "rating_delta": 0.0,
+                "attempts": 0,
+            })
+            question["rating_delta"] += question_delta
+            question["attempts"] += 1
+
+        try:
+            repo.apply_rating_deltas(user_id, list(topics.values()), list(questions.values()))
+            return True
+        except Exception as e:
+            print(f"Error saving ratings: {e}")
+            return False
+
+    def topic_labels(self, user_id: str) -> Tuple[List[str], List[str]]:
+        """Weak and strong topics from the user's current skill ratings"""
+        weak, strong = [], []
+        for topic, data in self.user_skills(user_id).items():
+            if data["attempts"] < MIN_ATTEMPTS_FOR_LABEL:
+                continue
+            p = expected_score(data["rating"], DIFFICULTY_PRIORS["medium"])
+            if p < WEAK_THRESHOLD:
+                weak.append(topic)
+            elif p >= STRONG_THRESHOLD:
+                strong.append(topic)
+        return sorted(weak), sorted(strong)
+
+_rating_engine: Optional[RatingEngine] = None
+
+def get_rating_engine() -> RatingEngine:
+    """Get the per-worker rating engine"""
+    global _rating_engine
+    if _rating_engine is None:
+        _rating_engine = RatingEngine()
+    return _rating_engine
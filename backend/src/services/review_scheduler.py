@@ -0,0 +1,215 @@
+"""
+Review scheduler - SM-2 spaced repetition over question_id per user
+(bank and stored generated questions only - see GameService._apply_attempts)
+Missed questions come back after a short relearn delay, answered ones
+at growing intervals. Due items are served by /api/questions?mode=review
+straight from stored question content, without calling the LLM.
+"""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.repositories.base import Repository
+from src.config import REVIEW_CACHE_TTL_SECONDS, REVIEW_CACHE_USERS, REVIEW_QUEUE_SIZE
+from src.services.pace_service import get_pace_service
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+DAY_SECONDS = 86400
+# Missed questions come back within the same day
+RELEARN_SECONDS = 10 * 60
+
+def answer_quality(is_correct: bool, time_spent: int, pace: Optional[Dict]) -> int:
+    """SM-2 quality (0-5) from correctness and pace against other students"""
+    if not is_correct:
+        return 1
+    if pace and time_spent:
+        if time_spent <= pace["p50"]:
+            return 5
+        if time_spent > pace["p90"]:
+            return 3
+    return 4
+
+def sm2(state: Dict, quality: int, now: float) -> Dict:
+    """Apply one SM-2 review to an item state and return the new state"""
+    ease = state.get("ease", DEFAULT_EASE)
+    repetitions = state.get("repetitions", 0)
+    interval_days = state.get("interval_days", 0.0)
+    lapses = state.get("lapses", 0)
+
+    if quality >= 3:
+        if repetitions == 0:
+            interval_days = 1.0
+        elif repetitions == 1:
+            interval_days = 6.0
+        else:
+            interval_days = round(interval_days * ease, 2)
+        repetitions += 1
+        due = now + interval_days * DAY_SECONDS
+    else:
+        repetitions = 0
+        interval_days = 0.0
+        lapses += 1
+        due = now + RELEARN_SECONDS
+
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    return {
+        "ease": round(ease, 3),
+        "repetitions": repetitions,
+        "interval_days": interval_days,
+        "lapses": lapses,
+        "due": due,
+    }
+
+def _to_timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+def _to_iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+class ReviewQueue:
+    """Min-heap of (due, question_id) for one user with lazy deletion"""
+
+    def __init__(self, horizon: float = float("inf")):
+        self._heap: List[Tuple[float, int]] = []
+        self._due: Dict[int, float] = {}
+        # Items not loaded into the queue come due no earlier than this
+        self.horizon = horizon
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, question_id: int, due: float):
+        self._due[question_id] = due
+        heapq.heappush(self._heap, (due, question_id))
+        # Stale entries pile up as items are rescheduled; rebuild when they dominate
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(d, q) for q, d in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def next_due(self, now: float, limit: int) -> List[int]:
+        """Up to `limit` question ids due at `now`, soonest first"""
+        popped = []
+        result = []
+        while self._heap and len(result) < limit:
+            due, question_id = heapq.heappop(self._heap)
+            if self._due.get(question_id) != due:
+                continue  # stale entry
+            popped.append((due, question_id))
+            if due > now:
+                break
+            result.append(question_id)
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return result
+
+class ReviewScheduler:
+    """Per-user review queues cached in memory, backed by review_items"""
+
+    def __init__(
+        self,
+        max_users: int = REVIEW_CACHE_USERS,
+        ttl: float = REVIEW_CACHE_TTL_SECONDS,
+        queue_size: int = REVIEW_QUEUE_SIZE,
+    ):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.queue_size = queue_size
+        # user_id -> (queue, loaded_at); reloaded after ttl to pick up other workers' writes
+        self._queues: "OrderedDict[str, Tuple[ReviewQueue, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _queue(self, repo: Repository, user_id: str, reload: bool = False) -> ReviewQueue:
+        with self._lock:
+            cached = self._queues.get(user_id)
+            if cached is not None and not reload and time.monotonic() - cached[1] < self.ttl:
+                self._queues.move_to_end(user_id)
+                return cached[0]
+
+        # Only the soonest-due items - a long-time user can have thousands
+        rows = repo.review_schedule(user_id, self.queue_size)
+        horizon = _to_timestamp(rows[-1]["due_at"]) if len(rows) >= self.queue_size else float("inf")
+        queue = ReviewQueue(horizon)
+        for row in rows:
+            queue.schedule(row["question_id"], _to_timestamp(row["due_at"]))
+
+        with self._lock:
+            self._queues[user_id] = (queue, time.monotonic())
+            self._queues.move_to_end(user_id)
+            while len(self._queues) > self.max_users:
+                self._queues.popitem(last=False)
+        return queue
+
+    def record_attempts(self, repo: Repository, user_id: str, attempts: Iterable) -> bool:
+        """Reschedule every question in a saved game"""
+        attempts = list(attempts)
+        if not attempts:
+            return False
+
+        try:
+            question_ids = list({a.questionId for a in attempts})
+            states = {row["question_id"]: row for row in repo.review_states(user_id, question_ids)}
+
+            pace = get_pace_service()
+            now = time.time()
+            items: Dict[int, Dict] = {}
+            for attempt in attempts:
+                quality = answer_quality(
+                    attempt.isCorrect,
+                    attempt.timeSpent,
+                    pace.pace_targets(attempt.topic, attempt.difficulty)
+                )
+                state = sm2(items.get(attempt.questionId) or states.get(attempt.questionId, {}), quality, now)
+                state["topic"] = attempt.topic
+                state["difficulty"] = attempt.difficulty
+                items[attempt.questionId] = state
+
+            repo.save_review_items([
+                {
+                    "user_id": user_id,
+                    "question_id": question_id,
+                    "topic": state["topic"],
+                    "difficulty": state["difficulty"],
+                    "ease": state["ease"],
+                    "repetitions": state["repetitions"],
+                    "interval_days": state["interval_days"],
+                    "lapses": state["lapses"],
+                    "due_at": _to_iso(state["due"]),
+                    "updated_at": _to_iso(now),
+                }
+                for question_id, state in items.items()
+            ])
+
+            with self._lock:
+                cached = self._queues.get(user_id)
+            if cached is not None:
+                for question_id, state in items.items():
+                    cached[0].schedule(question_id, state["due"])
+            return True
+        except Exception as e:
+            print(f"Error scheduling reviews: {e}")
+            return False
+
+    def next_due(self, repo: Repository, user_id: str, limit: int = 10) -> List[int]:
+        """Question ids due for review now, most overdue first"""
+        now = time.time()
+        queue = self._queue(repo, user_id)
+        due = queue.next_due(now, limit)
+        if len(due) < limit and now >= queue.horizon:
+            # Past the horizon, items that weren't loaded may be due as well
+            due = self._queue(repo, user_id, reload=True).next_due(now, limit)
+        return due
+
+_review_scheduler: Optional[ReviewScheduler] = None
+
+def get_review_scheduler() -> ReviewScheduler:
+    """Get the per-worker review scheduler"""
+    global _review_scheduler
+    if _review_scheduler is None:
+        _review_scheduler = ReviewScheduler()
+    return _review_scheduler
@@ -0,0 +1,173 @@
+"""
+Live score feed - in-process pub/sub for spectators and leaderboards
+Saved games and live-session progress are published here and fanned out to
+SSE/WebSocket subscribers filtered by game and/or user. Each subscriber has a
+small bounded queue: updates for the same session coalesce into the latest
+one, and a client that falls behind loses the oldest events instead of
+growing memory. Subscribers only see games recorded on their own worker,
+and only their own events carry a userId.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from src.config import FEED_MAX_SUBSCRIBERS, FEED_QUEUE_SIZE
+from src.utils.metrics import REGISTRY
+from src.utils.serialization import dumps
+
+SUBSCRIBERS = REGISTRY.gauge("feed_subscribers", "Open live score feed subscriptions")
+EVENTS = REGISTRY.counter("feed_events_total", "Score events per subscriber by outcome", ("outcome",))
+
+class ScoreFeedError(Exception):
+    """Too many subscribers on this worker"""
+
+def score_event(
+    session_id: str,
+    user_id: str,
+    game_id: str,
+    score: Optional[int],
+    accuracy: float,
+    correct: int,
+    wrong: int,
+    max_streak: int,
+    final: bool,
+) -> Dict:
+    return {
+        "type": "score",
+        "sessionId": session_id,
+        "userId": user_id,
+        "gameId": game_id,
+        "score": score,
+        "accuracy": accuracy,
+        "correctAnswers": correct,
+        "wrongAnswers": wrong,
+        "maxStreak": max_streak,
+        "final": final,
+        "ts": time.time(),
+    }
+
+class Subscription:
+    __slots__ = ("game_id", "user_id", "viewer", "key", "pending", "dropped", "_size", "_waiter")
+
+    def __init__(self, game_id: Optional[str], user_id: Optional[str], size: int, viewer: Optional[str] = None):
+        self.game_id = game_id
+        self.user_id = user_id
+        # The subscribing user - the only one whose events it sees with a userId
+        self.viewer = viewer
+        # Indexed under its most selective filter
+        self.key = f"user:{user_id}" if user_id else f"game:{game_id}" if game_id else "*"
+        # sessionId -> latest encoded event, oldest first
+        self.pending: "OrderedDict[str, bytes]" = OrderedDict()
+        self.dropped = 0
+        self._size = size
+        self._waiter: Optional[asyncio.Future] = None
+
+    def matches(self, event: Dict) -> bool:
+        return (self.game_id is None or event["gameId"] == self.game_id) and (
+            self.user_id is None or event["userId"] == self.user_id
+        )
+
+    def push(self, key: str, data: bytes):
+        if key in self.pending:
+            EVENTS.inc(("coalesced",))
+            self.pending.move_to_end(key)
+        elif len(self.pending) >= self._size:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+            EVENTS.inc(("dropped",))
+        self.pending[key] = data
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def next_batch(self, timeout: float) -> List[bytes]:
+        """Encoded events pending, waiting up to `timeout` seconds for one ([] on timeout)"""
+        if not self.pending:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                return []
+            finally:
+                self._waiter = None
+
+        batch = list(self.pending.values())
+        self.pending.clear()
+        EVENTS.inc(("delivered",), len(batch))
+        if self.dropped:
+            batch.insert(0, dumps({"type": "dropped", "count": self.dropped}))
+            self.dropped = 0
+        return batch
+
+class ScoreFeed:
+    """Subscriptions of this worker, all served from its event loop"""
+
+    def __init__(self, queue_size: int = FEED_QUEUE_SIZE, max_subscribers: int = FEED_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(
+        self, game_id: Optional[str] = None, user_id: Optional[str] = None, viewer: Optional[str] = None
+    ) -> Subscription:
+        if self._count >= self.max_subscribers:
+            raise ScoreFeedError("Live feed is full on this server")
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(game_id, user_id, self.queue_size, viewer)
+        self._subscriptions.setdefault(subscription.key, set()).add(subscription)
+        self._count += 1
+        SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.key)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.key]
+        self._count -= 1
+        SUBSCRIBERS.dec()
+
+    def publish(self, event: Dict):
+        """Fan an event out to matching subscribers; safe to call from any thread"""
+        if not self._count or self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(event)
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, event)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def _deliver(self, event: Dict):
+        # Encoded once each: with the userId for its owner, without for everyone else
+        data = public = None
+        for key in ("*", f"game:{event['gameId']}", f"user:{event['userId']}"):
+            for subscription in self._subscriptions.get(key, ()):
+                if not subscription.matches(event):
+                    continue
+                if subscription.viewer == event["userId"]:
+                    if data is None:
+                        data = dumps(event)
+                    subscription.push(event["sessionId"], data)
+                else:
+                    if public is None:
+                        public = dumps({k: v for k, v in event.items() if k != "userId"})
+                    subscription.push(event["sessionId"], public)
+
+_score_feed: Optional[ScoreFeed] = None
+
+def get_score_feed() -> ScoreFeed:
+    global _score_feed
+    if _score_feed is None:
+        _score_feed = ScoreFeed()
+    return _score_feed
@@ -1,31 +1,30 @@
 """
-Supabase client for AI agent integration
-Provides high-level operations for the learning agent
+Database operations for AI agent integration
+Provides high-level operations for the learning agent on top of the
+configured repository (Supabase by default)
 """
 
-from supabase import Client
 from typing import List, Dict, Optional
 from datetime import datetime
-from src.utils.database import Database
+from src.repositories import Repository, get_repository
 
 class SupabaseAgentOps:
-    """Supabase operations for the AI learning agent"""
+    """Database operations for the AI learning agent"""
     
     @staticmethod
-    def _get_client() -> Client:
-        """Get Supabase client"""
-        return Database.get_client()
+    def _get_repository() -> Repository:
+        """Get the configured repository"""
+        return get_repository()
     
     @staticmethod
     def get_user_performance(user_id: str) -> Dict:
         """Get user performance stats from Supabase"""
         try:
-            supabase = SupabaseAgentOps._get_client()
+            repo = SupabaseAgentOps._get_repository()
             # Get user stats
-            stats_response = supabase.table('user_stats').select('*').eq('user_id', user_id).execute()
+            stats = repo.get_user_stats(user_id)
             
-            if stats_response.data and len(stats_response.data) > 0:
-                stats = stats_response.data[0]
+            if stats:
                 return {
                     "total_attempts": stats.get('total_questions_answered', 0),
                     "correct_answers": stats.get('total_correct', 0),
@@ -45,19 +44,18 @@ class SupabaseAgentOps:
     def get_topic_performance(user_id: str) -> Dict[str, Dict]:
         """Get performance breakdown by topic"""
         try:
-            supabase = SupabaseAgentOps._get_client()
-            # Get all question attempts for user
-            response = supabase.table('question_attempts').select(
-                'topic, is_correct, time_spent'
-            ).eq('user_id', user_id).execute()
+            repo = SupabaseAgentOps._get_repository()
+            # Per-topic totals of recent attempts (aggregated by the database), plus archived ones
+            totals = repo.user_topic_totals(user_id)
+            rollups = repo.attempt_rollups(user_id)
             
-            if not response.data:
+            if not totals and not rollups:
                 return {}
             
-            # Aggregate by topic
+            # Combine both tiers by topic
             topic_stats = {}
-            for attempt in response.data:
-                topic = attempt['topic']
+            for row in rollups + totals:
+                topic = row['topic']
                 if topic not in topic_stats:
                     topic_stats[topic] = {
                         'total': 0,
@@ -65,10 +63,9 @@ class SupabaseAgentOps:
                         'total_time': 0
                     }
                 
-                topic_stats[topic]['total'] += 1
-                if attempt['is_correct']:
-                    topic_stats[topic]['correct'] += 1
-                topic_stats[topic]['total_time'] += attempt.get('time_spent', 0)
+                topic_stats[topic]['total'] += row['attempts']
+                topic_stats[topic]['correct'] += row['correct'] or 0
+                topic_stats[topic]['total_time'] += row['time_spent'] or 0
             
             # Calculate percentages
             for topic in topic_stats:
@@ -87,7 +84,7 @@ class SupabaseAgentOps:
     def save_game_session(user_id: str, game_data: Dict) -> Optional[str]:
         """Save a game session to Supabase"""
         try:
-            supabase = SupabaseAgentOps._get_client()
+            repo = SupabaseAgentOps._get_repository()
             session_data = {
                 'user_id': user_id,
                 'game_id': game_data['game_type'],
@@ -99,10 +96,10 @@ class SupabaseAgentOps:
                 'average_response_time': game_data.get('avg_response_time', 0),
             }
             
-            response = supabase.table('game_sessions').insert(session_data).execute()
+            session = repo.create_session(session_data)
             
-            if response.data and len(response.data) > 0:
-                return response.data[0]['id']
+            if session:
+                return session['id']
             
             return None
             
@@ -117,11 +114,12 @@ class SupabaseAgentOps:
             return False
         
         try:
-            supabase = SupabaseAgentOps._get_client()
+            repo = SupabaseAgentOps._get_repository()
             attempt_data = []
             for attempt in attempts:
                 attempt_data.append({
                     'session_id': session_id,
+                    'user_id': user_id,
                     'question_id': attempt.get('question_id', 0),
                     'topic': attempt.get('topic', 'Unknown'),
                     'difficulty': attempt.get('difficulty', 'medium'),
@@ -130,7 +128,7 @@ class SupabaseAgentOps:
                 })
             
             if attempt_data:
-                supabase.table('question_attempts').insert(attempt_data).execute()
+                repo.insert_attempts(attempt_data)
                 return True
             
             return False
@@ -143,13 +141,12 @@ class SupabaseAgentOps:
     def update_user_stats(user_id: str, game_data: Dict) -> bool:
         """Update user statistics in Supabase"""
         try:
-            supabase = SupabaseAgentOps._get_client()
+            repo = SupabaseAgentOps._get_repository()
             # Get current stats
-            response = supabase.table('user_stats').select('*').eq('user_id', user_id).execute()
+            current = repo.get_user_stats(user_id)
             
-            if response.data and len(response.data) > 0:
+            if current:
                 # Update existing stats
-                current = response.data[0]
                 
                 new_total_games = current['total_games_played'] + 1
                 new_total_score = current['total_score'] + game_data['score']
@@ -168,7 +165,7 @@ class SupabaseAgentOps:
                     'updated_at': datetime.utcnow().isoformat(),
                 }
                 
-                supabase.table('user_stats').update(update_data).eq('user_id', user_id).execute()
+                repo.update_user_stats(user_id, update_data)
             else:
                 # Create new stats
                 accuracy = game_data['correct_answers'] / (game_data['correct_answers'] + game_data['wrong_answers']) if (game_data['correct_answers'] + game_data['wrong_answers']) > 0 else 0
@@ -183,7 +180,7 @@ class SupabaseAgentOps:
                     'overall_accuracy': accuracy,
                 }
                 
-                supabase.table('user_stats').insert(insert_data).execute()
+                repo.create_user_stats(insert_data)
             
             return True
             
@@ -0,0 +1,38 @@
+"""
+Container warm-up
+Creates the pooled database and LLM clients and opens their connections
+ahead of real traffic, without reading or writing any user data.
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+from src.config import OPENROUTER_API_KEY
+from src.repositories import get_repository
+
+async def warm_up(llm: bool = True) -> Dict[str, float]:
+    """Prime connections; returns milliseconds spent per dependency"""
+    timings = {}
+
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(get_repository().ping)
+        timings["database"] = round((time.perf_counter() - start) * 1000, 1)
+    except Exception as e:
+        print(f"Warm-up: database unavailable: {e}")
+
+    if llm and OPENROUTER_API_KEY:
+        start = time.perf_counter()
+        try:
+            # Also pays the deferred openai import now rather than on a user request
+            from src.services.agent import get_llm_client
+            # Cheapest authenticated endpoint - opens the pooled TLS connection
+            await get_llm_client().get("/key", cast_to=object)
+        except Exception as e:
+            # Any HTTP response (even an error) means the connection is open
+            if getattr(e, "status_code", None) is None:
+                print(f"Warm-up: LLM endpoint unavailable: {e}")
+        timings["llm"] = round((time.perf_counter() - start) * 1000, 1)
+
+    return timings
@@ -0,0 +1,27 @@
+"""
+Shared state - cache, rate-limit and lock primitives shared by all worker
+processes, selected by SHARED_STATE_BACKEND
+- local (default): SQLite file in shared memory at SHARED_STATE_PATH (one box)
+- redis: Redis-compatible server at REDIS_URL (several boxes)
+"""
+
+from typing import Optional
+
+from src.config import SHARED_STATE_BACKEND, SHARED_STATE_PATH
+from src.shared_state.base import RateLimited, SharedState
+
+_shared_state: Optional[SharedState] = None
+
+def get_shared_state() -> SharedState:
+    """Get the configured shared state backend (one connection per process)"""
+    global _shared_state
+    if _shared_state is None:
+        if SHARED_STATE_BACKEND == "local":
+            from src.shared_state.local_state import LocalSharedState
+            _shared_state = LocalSharedState(SHARED_STATE_PATH)
+        elif SHARED_STATE_BACKEND == "redis":
+            from src.shared_state.redis_state import RedisSharedState
+            _shared_state = RedisSharedState()
+        else:
+            raise ValueError(f"Unknown SHARED_STATE_BACKEND '{SHARED_STATE_BACKEND}' (expected local or redis)")
+    return _shared_state
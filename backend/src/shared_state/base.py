@@ -0,0 +1,112 @@
+"""
+Shared state interface - cache, rate-limit and lock primitives that every
+worker process sees, so N workers share one cache, one rate limit per
+upstream and one single-flight lock per key instead of N of each
+"""
+
+import secrets
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from src.utils.metrics import REGISTRY
+
+CACHE = REGISTRY.counter("shared_cache_total", "Shared cache lookups", ("outcome",))
+THROTTLED = REGISTRY.counter("shared_rate_limited_total", "Calls refused by a shared rate limit", ("bucket",))
+
+# How often waiters poll for a lock or for another worker's result
+_POLL_SECONDS = 0.05
+
+class RateLimited(Exception):
+    """No token left in a shared rate limit"""
+
+class SharedState(ABC):
+    """Keys are plain strings; values are bytes (callers encode)"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Value, or None if missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        """Store value for ttl seconds"""
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Store value only if the key is missing or expired; True if stored"""
+
+    @abstractmethod
+    def delete(self, key: str, value: Optional[bytes] = None) -> bool:
+        """Remove the key - with value, only while it still holds that value"""
+
+    @abstractmethod
+    def take(self, bucket: str, rate: float, burst: int, tokens: int = 1) -> bool:
+        """Take tokens from a bucket refilled at rate per second up to burst"""
+
+    def allow(self, bucket: str, rate: float, burst: int, tokens: int = 1) -> bool:
+        """take() that also counts refusals"""
+        if self.take(bucket, rate, burst, tokens):
+            return True
+        THROTTLED.inc((bucket,))
+        return False
+
+    @contextmanager
+    def lock(self, key: str, ttl: float = 30.0, wait: float = 0.0):
+        """Yields True if the lock was acquired within wait seconds
+
+        The lock expires after ttl so a worker that dies holding it can't
+        block the others for longer than that.
+        """
+        name = f"lock:{key}"
+        token = secrets.token_bytes(8)
+        deadline = time.monotonic() + wait
+        acquired = self.add(name, token, ttl)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(_POLL_SECONDS)
+            acquired = self.add(name, token, ttl)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.delete(name, token)
+
+    def get_or_compute(self, key: str, ttl: float, compute: Callable[[], Optional[bytes]], wait: float = 10.0) -> Optional[bytes]:
+        """Cached value, computed by one worker at a time (single-flight)
+
+        Workers that miss while another is computing wait up to wait seconds
+        for its result, then compute themselves. compute() may return None
+        for a result that shouldn't be cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            CACHE.inc(("hit",))
+            return value
+
+        with self.lock(key, ttl=wait) as leader:
+            if leader:
+                value = self.get(key)  # filled while we were acquiring
+                if value is None:
+                    CACHE.inc(("miss",))
+                    value = compute()
+                    if value is not None:
+                        self.set(key, value, ttl)
+                else:
+                    CACHE.inc(("hit",))
+                return value
+
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(_POLL_SECONDS)
+            computing = self.get(f"lock:{key}") is not None
+            value = self.get(key)
+            if value is not None:
+                CACHE.inc(("shared",))
+                return value
+            if not computing:
+                break  # the other worker finished without a cacheable result
+        CACHE.inc(("miss",))
+        value = compute()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
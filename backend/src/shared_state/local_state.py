@@ -0,0 +1,103 @@
+"""
+Local shared state - a SQLite file in shared memory (/dev/shm by default)
+Every worker process on the box opens the same file, so the cache, buckets
+and locks are shared without a server; each operation is one statement or
+one short write transaction.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from src.shared_state.base import SharedState
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+  key TEXT PRIMARY KEY,
+  value BLOB NOT NULL,
+  expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+  key TEXT PRIMARY KEY,
+  tokens REAL NOT NULL,
+  updated_at REAL NOT NULL
+);
+"""
+
+# Expired entries are swept after this many writes from a process
+_SWEEP_EVERY = 1000
+
+class LocalSharedState(SharedState):
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # The file lives in memory - durability settings only cost time
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("PRAGMA busy_timeout=2000")
+        self._conn.executescript(SCHEMA)
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl),
+            )
+            self._written()
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            # Replaces an expired entry; a live one makes this a no-op (rowcount 0)
+            stored = self._conn.execute(
+                "INSERT INTO entries (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE entries.expires_at <= ?",
+                (key, value, now + ttl, now),
+            ).rowcount
+            self._written()
+        return stored > 0
+
+    def delete(self, key: str, value: Optional[bytes] = None) -> bool:
+        with self._lock:
+            if value is None:
+                cursor = self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            else:
+                cursor = self._conn.execute("DELETE FROM entries WHERE key = ? AND value = ?", (key, value))
+        return cursor.rowcount > 0
+
+    def take(self, bucket: str, rate: float, burst: int, tokens: int = 1) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (bucket,)).fetchone()
+                available = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+                allowed = available >= tokens
+                if allowed:
+                    available -= tokens
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (bucket, available, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return allowed
+
+    def _written(self):
+        # Called with self._lock held
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
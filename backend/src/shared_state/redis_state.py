@@ -0,0 +1,78 @@
+"""
+Redis shared state - any Redis-compatible server at REDIS_URL, for workers
+spread over several boxes. Only plain commands are used (GET, SET PX/NX,
+DEL, INCRBY, PEXPIRE) so managed Redis, KeyDB, Valkey and the local stand-in
+in loadtest/stub_redis.py all work.
+
+Rate limits are fixed windows of burst/rate seconds - an approximation of
+the local token bucket that needs no server-side scripting. If the server is
+unreachable its breaker opens and operations fail open: cache misses, locks
+and tokens granted, so requests degrade to per-worker behaviour.
+"""
+
+import time
+from typing import Callable, Optional, TypeVar
+
+from src.config import REDIS_URL, SHARED_STATE_PREFIX, SHARED_STATE_TIMEOUT_SECONDS
+from src.shared_state.base import SharedState
+from src.utils.resilience import CircuitOpenError, get_breaker
+
+T = TypeVar("T")
+
+class RedisSharedState(SharedState):
+    def __init__(self, url: str = REDIS_URL, prefix: str = SHARED_STATE_PREFIX):
+        import redis  # deferred: only this backend uses it
+
+        self._errors = (redis.RedisError, OSError)
+        self._client = redis.Redis.from_url(
+            url,
+            protocol=2,
+            socket_timeout=SHARED_STATE_TIMEOUT_SECONDS,
+            socket_connect_timeout=SHARED_STATE_TIMEOUT_SECONDS,
+        )
+        self._prefix = prefix
+        self._breaker = get_breaker("redis")
+
+    def _run(self, operation: Callable[[], T], fallback: T) -> T:
+        try:
+            with self._breaker.guard():
+                return operation()
+        except CircuitOpenError:
+            return fallback
+        except self._errors as e:
+            print(f"Shared state unavailable: {e}")
+            return fallback
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._run(lambda: self._client.get(self._prefix + key), None)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._run(lambda: self._client.set(self._prefix + key, value, px=max(1, int(ttl * 1000))), None)
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return self._run(
+            lambda: bool(self._client.set(self._prefix + key, value, px=max(1, int(ttl * 1000)), nx=True)),
+            True,
+        )
+
+    def delete(self, key: str, value: Optional[bytes] = None) -> bool:
+        def operation() -> bool:
+            name = self._prefix + key
+            # Not atomic: a lock that expires between the two commands and is
+            # taken by another worker can be released early
+            if value is not None and self._client.get(name) != value:
+                return False
+            return self._client.delete(name) > 0
+        return self._run(operation, False)
+
+    def take(self, bucket: str, rate: float, burst: int, tokens: int = 1) -> bool:
+        window = burst / rate
+        name = f"{self._prefix}rate:{bucket}:{int(time.time() // window)}"
+
+        def operation() -> bool:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.incrby(name, tokens)
+            pipe.pexpire(name, max(1, int(window * 2000)))
+            used, _ = pipe.execute()
+            return used <= burst
+        return self._run(operation, True)
@@ -2,53 +2,64 @@
 Database connection and utilities
 """
 
-from supabase import create_client, Client
-import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+from src.config import SUPABASE_ANON_KEY, SUPABASE_SERVICE_KEY, SUPABASE_TIMEOUT_SECONDS, SUPABASE_URL
+from src.utils.http import pooled_client
+from src.utils.query_log import TracedClient
+from src.utils.resilience import get_breaker
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 class Database:
     """Singleton database connection"""
-    _instance: Optional[Client] = None
+    _instance: Optional["Client"] = None
     
     @classmethod
-    def get_client(cls) -> Client:
+    def get_client(cls) -> "Client":
         """Get or create Supabase client for database operations"""
         if cls._instance is None:
-            # Load from .env file in backend directory
-            env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
-            if os.path.exists(env_path):
-                from dotenv import load_dotenv
-                load_dotenv(env_path)
+            # supabase is imported here so cold starts that never touch it skip the import
+            from supabase import ClientOptions, create_client
             
-            supabase_url = os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
             # For authentication operations, we can use anon key
             # For database operations with RLS, service role key bypasses RLS
             # Prefer service role key if available, otherwise use anon key
-            supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+            supabase_key = SUPABASE_SERVICE_KEY or SUPABASE_ANON_KEY
             
-            if not supabase_url or not supabase_key:
+            if not SUPABASE_URL or not supabase_key:
                 raise ValueError(
                     "Supabase URL and Key are required. "
                     "Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (or NEXT_PUBLIC_SUPABASE_ANON_KEY) in backend/.env"
                 )
             
-            cls._instance = create_client(supabase_url, supabase_key)
+            try:
+                # Long-lived pool so warm invocations reuse the TLS connection
+                options = ClientOptions(httpx_client=pooled_client(timeout=SUPABASE_TIMEOUT_SECONDS))
+            except TypeError:
+                # older supabase releases build their own client
+                options = ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT_SECONDS)
+            
+            # Every .execute() is attributed to the current request (see query_log) and
+            # fails fast while Supabase is down (see resilience)
+            cls._instance = TracedClient(create_client(SUPABASE_URL, supabase_key, options), get_breaker("supabase"))
         
         return cls._instance
     
     @classmethod
-    def get_auth_client(cls) -> Client:
+    def get_auth_client(cls) -> "Client":
         """Get Supabase client specifically for authentication operations"""
+        from supabase import create_client
+        
         # For auth operations, we should use anon key to respect RLS
-        supabase_url = os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-        supabase_key = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY") or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        supabase_key = SUPABASE_ANON_KEY or SUPABASE_SERVICE_KEY
         
-        if not supabase_url or not supabase_key:
+        if not SUPABASE_URL or not supabase_key:
             raise ValueError("Supabase URL and Key are required for authentication")
         
-        return create_client(supabase_url, supabase_key)
+        return create_client(SUPABASE_URL, supabase_key)
 
-def get_db() -> Client:
+def get_db() -> "Client":
     """Dependency for FastAPI routes"""
     return Database.get_client()
-
@@ -0,0 +1,29 @@
+"""
+Pooled HTTP clients for Supabase, OpenRouter and health probes
+httpx drops idle connections after 5s by default; keeping them for
+HTTP_KEEPALIVE_SECONDS lets a warm serverless container reuse its TLS
+sessions across invocations.
+"""
+
+from src.config import HTTP_KEEPALIVE_SECONDS, HTTP_MAX_CONNECTIONS
+
+def pool_limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+    )
+
+def pooled_client(timeout: float = 120.0):
+    """httpx client configured like the one supabase builds for PostgREST, with our pool"""
+    import httpx
+
+    return httpx.Client(limits=pool_limits(), timeout=timeout, follow_redirects=True, http2=True)
+
+def pooled_async_client(timeout: float = 120.0):
+    """Async counterpart of pooled_client, for calls made on the event loop"""
+    import httpx
+
+    return httpx.AsyncClient(limits=pool_limits(), timeout=timeout, http2=True)
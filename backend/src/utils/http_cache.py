@@ -0,0 +1,40 @@
+"""
+ETag helpers for cacheable responses
+ETags are strong (byte-identical bodies). The compression middleware tags
+encoded variants as "<etag>-gzip" / "<etag>-br", so matching ignores those
+suffixes.
+"""
+
+import hashlib
+from typing import Optional
+
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the `encoding`-compressed variant of a response"""
+    if etag.startswith('"') and etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+def _strip(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)]
+    return tag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _strip(etag)
+    return any(_strip(tag) == target for tag in if_none_match.split(","))
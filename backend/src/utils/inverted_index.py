@@ -0,0 +1,220 @@
+"""
+In-memory inverted index with BM25 ranking
+Postings are blocks of delta-encoded doc ids stored in the narrowest array
+type that fits (plus a byte per term frequency), so a posting costs ~2-3
+bytes instead of a Python int in a list. Documents can be added at any time;
+doc ids only grow, so new postings are appended to each term's open block.
+"""
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Postings per sealed block - the unit of decoding and skipping
+BLOCK_SIZE = 128
+MAX_TF = 255
+MAX_LENGTH = 65535
+# Documents re-ranked per result once a search's postings budget is spent
+RERANK_FACTOR = 20
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+def _narrowest(values: List[int]) -> array:
+    top = max(values, default=0)
+    return array("B" if top < 1 << 8 else "H" if top < 1 << 16 else "I", values)
+
+class Postings:
+    """Doc ids and term frequencies of one term
+
+    Sealed blocks keep their first doc id in `starts` (for bisecting), the
+    gaps to the following ids, the frequencies, and the largest frequency
+    and shortest document in the block (for block-max score bounds).
+    """
+
+    __slots__ = ("count", "starts", "blocks", "tail_docs", "tail_tfs")
+
+    def __init__(self):
+        self.count = 0
+        self.starts: Optional[array] = None
+        self.blocks: Optional[List[Tuple[array, array, int, int]]] = None
+        self.tail_docs = array("I")
+        self.tail_tfs = array("B")
+
+    def append(self, doc: int, tf: int, lengths: array):
+        self.tail_docs.append(doc)
+        self.tail_tfs.append(min(tf, MAX_TF))
+        self.count += 1
+        if len(self.tail_docs) == BLOCK_SIZE:
+            self._seal(lengths)
+
+    def _seal(self, lengths: array):
+        docs, tfs = self.tail_docs, self.tail_tfs
+        if self.blocks is None:
+            self.starts, self.blocks = array("I"), []
+        self.starts.append(docs[0])
+        gaps = _narrowest([b - a for a, b in zip(docs, docs[1:])])
+        self.blocks.append((gaps, tfs, max(tfs), min(lengths[d] for d in docs)))
+        self.tail_docs, self.tail_tfs = array("I"), array("B")
+
+    def chunks(self) -> Iterator[Tuple[Iterator[int], array, int, int]]:
+        """(doc ids, tfs, max tf, shortest length or -1 if unknown) per block, tail last"""
+        if self.blocks:
+            for start, (gaps, tfs, max_tf, min_length) in zip(self.starts, self.blocks):
+                yield accumulate(gaps, initial=start), tfs, max_tf, min_length
+        if self.tail_docs:
+            yield iter(self.tail_docs), self.tail_tfs, MAX_TF, -1
+
+    def find(self, docs: List[int]) -> Iterator[Tuple[int, int]]:
+        """(doc, tf) for the sorted docs that contain the term, decoding only their blocks"""
+        tail_start = self.tail_docs[0] if self.tail_docs else None
+        tail = dict(zip(self.tail_docs, self.tail_tfs)) if tail_start is not None else {}
+        block, decoded = -1, {}
+        for doc in docs:
+            if tail_start is not None and doc >= tail_start:
+                tf = tail.get(doc)
+            else:
+                i = bisect_right(self.starts, doc) - 1 if self.starts else -1
+                if i < 0:
+                    continue
+                if i != block:
+                    gaps, tfs, _, _ = self.blocks[i]
+                    block, decoded = i, dict(zip(accumulate(gaps, initial=self.starts[i]), tfs))
+                tf = decoded.get(doc)
+            if tf:
+                yield doc, tf
+
+class BM25Index:
+    """Documents are numbered 0, 1, ... in the order they are added"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms: Dict[str, Postings] = {}
+        self.lengths = array("H")
+        self.total_length = 0
+        self.deleted = set()
+
+    def __len__(self) -> int:
+        return len(self.lengths) - len(self.deleted)
+
+    def add(self, text: str) -> int:
+        """Index a document; returns its doc id"""
+        doc = len(self.lengths)
+        tokens = tokenize(text)
+        self.lengths.append(min(len(tokens), MAX_LENGTH))
+        self.total_length += len(tokens)
+        for term, tf in Counter(tokens).items():
+            postings = self.terms.get(term)
+            if postings is None:
+                postings = self.terms[term] = Postings()
+            postings.append(doc, tf, self.lengths)
+        return doc
+
+    def delete(self, doc: int):
+        """Hide a document from results (its postings stay until the index is rebuilt)"""
+        self.deleted.add(doc)
+
+    def idf(self, count: int) -> float:
+        n = len(self.lengths)
+        return math.log(1 + (n - count + 0.5) / (count + 0.5))
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        accept: Optional[Callable[[int], bool]] = None,
+        max_postings: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """Top k (doc, score) by BM25, best first
+
+        Exact top k with two kinds of pruning. Terms are scored rarest first,
+        and once the best possible total of the remaining terms can't reach
+        the current k-th score, those terms only update documents already
+        found. Blocks whose best possible score can't reach it are skipped.
+
+        Queries of only very common words can still touch most postings.
+        With max_postings, scanning stops after about that many and the
+        remaining terms just re-rank the best RERANK_FACTOR * k documents
+        found so far (approximate, but bounded).
+        """
+        if not self.lengths:
+            return []
+        k1 = self.k1
+        # Length normalisation tf / (tf + norm_a + norm_b * length)
+        norm_a = k1 * (1 - self.b)
+        norm_b = k1 * self.b * len(self.lengths) / max(self.total_length, 1)
+        lengths = self.lengths
+
+        terms = sorted(
+            ((self.idf(p.count), p) for p in (self.terms.get(t) for t in set(tokenize(query))) if p),
+            key=lambda term: -term[0],
+        )
+        bounds = [idf * (k1 + 1) for idf, _ in terms]
+        remaining = list(accumulate(reversed(bounds)))[::-1] + [0.0]
+        total_bound = remaining[0] if terms else 0.0
+
+        scores: Dict[int, float] = {}
+        rejected = set(self.deleted)
+        threshold = 0.0
+        scanned = 0
+        for i, (idf, postings) in enumerate(terms):
+            over_budget = max_postings is not None and scanned >= max_postings and len(scores) >= k
+            if over_budget or (len(scores) >= k and remaining[i] < threshold):
+                # No unseen document can make the top k any more (or the scan budget is spent)
+                for idf, postings in terms[i:]:
+                    if max_postings is not None and scanned >= max_postings and len(scores) > k * RERANK_FACTOR:
+                        scores = dict(heapq.nlargest(k * RERANK_FACTOR, scores.items(), key=lambda item: item[1]))
+                    candidates = sorted(scores)
+                    scanned += min(postings.count, len(candidates) * BLOCK_SIZE)
+                    weight = idf * (k1 + 1)
+                    for doc, tf in postings.find(candidates):
+                        scores[doc] += weight * tf / (tf + norm_a + norm_b * lengths[doc])
+                break
+
+            weight = idf * (k1 + 1)
+            others = total_bound - bounds[i]
+            # The first term's scores are final for that term, so a heap of them gives a live threshold
+            heap: Optional[List[float]] = [] if i == 0 else None
+            for docs, tfs, max_tf, min_length in postings.chunks():
+                if max_postings is not None and scanned >= max_postings and len(scores) >= k:
+                    break
+                scanned += len(tfs)
+                if min_length >= 0 and threshold > 0:
+                    if weight * max_tf / (max_tf + norm_a + norm_b * min_length) + others < threshold:
+                        continue
+                for doc, tf in zip(docs, tfs):
+                    if doc in rejected:
+                        continue
+                    if doc not in scores and accept is not None and not accept(doc):
+                        rejected.add(doc)
+                        continue
+                    score = scores.get(doc, 0.0) + weight * tf / (tf + norm_a + norm_b * lengths[doc])
+                    scores[doc] = score
+                    if heap is not None:
+                        if len(heap) < k:
+                            heapq.heappush(heap, score)
+                        elif score > heap[0]:
+                            heapq.heapreplace(heap, score)
+                        if len(heap) == k:
+                            threshold = heap[0]
+            if heap is None and len(scores) >= k:
+                threshold = heapq.nlargest(k, scores.values())[-1]
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the postings arrays"""
+        total = self.lengths.itemsize * len(self.lengths)
+        for postings in self.terms.values():
+            total += len(postings.tail_docs) * 4 + len(postings.tail_tfs)
+            for gaps, tfs, _, _ in postings.blocks or ():
+                total += gaps.itemsize * len(gaps) + len(tfs) + 4
+        return total
@@ -0,0 +1,132 @@
+"""
+Database round-trip accounting
+Every query is attributed to the current request through a context variable,
+so a request's call count, time and slow queries can be reported together.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from src.config import SLOW_QUERY_MS
+from src.utils.metrics import REGISTRY
+
+QUERIES = REGISTRY.counter("db_queries_total", "Database round trips", ("table", "operation"))
+QUERY_LATENCY = REGISTRY.histogram("db_query_duration_seconds", "Database round-trip latency", ("table", "operation"))
+SLOW_QUERIES = REGISTRY.counter("db_slow_queries_total", "Database round trips over SLOW_QUERY_MS", ("table", "operation"))
+
+# Per-request breakdown keeps at most this many (table, operation) pairs
+MAX_TRACKED_QUERIES = 64
+
+class RequestQueries:
+    """Queries made while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.rows = 0
+        self.duration_ms = 0.0
+        self.by_kind: Dict[Tuple[str, str], int] = {}
+
+    def add(self, table: str, operation: str, rows: int, duration_ms: float):
+        self.count += 1
+        self.rows += rows
+        self.duration_ms += duration_ms
+        key = (table, operation)
+        if key in self.by_kind or len(self.by_kind) < MAX_TRACKED_QUERIES:
+            self.by_kind[key] = self.by_kind.get(key, 0) + 1
+
+    def summary(self) -> str:
+        """e.g. 'question_attempts.select x3, user_stats.update x1'"""
+        return ", ".join(f"{t}.{op} x{n}" for (t, op), n in sorted(self.by_kind.items(), key=lambda kv: -kv[1]))
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+def start_request() -> RequestQueries:
+    """Start attributing queries in this context to a new request"""
+    queries = RequestQueries()
+    _current.set(queries)
+    return queries
+
+def current_request() -> Optional[RequestQueries]:
+    return _current.get()
+
+def record_query(table: str, operation: str, rows: int, duration_ms: float):
+    """Account one round trip to the current request (if any) and to the metrics"""
+    queries = _current.get()
+    if queries is not None:
+        queries.add(table, operation, rows, duration_ms)
+
+    labels = (table, operation)
+    QUERIES.inc(labels)
+    QUERY_LATENCY.observe(labels, duration_ms / 1000)
+    if duration_ms >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(labels)
+        print(f"Slow query: {operation} {table} took {duration_ms:.0f}ms ({rows} rows)")
+
+def _is_outage(error: BaseException) -> bool:
+    """Timeouts and connection failures; PostgREST errors mean the database answered"""
+    import httpx
+
+    return isinstance(error, (httpx.TransportError, TimeoutError))
+
+class _TracedBuilder:
+    """Proxy for a PostgREST request builder that times .execute()"""
+
+    OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+    def __init__(self, builder, table: str, operation: str = "select", breaker=None):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._breaker = breaker
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+        operation = name if name in self.OPERATIONS else self._operation
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # Builders chain (.select().eq().limit()); keep wrapping until .execute()
+            if hasattr(result, "execute"):
+                return _TracedBuilder(result, self._table, operation, self._breaker)
+            return result
+
+        return call
+
+    def execute(self):
+        start = time.perf_counter()
+        rows = 0
+        try:
+            if self._breaker is None:
+                result = self._builder.execute()
+            else:
+                with self._breaker.guard(_is_outage):
+                    result = self._builder.execute()
+            data = getattr(result, "data", None)
+            rows = len(data) if isinstance(data, list) else int(data is not None)
+            return result
+        finally:
+            record_query(self._table, self._operation, rows, (time.perf_counter() - start) * 1000)
+
+class TracedClient:
+    """Supabase client whose table queries are accounted with record_query
+    (and go through `breaker`, a resilience.CircuitBreaker, when given)"""
+
+    def __init__(self, client, breaker=None):
+        self._client = client
+        self._breaker = breaker
+
+    def table(self, name: str) -> _TracedBuilder:
+        return _TracedBuilder(self._client.table(name), name, breaker=self._breaker)
+
+    def from_(self, name: str) -> _TracedBuilder:
+        return _TracedBuilder(self._client.from_(name), name, breaker=self._breaker)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, *args, **kwargs) -> _TracedBuilder:
+        return _TracedBuilder(self._client.rpc(fn, params or {}, *args, **kwargs), fn, "rpc", self._breaker)
+
+    def __getattr__(self, name):
+        # auth, storage, ... pass straight through
+        return getattr(self._client, name)
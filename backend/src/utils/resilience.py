@@ -0,0 +1,154 @@
+"""
+Circuit breakers and request latency budgets for outbound calls
+A breaker opens after BREAKER_FAILURE_THRESHOLD consecutive failures and
+fails calls fast for BREAKER_RESET_SECONDS, then lets a single probe through
+(half-open) whose outcome closes or re-opens it. A request's latency budget
+lives in a context variable - it follows the request into tasks and worker
+threads - so each outbound call can cap its timeout at the time left.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+from src.config import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS
+from src.utils.metrics import REGISTRY
+
+STATE = REGISTRY.gauge("circuit_breaker_state", "0 closed, 1 half-open, 2 open", ("dependency",))
+REJECTED = REGISTRY.counter("circuit_breaker_rejections_total", "Calls failed fast by an open breaker", ("dependency",))
+OPENED = REGISTRY.counter("circuit_breaker_opened_total", "Times a breaker opened", ("dependency",))
+
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+class CircuitOpenError(Exception):
+    """Dependency is failing - call not attempted"""
+
+class BudgetExceeded(Exception):
+    """Not enough of the request's latency budget left for the call"""
+
+def _always(error: BaseException) -> bool:
+    return True
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Whether a call now would be attempted"""
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_seconds
+        return not (self.state == HALF_OPEN and self._probing)
+
+    def _set_state(self, state: int):
+        self.state = state
+        STATE.set((self.name,), state)
+
+    def before_call(self):
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+                self._probing = False
+            if self.state == OPEN or (self.state == HALF_OPEN and self._probing):
+                REJECTED.inc((self.name,))
+                raise CircuitOpenError(f"{self.name} is unavailable")
+            if self.state == HALF_OPEN:
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                print(f"Circuit {self.name} closed")
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                print(f"Circuit {self.name} opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+                OPENED.inc((self.name,))
+
+    def release(self):
+        """Call ended without a verdict (cancelled, or cut short by the caller's budget)"""
+        with self._lock:
+            self._probing = False
+
+    @contextmanager
+    def guard(self, is_failure: Callable[[BaseException], bool] = _always):
+        """Run the block through the breaker; errors where is_failure(e) is false
+        mean the dependency did answer (e.g. a 4xx) and count as success"""
+        self.before_call()
+        try:
+            yield
+        except (BudgetExceeded, TimeoutError) as e:
+            if isinstance(e, BudgetExceeded):
+                self.release()
+            elif is_failure(e):
+                self.record_failure()
+            raise
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record_success()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+# Absolute time.monotonic() deadline of the current request, if it has a budget
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+@contextmanager
+def latency_budget(seconds: Optional[float]):
+    """Give the block (and anything it calls) a deadline `seconds` from now"""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+def timeout_for(default: float) -> float:
+    """`default` capped at the remaining budget; raises BudgetExceeded when none is left"""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise BudgetExceeded("Latency budget exhausted")
+    return min(default, left)
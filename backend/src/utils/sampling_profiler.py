@@ -0,0 +1,127 @@
+"""
+Wall-clock sampling profiler for individual asyncio requests
+One daemon thread samples every active profile each interval, and only while
+there is one. A sample is the request's live stack when its task is running
+on the event loop thread; otherwise it is the task's suspended await chain,
+ending in what it is waiting on (e.g. [await FutureIter] for a worker thread
+or network call). Stacks start below a root frame (the profiling middleware)
+and are written in the folded format flamegraph.pl, inferno and speedscope read.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_labels: Dict[object, str] = {}
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_ROOT_DIR):
+        return os.path.relpath(filename, _ROOT_DIR)
+    marker = filename.rfind("site-packages" + os.sep)
+    if marker >= 0:
+        return filename[marker + len("site-packages") + 1:]
+    return os.path.basename(filename)
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        name = getattr(code, "co_qualname", code.co_name)
+        # ';' separates frames in the folded format
+        label = _labels[code] = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+    return label
+
+def running_stack(frame, root) -> Optional[Tuple[str, ...]]:
+    """Frames below root on a thread's current stack, outermost first (None if root isn't on it)"""
+    labels: List[str] = []
+    while frame is not None:
+        if frame is root:
+            return tuple(reversed(labels))
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return None
+
+def awaiting_stack(coro, root) -> Tuple[str, ...]:
+    """Frames below root along a suspended coroutine's await chain, plus what it awaits"""
+    labels: List[str] = []
+    inside = False
+    awaited = coro
+    while awaited is not None:
+        frame = getattr(awaited, "cr_frame", None) or getattr(awaited, "gi_frame", None) or getattr(awaited, "ag_frame", None)
+        if frame is None:
+            if inside:
+                labels.append(f"[await {type(awaited).__name__}]")
+            break
+        if inside:
+            labels.append(_label(frame.f_code))
+        elif frame is root:
+            inside = True
+        awaited = getattr(awaited, "cr_await", None) or getattr(awaited, "gi_yieldfrom", None) or getattr(awaited, "ag_await", None)
+    return tuple(labels)
+
+class Profile:
+    """Samples of one request"""
+
+    def __init__(self, task, root, thread_id: int, max_seconds: float):
+        self.task = task
+        self.root = root
+        self.thread_id = thread_id
+        self.deadline = time.monotonic() + max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def sample(self, frames: Dict[int, object]):
+        frame = frames.get(self.thread_id)
+        stack = running_stack(frame, self.root) if frame is not None else None
+        if stack is None:
+            stack = awaiting_stack(self.task.get_coro(), self.root)
+        if stack:
+            self.stacks[stack] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """One 'frame;frame;frame count' line per distinct stack"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+class Sampler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: List[Profile] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, task, root, max_seconds: float) -> Profile:
+        profile = Profile(task, root, threading.get_ident(), max_seconds)
+        with self._lock:
+            self._active.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def stop(self, profile: Profile):
+        with self._lock:
+            if profile in self._active:
+                self._active.remove(profile)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # Past their deadline, profiles keep what they have
+                self._active = [p for p in self._active if p.deadline > now]
+                if not self._active:
+                    self._thread = None
+                    return
+                active = list(self._active)
+            frames = sys._current_frames()
+            for profile in active:
+                try:
+                    profile.sample(frames)
+                except Exception:
+                    pass  # the chain changed under us - skip this sample
+            del frames
+            time.sleep(self.interval)
@@ -0,0 +1,48 @@
+"""
+Fast JSON responses (FAST_JSON=true)
+Data the app built itself is encoded with orjson and not validated at all;
+database rows are validated once through precompiled TypeAdapters and encoded
+by pydantic-core (faster than dumping to dicts for orjson). Routes return a
+Response directly, so FastAPI skips response_model re-validation.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+from src.models.schemas import AttemptHistoryItem, GameSessionResponse, UserStatsResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # fall back to pydantic-core's encoder
+
+USER_STATS = TypeAdapter(UserStatsResponse)
+SESSIONS = TypeAdapter(List[GameSessionResponse])
+HISTORY = TypeAdapter(List[AttemptHistoryItem])
+_ANY = TypeAdapter(Any)
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return _ANY.dump_json(content)
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def trusted_response(content: Any, headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """Data the app constructed itself - already the right shape, encode as is"""
+    return FastJSONResponse(content, headers=headers)
+
+def validated_response(adapter: TypeAdapter, data: Any) -> Response:
+    """Untrusted data (database rows) - validate once, drop unknown fields, encode"""
+    return Response(adapter.dump_json(adapter.validate_python(data)), media_type="application/json")
@@ -0,0 +1,173 @@
+"""
+Mergeable t-digest for streaming quantile estimates
+Used to summarize response times without keeping every sample
+"""
+
+import math
+from typing import Dict, List, Optional
+
+class TDigest:
+    """Merging t-digest (k1 scale function)
+
+    Keeps at most ~compression centroids, so memory and lookup cost are
+    bounded no matter how many samples were added. Two digests can be
+    merged, which lets each worker keep its own and combine on flush.
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.total_weight = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._buffer: List[tuple] = []
+        self._buffer_limit = int(compression * 5)
+
+    def __len__(self) -> int:
+        return int(self.total_weight + sum(w for _, w in self._buffer))
+
+    def add(self, value: float, weight: float = 1.0):
+        """Add a sample"""
+        value = float(value)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self._buffer.append((value, weight))
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        """Merge another digest into this one"""
+        other._compress()
+        if not other.means:
+            return
+        self._buffer.extend(zip(other.means, other.weights))
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression * math.asin(2 * q - 1) / (2 * math.pi)
+
+    def _k_inv(self, k: float) -> float:
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+
+        items = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in items)
+
+        means: List[float] = []
+        weights: List[float] = []
+        cur_mean, cur_weight = items[0]
+        weight_so_far = 0.0
+        q_limit = self._k_inv(self._k(0.0) + 1)
+
+        for mean, weight in items[1:]:
+            if (weight_so_far + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                weight_so_far += cur_weight
+                q_limit = self._k_inv(self._k(min(weight_so_far / total, 1.0)) + 1)
+                cur_mean, cur_weight = mean, weight
+
+        means.append(cur_mean)
+        weights.append(cur_weight)
+
+        self.means = means
+        self.weights = weights
+        self.total_weight = total
+
+    def _centers(self) -> List[float]:
+        """Cumulative weight at the center of each centroid"""
+        centers = []
+        cumulative = 0.0
+        for weight in self.weights:
+            centers.append(cumulative + weight / 2)
+            cumulative += weight
+        return centers
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the value at quantile q (0..1)"""
+        self._compress()
+        if not self.means:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        target = q * self.total_weight
+        centers = self._centers()
+
+        if target <= centers[0]:
+            return _lerp(self.min, self.means[0], target / centers[0])
+        if target >= centers[-1]:
+            tail = self.total_weight - centers[-1]
+            return _lerp(self.means[-1], self.max, (target - centers[-1]) / tail if tail else 1.0)
+
+        for i in range(1, len(centers)):
+            if target < centers[i]:
+                span = centers[i] - centers[i - 1]
+                return _lerp(self.means[i - 1], self.means[i], (target - centers[i - 1]) / span)
+
+        return self.max
+
+    def quantiles(self, points: List[float]) -> List[Optional[float]]:
+        """Estimate several quantiles at once"""
+        return [self.quantile(q) for q in points]
+
+    def cdf(self, value: float) -> float:
+        """Estimate the fraction of samples <= value"""
+        self._compress()
+        if not self.means:
+            return 0.0
+        if value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+
+        centers = self._centers()
+        positions = [0.0] + centers + [self.total_weight]
+        values = [self.min] + self.means + [self.max]
+
+        for i in range(1, len(values)):
+            if value < values[i]:
+                span = values[i] - values[i - 1]
+                fraction = (value - values[i - 1]) / span if span else 1.0
+                return _lerp(positions[i - 1], positions[i], fraction) / self.total_weight
+
+        return 1.0
+
+    def to_dict(self) -> Dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "means": self.means,
+            "weights": self.weights,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TDigest":
+        digest = cls(compression=data.get("compression", 100.0))
+        digest.means = list(data.get("means", []))
+        digest.weights = list(data.get("weights", []))
+        digest.total_weight = sum(digest.weights)
+        digest.min = data.get("min")
+        digest.max = data.get("max")
+        return digest
+
+def _lerp(a: float, b: float, t: float) -> float:
+    return a + (b - a) * t
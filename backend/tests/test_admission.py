@@ -0,0 +1,123 @@
+"""Admission control: queue_full and timeout rejections, and slot hand-over to waiters"""
+
+import asyncio
+
+import pytest
+
+from src.services.admission import AdmissionController, AdmissionRejected
+
+def controller(**limits) -> AdmissionController:
+    options = {"max_concurrency": 1, "max_per_user": 10, "queue_size": 1, "timeout": 1.0}
+    options.update(limits)
+    return AdmissionController("test", **options)
+
+async def hold(admission: AdmissionController, key, release: asyncio.Event, log: list):
+    async with admission.admit(key):
+        log.append(key)
+        await release.wait()
+
+def test_queue_full():
+    async def scenario():
+        admission = controller()
+        release = asyncio.Event()
+        log = []
+        running = asyncio.create_task(hold(admission, "a", release, log))
+        queued = asyncio.create_task(hold(admission, "b", release, log))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.admit("c"):
+                pass
+        assert rejected.value.reason == "queue_full"
+        assert rejected.value.retry_after == admission.timeout
+
+        release.set()
+        await asyncio.gather(running, queued)
+        assert log == ["a", "b"]
+
+    asyncio.run(scenario())
+
+def test_timeout():
+    async def scenario():
+        admission = controller(timeout=0.05)
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(admission, "a", release, []))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.admit("b"):
+                pass
+        assert rejected.value.reason == "timeout"
+        # The timed-out waiter left the queue and its caller count
+        assert not admission._waiters
+        assert "b" not in admission._per_user
+
+        release.set()
+        await running
+        assert admission._active == 0 and not admission._per_user
+
+    asyncio.run(scenario())
+
+def test_hand_over_in_fifo_order():
+    async def scenario():
+        admission = controller(queue_size=3)
+        releases = {key: asyncio.Event() for key in "abcd"}
+        log = []
+        tasks = {key: asyncio.create_task(hold(admission, key, releases[key], log)) for key in "abcd"}
+        await asyncio.sleep(0)
+        assert log == ["a"] and len(admission._waiters) == 3
+
+        # Each finished call passes its slot straight to the oldest waiter
+        for done, following in zip("abc", "bcd"):
+            releases[done].set()
+            await tasks[done]
+            await asyncio.sleep(0)
+            assert log[-1] == following
+            assert admission._active == 1
+
+        releases["d"].set()
+        await tasks["d"]
+        assert admission._active == 0 and not admission._waiters
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_is_skipped():
+    async def scenario():
+        admission = controller(queue_size=2)
+        release = asyncio.Event()
+        log = []
+        running = asyncio.create_task(hold(admission, "a", release, log))
+        cancelled = asyncio.create_task(hold(admission, "b", release, log))
+        waiting = asyncio.create_task(hold(admission, "c", release, log))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert log == ["a", "c"]
+        assert admission._active == 0 and not admission._per_user
+
+    asyncio.run(scenario())
+
+def test_per_caller_limit():
+    async def scenario():
+        admission = controller(max_concurrency=5, max_per_user=1)
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(admission, "a", release, []))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.admit("a"):
+                pass
+        assert rejected.value.reason == "user"
+
+        # Callers without a key only count against the worker limit
+        async with admission.admit(None):
+            async with admission.admit(None):
+                pass
+
+        release.set()
+        await running
+
+    asyncio.run(scenario())
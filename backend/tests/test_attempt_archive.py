@@ -0,0 +1,46 @@
+"""Archive segments decode back to the rows they were encoded from"""
+
+import pytest
+
+from src.services.attempt_archive import decode_segment, encode_segment, segment_header
+
+def attempt(n: int, **fields):
+    row = {
+        "session_id": f"session-{n % 3}",
+        "question_id": 1000 + n,
+        "topic": ["algebra", "geometry"][n % 2],
+        "difficulty": ["easy", "medium", "hard"][n % 3],
+        "is_correct": n % 4 != 0,
+        "time_spent": 1500 * n,
+        "created_at": f"2025-01-0{1 + n // 4}T10:{n:02d}:00.{n * 7:03d}Z",
+    }
+    row.update(fields)
+    return row
+
+def test_segment_round_trip():
+    rows = [attempt(n) for n in range(12)]
+    assert decode_segment(encode_segment(rows)) == rows
+
+def test_segment_header():
+    rows = [attempt(n) for n in range(5)]
+    header = segment_header(encode_segment(rows))
+    assert header["count"] == 5
+    assert header["first_ms"] < header["last_ms"]
+
+def test_segment_keeps_equal_and_naive_timestamps():
+    rows = [
+        attempt(1, created_at="2025-03-01T08:00:00"),
+        attempt(2, created_at="2025-03-01T08:00:00"),
+        attempt(3, created_at="2025-03-01T08:00:00.250+00:00"),
+    ]
+    decoded = decode_segment(encode_segment(rows))
+    assert [row["created_at"] for row in decoded] == [
+        "2025-03-01T08:00:00.000Z",
+        "2025-03-01T08:00:00.000Z",
+        "2025-03-01T08:00:00.250Z",
+    ]
+    assert [row["question_id"] for row in decoded] == [1001, 1002, 1003]
+
+def test_not_a_segment():
+    with pytest.raises(ValueError):
+        decode_segment(b"garbage")
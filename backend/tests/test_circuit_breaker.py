@@ -0,0 +1,89 @@
+"""Circuit breaker cycle: closed -> open -> half-open -> closed"""
+
+import types
+
+import pytest
+
+from src.utils import resilience
+from src.utils.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+def fail(breaker: CircuitBreaker):
+    with pytest.raises(ConnectionError):
+        with breaker.guard():
+            raise ConnectionError("down")
+
+def succeed(breaker: CircuitBreaker):
+    with breaker.guard():
+        pass
+
+def test_breaker_cycle(clock):
+    breaker = CircuitBreaker("test-cycle", failure_threshold=3, reset_seconds=30)
+
+    # Closed: failures below the threshold still go through
+    fail(breaker)
+    fail(breaker)
+    assert breaker.state == CLOSED and breaker.available
+
+    # Opens on the threshold and fails fast until the reset time
+    fail(breaker)
+    assert breaker.state == OPEN and not breaker.available
+    with pytest.raises(CircuitOpenError):
+        succeed(breaker)
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        succeed(breaker)
+
+    # Half-open: a single probe goes through, concurrent calls still fail fast
+    clock.now += 1
+    assert breaker.available
+    with breaker.guard():
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            succeed(breaker)
+
+    # The probe succeeded, so it closes again
+    assert breaker.state == CLOSED and breaker.failures == 0
+    succeed(breaker)
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("test-reopen", failure_threshold=1, reset_seconds=10)
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    fail(breaker)
+    assert breaker.state == OPEN
+    # A fresh reset period starts from the failed probe
+    clock.now += 9
+    with pytest.raises(CircuitOpenError):
+        succeed(breaker)
+    clock.now += 1
+    succeed(breaker)
+    assert breaker.state == CLOSED
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("test-reset", failure_threshold=2, reset_seconds=10)
+    fail(breaker)
+    succeed(breaker)
+    fail(breaker)
+    assert breaker.state == CLOSED
+
+def test_non_failures_count_as_success(clock):
+    breaker = CircuitBreaker("test-4xx", failure_threshold=1, reset_seconds=10)
+    with pytest.raises(ValueError):
+        with breaker.guard(is_failure=lambda e: not isinstance(e, ValueError)):
+            raise ValueError("bad request")
+    assert breaker.state == CLOSED
@@ -135,11 +135,24 @@ class ApiClient {
 
   // Game endpoints
   async saveScore(gameId: string, analytics: any) {
+    // Columnar encoding: one array per attempt field instead of an object per attempt.
+    // About a third of the size and much cheaper for the backend to validate.
+    // topicPerformance is left out - the backend derives everything from the attempts.
+    const { questionAttempts = [], topicPerformance, ...rest } = analytics
+    const attempts = {
+      questionId: questionAttempts.map((a: any) => a.questionId),
+      topic: questionAttempts.map((a: any) => a.topic),
+      difficulty: questionAttempts.map((a: any) => a.difficulty),
+      isCorrect: questionAttempts.map((a: any) => a.isCorrect),
+      timeSpent: questionAttempts.map((a: any) => a.timeSpent),
+    }
+
     return this.request('/api/games/save-score', {
       method: 'POST',
+      headers: { 'Content-Type': 'application/vnd.arcade.columnar+json' },
       body: JSON.stringify({
         gameId,
-        analytics,
+        analytics: { ...rest, attempts },
       }),
     })
   }